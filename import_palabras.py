@@ -2,6 +2,8 @@ import sqlite3
 import csv
 import os
 
+from src.services.palabras_search import ensure_search_index
+
 # Ruta a la base de datos
 db_path = os.path.join('data', 'kanji.db')
 
@@ -41,6 +43,11 @@ if count == 0:
 else:
     print(f"La tabla 'palabras_frecuentes' ya contiene {count} registros")
 
+# Crear el índice de búsqueda; después los triggers lo mantienen al día
+if ensure_search_index(conn):
+    conn.commit()
+    print("Índice de búsqueda 'palabras_fts' creado")
+
 # Mostrar las 10 primeras filas de la tabla kanji
 print("\n=== 10 PRIMERAS FILAS DE LA TABLA KANJI ===")
 cursor.execute('SELECT * FROM kanji LIMIT 10')
@@ -0,0 +1,17 @@
+import re
+from typing import Optional
+
+from fastapi import Header, HTTPException
+
+from src.services.srs_store import DEFAULT_USER
+
+# Los ids de usuario se usan como nombre de directorio en el almacén JSON
+USER_ID_PATTERN = re.compile(r"^[A-Za-z0-9_-]{1,64}$")
+
+def get_user_id(x_user_id: Optional[str] = Header(None)) -> str:
+    """Usuario de la petición, tomado de la cabecera X-User-Id"""
+    if x_user_id is None:
+        return DEFAULT_USER
+    if not USER_ID_PATTERN.match(x_user_id):
+        raise HTTPException(status_code=400, detail="X-User-Id inválido")
+    return x_user_id
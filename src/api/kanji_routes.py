@@ -0,0 +1,25 @@
+from fastapi import APIRouter, Query
+from pydantic import BaseModel
+from typing import List, Optional
+
+from src.services.autocomplete import MAX_SUGGESTIONS, kanji_autocomplete
+
+router = APIRouter(prefix="/kanji", tags=["kanji"])
+
+class KanjiItem(BaseModel):
+    id: int
+    kanji: str
+    significado: Optional[str] = None
+    lectura_china: Optional[str] = None
+    lectura_japonesa: Optional[str] = None
+    total_char_freq: Optional[float] = None
+
+@router.get("/autocomplete", response_model=List[KanjiItem])
+def autocompletar_kanji(
+    q: str = Query(..., description="Texto escrito hasta ahora: kanji, lectura o significado"),
+    limit: int = Query(10, ge=1, le=MAX_SUGGESTIONS, description="Número máximo de sugerencias")
+):
+    """
+    Sugiere kanji cuyo carácter, lectura o significado empieza por el texto, por frecuencia de uso
+    """
+    return [KanjiItem(**row) for row in kanji_autocomplete().suggest(q, limit)]
@@ -1,5 +1,6 @@
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
+import anyio.to_thread
 import sqlite3
 from pathlib import Path
 from datetime import datetime
@@ -7,13 +8,23 @@ from datetime import datetime
 from src.api import config_routes
 from src.api import quiz_routes
 from src.api import palabras_routes
-from src.config.srs_config import config as srs_config
+from src.api import srs_routes
+from src.api import kanji_routes
+from src.services.card_catalog import kanji_catalog, palabras_catalog
+from src.services.palabras_search import ensure_search_index
+from src.services.srs_service import flush_all as flush_srs_services
+from src.services.srs_users import close_all as close_srs_pools
+from src.utils.db_pool import close_pools, get_pool
 
 # Configuración de rutas
 BASE_DIR = Path(__file__).parent.parent.parent
 DATA_DIR = BASE_DIR / 'data'
 KANJI_DB_PATH = DATA_DIR / 'kanji.db'
 
+# Hilos para los handlers síncronos (def): hacen E/S bloqueante con SQLite y
+# ficheros, así que se ejecutan en el threadpool y no en el bucle de eventos
+THREADPOOL_SIZE = 64
+
 app = FastAPI(title="Kanji Quiz API")
 
 # Configuración CORS
@@ -31,28 +42,62 @@ app.add_middleware(
 app.include_router(config_routes.router)
 app.include_router(quiz_routes.router)
 app.include_router(palabras_routes.router)
+app.include_router(srs_routes.router)
+app.include_router(kanji_routes.router)
 
 def init_db():
     """Inicializa la base de datos si no existe"""
-    conn = sqlite3.connect(KANJI_DB_PATH)
-    cursor = conn.cursor()
-    
-    cursor.execute('''
-    CREATE TABLE IF NOT EXISTS kanji (
-        id INTEGER PRIMARY KEY AUTOINCREMENT,
-        kanji TEXT UNIQUE NOT NULL,
-        significado TEXT,
-        lectura_china TEXT,
-        lectura_japonesa TEXT
-    )
-    ''')
-    
-    conn.commit()
-    conn.close()
+    with get_pool(KANJI_DB_PATH).writer() as conn:
+        conn.execute('''
+        CREATE TABLE IF NOT EXISTS kanji (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            kanji TEXT UNIQUE NOT NULL,
+            significado TEXT,
+            lectura_china TEXT,
+            lectura_japonesa TEXT
+        )
+        ''')
+        # Índice de búsqueda de palabras, para bases de datos importadas antes de tenerlo
+        has_palabras = conn.execute(
+            "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'palabras_frecuentes'"
+        ).fetchone()
+        if has_palabras:
+            ensure_search_index(conn)
 
 # Initialize database on startup
 init_db()
 
+@app.on_event("startup")
+async def configure_threadpool():
+    """Ajusta el tamaño del threadpool en el que corren los handlers"""
+    anyio.to_thread.current_default_thread_limiter().total_tokens = THREADPOOL_SIZE
+
+@app.on_event("startup")
+def load_catalogs():
+    """Carga en memoria los catálogos de tarjetas"""
+    for catalog in (kanji_catalog, palabras_catalog):
+        try:
+            catalog.snapshot()
+        except sqlite3.OperationalError as e:
+            print(f"No se pudo cargar la tabla {catalog.table}: {e}")
+
+@app.on_event("shutdown")
+def close_catalogs():
+    """Cierra las conexiones de los catálogos"""
+    for catalog in (kanji_catalog, palabras_catalog):
+        catalog.close()
+
+@app.on_event("shutdown")
+def flush_srs_state():
+    """Guarda los repasos pendientes antes de terminar"""
+    close_srs_pools()
+    flush_srs_services()
+
+@app.on_event("shutdown")
+def close_db_pools():
+    """Cierra las conexiones SQLite compartidas, después de guardar los repasos"""
+    close_pools()
+
 def str_to_time(s):
     return datetime.strptime(s, '%H:%M:%S').time() if isinstance(s, str) else s
 
@@ -1,10 +1,16 @@
-from fastapi import APIRouter, HTTPException, Query
+from fastapi import APIRouter, Depends, HTTPException, Query
 from pydantic import BaseModel
-from typing import List, Optional, Dict
-import sqlite3
+from typing import List, Optional
 import random
 from pathlib import Path
-from src.services.srs_service import SRSService
+from src.services.srs_users import SRSUserPool
+from src.api.dependencies import get_user_id
+from src.services.card_catalog import CatalogSnapshot, palabras_catalog
+from src.services.answer_cache import answer_cache
+from src.services.autocomplete import MAX_SUGGESTIONS, palabras_autocomplete
+from src.services.japanese_index import japanese_index
+from src.services.palabras_search import ORDERS, search, top
+from src.utils.db_pool import get_pool
 
 router = APIRouter(prefix="/palabras", tags=["palabras"])
 
@@ -12,12 +18,12 @@ router = APIRouter(prefix="/palabras", tags=["palabras"])
 DATA_DIR = Path(__file__).parent.parent.parent / 'data'
 DB_PATH = DATA_DIR / 'kanji.db'
 
-# Inicializar servicios SRS para palabras
-palabra_significado_srs = SRSService(DATA_DIR / 'srs_state_palabra_significado.json')
-significado_palabra_srs = SRSService(DATA_DIR / 'srs_state_significado_palabra.json')
+# Valores aceptados en el parámetro orden de las búsquedas
+ORDER_PATTERN = f"^({'|'.join(ORDERS)})$"
 
-# Cache para almacenar respuestas correctas
-answer_cache: Dict[str, int] = {}
+# Inicializar servicios SRS para palabras
+palabra_significado_srs = SRSUserPool('palabra_significado', catalog=palabras_catalog, write_behind=True)
+significado_palabra_srs = SRSUserPool('significado_palabra', catalog=palabras_catalog, write_behind=True)
 
 # Modelos
 class PalabraItem(BaseModel):
@@ -29,8 +35,15 @@ class PalabraItem(BaseModel):
 class PalabrasResponse(BaseModel):
     total: int
     items: List[PalabraItem]
+    next_cursor: Optional[str] = None
+
+class BusquedaJaponesaResponse(BaseModel):
+    total: int
+    items: List[PalabraItem]
+    kanji: List[str]
 
 class QuizQuestion(BaseModel):
+    question_id: str
     palabra: str
     options: List[str]
     correct_option: int
@@ -41,75 +54,56 @@ class QuizResponse(BaseModel):
     next_due: str
 
 class PalabraAnswer(BaseModel):
+    question_id: str
     palabra: str
     answer: int
 
 class SignificadoQuestion(BaseModel):
+    question_id: str
     significado: str
     options: List[str]
     correct_option: int
 
 class SignificadoAnswer(BaseModel):
+    question_id: str
     significado: str
     answer: int
 
 def connect_db():
-    """Crea una conexión a la base de datos"""
-    return sqlite3.connect(DB_PATH)
+    """Presta una conexión de solo lectura del pool compartido"""
+    return get_pool(DB_PATH).reader()
 
-def load_palabras():
-    """Carga las palabras frecuentes desde la base de datos"""
-    conn = connect_db()
-    cursor = conn.cursor()
-    
-    cursor.execute("SELECT id, frecuencia, palabra, significado FROM palabras_frecuentes")
-    palabras = [
-        {
-            "id": row[0],
-            "frecuencia": row[1],
-            "palabra": row[2],
-            "significado": row[3]
-        } for row in cursor.fetchall()
-    ]
-    conn.close()
-    
-    return palabras
+def search_page(conn, field: str, text: str, limit: int, orden: str, cursor: Optional[str]):
+    """Página de resultados de búsqueda; 400 si el cursor no es válido o no admite el orden pedido"""
+    try:
+        return search(conn, field, text, limit, orden, cursor)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
 
-def generate_choices(items: List[Dict], target: str, field: str = "significado") -> List[str]:
+def generate_choices(snapshot: CatalogSnapshot, target: str, field: str = "significado") -> List[str]:
     """Genera opciones para el quiz"""
-    all_options = [item[field] for item in items if item[field]]
-    unique_options = list(set(all_options) - {target})
+    choices = snapshot.sample_distractors(field, target, 3)
     
-    if len(unique_options) < 3:
+    if len(choices) < 3:
         return [target]  # Si no hay suficientes opciones, solo devuelve la correcta
     
-    choices = random.sample(unique_options, min(3, len(unique_options)))
     choices.append(target)
     random.shuffle(choices)
     return choices
 
 @router.get("/buscar-por-palabra", response_model=PalabrasResponse)
-async def buscar_por_palabra(
+def buscar_por_palabra(
     palabra: str = Query(..., description="Texto de la palabra japonesa a buscar"),
-    limit: int = Query(10, description="Número máximo de resultados")
+    limit: int = Query(10, description="Número máximo de resultados"),
+    orden: str = Query("frecuencia", pattern=ORDER_PATTERN, description="Orden: frecuencia o relevancia"),
+    cursor: Optional[str] = Query(None, description="next_cursor de la página anterior (solo con orden por frecuencia)")
 ):
     """
     Busca palabras japonesas que contienen el texto especificado
     """
-    conn = connect_db()
-    cursor = conn.cursor()
-    
-    # Buscar palabras que contengan el texto (usando LIKE)
-    query = "SELECT id, frecuencia, palabra, significado FROM palabras_frecuentes WHERE palabra LIKE ? ORDER BY frecuencia LIMIT ?"
-    cursor.execute(query, (f"%{palabra}%", limit))
-    
-    rows = cursor.fetchall()
-    
-    # Obtener el total de coincidencias (sin el límite)
-    cursor.execute("SELECT COUNT(*) FROM palabras_frecuentes WHERE palabra LIKE ?", (f"%{palabra}%",))
-    total = cursor.fetchone()[0]
-    
-    conn.close()
+    with connect_db() as conn:
+        # Buscar en el índice de texto completo (LIKE si el texto es muy corto)
+        rows, total, next_cursor = search_page(conn, "palabra", palabra, limit, orden, cursor)
     
     # Convertir a modelo de datos
     items = [
@@ -117,30 +111,21 @@ async def buscar_por_palabra(
         for row in rows
     ]
     
-    return PalabrasResponse(total=total, items=items)
+    return PalabrasResponse(total=total, items=items, next_cursor=next_cursor)
 
 @router.get("/buscar-por-significado", response_model=PalabrasResponse)
-async def buscar_por_significado(
+def buscar_por_significado(
     significado: str = Query(..., description="Texto del significado a buscar"),
-    limit: int = Query(10, description="Número máximo de resultados")
+    limit: int = Query(10, description="Número máximo de resultados"),
+    orden: str = Query("frecuencia", pattern=ORDER_PATTERN, description="Orden: frecuencia o relevancia"),
+    cursor: Optional[str] = Query(None, description="next_cursor de la página anterior (solo con orden por frecuencia)")
 ):
     """
     Busca palabras japonesas por su significado
     """
-    conn = connect_db()
-    cursor = conn.cursor()
-    
-    # Buscar por significado (usando LIKE)
-    query = "SELECT id, frecuencia, palabra, significado FROM palabras_frecuentes WHERE significado LIKE ? ORDER BY frecuencia LIMIT ?"
-    cursor.execute(query, (f"%{significado}%", limit))
-    
-    rows = cursor.fetchall()
-    
-    # Obtener el total de coincidencias (sin el límite)
-    cursor.execute("SELECT COUNT(*) FROM palabras_frecuentes WHERE significado LIKE ?", (f"%{significado}%",))
-    total = cursor.fetchone()[0]
-    
-    conn.close()
+    with connect_db() as conn:
+        # Buscar en el índice de texto completo (LIKE si el texto es muy corto)
+        rows, total, next_cursor = search_page(conn, "significado", significado, limit, orden, cursor)
     
     # Convertir a modelo de datos
     items = [
@@ -148,29 +133,48 @@ async def buscar_por_significado(
         for row in rows
     ]
     
-    return PalabrasResponse(total=total, items=items)
+    return PalabrasResponse(total=total, items=items, next_cursor=next_cursor)
+
+@router.get("/buscar-japones", response_model=BusquedaJaponesaResponse)
+def buscar_japones(
+    q: str = Query(..., description="Palabra o lectura en hiragana, katakana o kanji"),
+    limit: int = Query(10, description="Número máximo de resultados")
+):
+    """
+    Busca palabras por su escritura o lectura sin distinguir hiragana, katakana ni anchura,
+    y por la lectura de los kanji que contienen
+    """
+    rows, kanji = japanese_index().lookup(q)
+    items = [PalabraItem(**row) for row in rows[:limit]]
+    return BusquedaJaponesaResponse(total=len(rows), items=items, kanji=kanji)
+
+@router.get("/autocomplete", response_model=List[PalabraItem])
+def autocompletar_palabras(
+    q: str = Query(..., description="Texto escrito hasta ahora: palabra, lectura o significado"),
+    limit: int = Query(10, ge=1, le=MAX_SUGGESTIONS, description="Número máximo de sugerencias")
+):
+    """
+    Sugiere palabras cuya escritura, lectura o significado empieza por el texto, por frecuencia
+    """
+    return [PalabraItem(**row) for row in palabras_autocomplete().suggest(q, limit)]
 
 @router.get("/top", response_model=PalabrasResponse)
-async def obtener_top_palabras(
-    limit: int = Query(50, description="Número máximo de palabras a mostrar")
+def obtener_top_palabras(
+    limit: int = Query(50, description="Número máximo de palabras a mostrar"),
+    cursor: Optional[str] = Query(None, description="next_cursor de la página anterior")
 ):
     """
     Obtiene las palabras más frecuentes ordenadas por frecuencia
     """
-    conn = connect_db()
-    cursor = conn.cursor()
-    
-    # Obtener las palabras más frecuentes
-    query = "SELECT id, frecuencia, palabra, significado FROM palabras_frecuentes ORDER BY frecuencia LIMIT ?"
-    cursor.execute(query, (limit,))
+    with connect_db() as conn:
+        # Obtener las palabras más frecuentes a partir del cursor
+        try:
+            rows, next_cursor = top(conn, limit, cursor)
+        except ValueError as e:
+            raise HTTPException(status_code=400, detail=str(e))
     
-    rows = cursor.fetchall()
-    
-    # Obtener el total de palabras
-    cursor.execute("SELECT COUNT(*) FROM palabras_frecuentes")
-    total = cursor.fetchone()[0]
-    
-    conn.close()
+    # El total de palabras es el del catálogo, que se recarga cuando cambia la tabla
+    total = len(palabras_catalog.snapshot().cards)
     
     # Convertir a modelo de datos
     items = [
@@ -178,18 +182,19 @@ async def obtener_top_palabras(
         for row in rows
     ]
     
-    return PalabrasResponse(total=total, items=items)
+    return PalabrasResponse(total=total, items=items, next_cursor=next_cursor)
 
 @router.get("/quiz/palabra-significado", response_model=QuizQuestion)
-async def get_palabra_significado_question():
+def get_palabra_significado_question(user_id: str = Depends(get_user_id)):
     """
     Obtiene una pregunta de quiz: palabra -> significado
     """
-    palabras = load_palabras()
+    snapshot = palabras_catalog.snapshot()
+    palabras = snapshot.cards
     if not palabras:
         raise HTTPException(status_code=404, detail="No hay palabras disponibles")
     
-    due_palabras = palabra_significado_srs.get_due_cards(palabras)
+    due_palabras = palabra_significado_srs.get(user_id).get_due_cards(snapshot)
     if not due_palabras:
         # Si no hay palabras pendientes, usa las más frecuentes para empezar
         due_palabras = sorted(palabras, key=lambda x: x["frecuencia"])[:50]
@@ -198,38 +203,40 @@ async def get_palabra_significado_question():
     
     # Seleccionar una palabra aleatoria entre las pendientes
     palabra = random.choice(due_palabras)
-    choices = generate_choices(palabras, palabra["significado"], "significado")
+    choices = generate_choices(snapshot, palabra["significado"], "significado")
     correct_option = choices.index(palabra["significado"]) + 1
     
-    # Almacenar la opción correcta en caché
-    answer_cache[palabra["palabra"]] = correct_option
+    # Almacenar la opción correcta en caché con un id de pregunta opaco
+    question_id = answer_cache.issue({
+        "quiz": "palabra-significado", "user_id": user_id, "id": palabra["id"], "palabra": palabra["palabra"],
+        "correct_option": correct_option
+    })
     
     return {
+        "question_id": question_id,
         "palabra": palabra["palabra"],
         "options": choices,
         "correct_option": correct_option
     }
 
 @router.post("/quiz/palabra-significado/answer", response_model=QuizResponse)
-async def answer_palabra_significado(answer: PalabraAnswer):
+def answer_palabra_significado(answer: PalabraAnswer, user_id: str = Depends(get_user_id)):
     """
     Procesa la respuesta a una pregunta palabra -> significado
     """
-    palabras = load_palabras()
-    palabra = next((p for p in palabras if p["palabra"] == answer.palabra), None)
-    if not palabra:
-        raise HTTPException(status_code=404, detail="Palabra no encontrada")
-    
-    # Obtener la opción correcta de la caché
-    correct_option = answer_cache.get(answer.palabra)
-    if correct_option is None:
+    # Obtener de la caché la opción correcta y la palabra preguntada
+    question = answer_cache.take_matching(
+        answer.question_id, quiz="palabra-significado", user_id=user_id, palabra=answer.palabra
+    )
+    if question is None:
         raise HTTPException(status_code=400, detail="Pregunta expirada o inválida")
     
-    quality = 5 if answer.answer == correct_option else 1
-    new_state = palabra_significado_srs.update_card(str(palabra["id"]), quality)
+    palabra = palabras_catalog.snapshot().by_id.get(question["id"])
+    if not palabra:
+        raise HTTPException(status_code=404, detail="Palabra no encontrada")
     
-    # Limpiar caché
-    answer_cache.pop(answer.palabra, None)
+    quality = 5 if answer.answer == question["correct_option"] else 1
+    new_state = palabra_significado_srs.get(user_id).update_card(str(palabra["id"]), quality)
     
     return {
         "correct": quality == 5,
@@ -238,15 +245,16 @@ async def answer_palabra_significado(answer: PalabraAnswer):
     }
 
 @router.get("/quiz/significado-palabra", response_model=SignificadoQuestion)
-async def get_significado_palabra_question():
+def get_significado_palabra_question(user_id: str = Depends(get_user_id)):
     """
     Obtiene una pregunta de quiz: significado -> palabra
     """
-    palabras = load_palabras()
+    snapshot = palabras_catalog.snapshot()
+    palabras = snapshot.cards
     if not palabras:
         raise HTTPException(status_code=404, detail="No hay palabras disponibles")
     
-    due_palabras = significado_palabra_srs.get_due_cards(palabras)
+    due_palabras = significado_palabra_srs.get(user_id).get_due_cards(snapshot)
     if not due_palabras:
         # Si no hay palabras pendientes, usa las más frecuentes para empezar
         due_palabras = sorted(palabras, key=lambda x: x["frecuencia"])[:50]
@@ -255,38 +263,41 @@ async def get_significado_palabra_question():
     
     # Seleccionar una palabra aleatoria entre las pendientes
     palabra = random.choice(due_palabras)
-    choices = generate_choices(palabras, palabra["palabra"], "palabra")
+    choices = generate_choices(snapshot, palabra["palabra"], "palabra")
     correct_option = choices.index(palabra["palabra"]) + 1
     
-    # Almacenar la opción correcta en caché
-    answer_cache[palabra["significado"]] = correct_option
+    # Almacenar la opción correcta en caché con un id de pregunta opaco
+    question_id = answer_cache.issue({
+        "quiz": "significado-palabra", "user_id": user_id, "id": palabra["id"],
+        "significado": palabra["significado"],
+        "correct_option": correct_option
+    })
     
     return {
+        "question_id": question_id,
         "significado": palabra["significado"],
         "options": choices,
         "correct_option": correct_option
     }
 
 @router.post("/quiz/significado-palabra/answer", response_model=QuizResponse)
-async def answer_significado_palabra(answer: SignificadoAnswer):
+def answer_significado_palabra(answer: SignificadoAnswer, user_id: str = Depends(get_user_id)):
     """
     Procesa la respuesta a una pregunta significado -> palabra
     """
-    palabras = load_palabras()
-    palabra = next((p for p in palabras if p["significado"] == answer.significado), None)
-    if not palabra:
-        raise HTTPException(status_code=404, detail="Significado no encontrado")
-    
-    # Obtener la opción correcta de la caché
-    correct_option = answer_cache.get(answer.significado)
-    if correct_option is None:
+    # Obtener de la caché la opción correcta y la palabra preguntada
+    question = answer_cache.take_matching(
+        answer.question_id, quiz="significado-palabra", user_id=user_id, significado=answer.significado
+    )
+    if question is None:
         raise HTTPException(status_code=400, detail="Pregunta expirada o inválida")
     
-    quality = 5 if answer.answer == correct_option else 1
-    new_state = significado_palabra_srs.update_card(str(palabra["id"]), quality)
+    palabra = palabras_catalog.snapshot().by_id.get(question["id"])
+    if not palabra:
+        raise HTTPException(status_code=404, detail="Significado no encontrado")
     
-    # Limpiar caché
-    answer_cache.pop(answer.significado, None)
+    quality = 5 if answer.answer == question["correct_option"] else 1
+    new_state = significado_palabra_srs.get(user_id).update_card(str(palabra["id"]), quality)
     
     return {
         "correct": quality == 5,
@@ -1,22 +1,18 @@
 from fastapi import APIRouter, HTTPException, Depends
 from pydantic import BaseModel
-from typing import List, Optional, Dict
+from typing import List, Optional
 import random
-from src.services.srs_service import SRSService
-from src.config.srs_config import config as srs_config
-from pathlib import Path
-import sqlite3
+from src.services.srs_users import SRSUserPool
+from src.api.dependencies import get_user_id
+from src.services.card_catalog import CatalogSnapshot, kanji_catalog
+from src.services.answer_cache import answer_cache
+from src.config.srs_config import config_registry
 
 router = APIRouter(prefix="/quiz", tags=["quiz"])
 
 # Initialize SRS services
-DATA_DIR = Path(__file__).parent.parent.parent / 'data'
-KANJI_DB_PATH = DATA_DIR / 'kanji.db'
-significado_srs = SRSService(DATA_DIR / 'srs_state_significado_kanji.json')
-lectura_srs = SRSService(DATA_DIR / 'srs_state_lectura_kanji.json')
-
-# Cache for storing correct answers
-answer_cache: Dict[str, int] = {}
+significado_srs = SRSUserPool('significado_kanji', catalog=kanji_catalog, write_behind=True)
+lectura_srs = SRSUserPool('lectura_kanji', catalog=kanji_catalog, write_behind=True)
 
 # Models
 class KanjiCard(BaseModel):
@@ -26,6 +22,7 @@ class KanjiCard(BaseModel):
     lectura_japonesa: Optional[str] = None
 
 class QuizQuestion(BaseModel):
+    question_id: str
     kanji: str
     options: List[str]
     correct_option: int
@@ -36,16 +33,19 @@ class QuizResponse(BaseModel):
     next_due: str
 
 class KanjiAnswer(BaseModel):
+    question_id: str
     kanji: str
     answer: int
 
 class LecturaKanjiQuestion(BaseModel):
+    question_id: str
     kanji: str
     options: List[str]
     correct_option: int
     reading_type: str
 
 class LecturaKanjiAnswer(BaseModel):
+    question_id: str
     kanji: Optional[str] = None
     lectura: Optional[str] = None
     reading_type: str
@@ -57,84 +57,64 @@ class LecturaKanjiAnswer(BaseModel):
         return self.kanji or self.lectura or ""
 
 class SignificadoKanjiQuestion(BaseModel):
+    question_id: str
     significado: str
     options: List[str]
     correct_option: int
 
 class SignificadoKanjiAnswer(BaseModel):
+    question_id: str
     significado: str
     answer: int
 
-def generate_choices(cards: List[Dict], target: str, field: str = "significado") -> List[str]:
+def generate_choices(snapshot: CatalogSnapshot, target: str, field: str = "significado") -> List[str]:
     """Generate quiz options"""
-    all_options = [card[field] for card in cards if card[field]]
-    unique_options = list(set(all_options) - {target})
-    choices = random.sample(unique_options, min(srs_config.num_choices - 1, len(unique_options)))
-    choices.append(target)
-    random.shuffle(choices)
-    return choices
-
-def load_cards():
-    """Carga las tarjetas desde la base de datos"""
-    conn = sqlite3.connect(KANJI_DB_PATH)
-    cursor = conn.cursor()
-    
-    cursor.execute("SELECT id, kanji, significado, lectura_china, lectura_japonesa FROM kanji")
-    cards = [
-        {
-            "id": row[0],
-            "kanji": row[1],
-            "significado": row[2],
-            "lectura_china": row[3],
-            "lectura_japonesa": row[4]
-        } for row in cursor.fetchall()
-    ]
-    conn.close()
-    
-    return cards
+    return snapshot.quiz_choices(field, target, config_registry.get().num_choices)
 
 @router.get("/kanji-significado", response_model=QuizQuestion)
-async def get_kanji_significado_question():
+def get_kanji_significado_question(user_id: str = Depends(get_user_id)):
     """Get a kanji to meaning quiz question"""
-    cards = load_cards()
-    if not cards:
+    snapshot = kanji_catalog.snapshot()
+    if not snapshot.cards:
         raise HTTPException(status_code=404, detail="No hay tarjetas disponibles")
     
-    due_cards = significado_srs.get_due_cards(cards)
+    due_cards = significado_srs.get(user_id).get_due_cards(snapshot)
     if not due_cards:
         raise HTTPException(status_code=404, detail="No hay tarjetas pendientes para hoy")
     
     card = random.choice(due_cards)
-    choices = generate_choices(cards, card["significado"])
+    choices = generate_choices(snapshot, card["significado"])
     correct_option = choices.index(card["significado"]) + 1
     
-    # Cache the correct option for this kanji
-    answer_cache[card["kanji"]] = correct_option
+    # Cache the correct option under an opaque question id
+    question_id = answer_cache.issue({
+        "quiz": "kanji-significado", "user_id": user_id, "id": card["id"], "kanji": card["kanji"],
+        "correct_option": correct_option
+    })
     
     return {
+        "question_id": question_id,
         "kanji": card["kanji"],
         "options": choices,
         "correct_option": correct_option
     }
 
 @router.post("/kanji-significado/answer", response_model=QuizResponse)
-async def answer_kanji_significado(answer: KanjiAnswer):
+def answer_kanji_significado(answer: KanjiAnswer, user_id: str = Depends(get_user_id)):
     """Process a kanji to meaning quiz answer"""
-    cards = load_cards()
-    card = next((c for c in cards if c["kanji"] == answer.kanji), None)
-    if not card:
-        raise HTTPException(status_code=404, detail="Kanji no encontrado")
-    
-    # Get the correct option from cache
-    correct_option = answer_cache.get(answer.kanji)
-    if correct_option is None:
+    # Get the correct option and the card asked from cache
+    question = answer_cache.take_matching(
+        answer.question_id, quiz="kanji-significado", user_id=user_id, kanji=answer.kanji
+    )
+    if question is None:
         raise HTTPException(status_code=400, detail="Pregunta expirada o inválida")
     
-    quality = 5 if answer.answer == correct_option else 1
-    new_state = significado_srs.update_card(str(card["id"]), quality)
+    card = kanji_catalog.snapshot().by_id.get(question["id"])
+    if not card:
+        raise HTTPException(status_code=404, detail="Kanji no encontrado")
     
-    # Clean up cache
-    answer_cache.pop(answer.kanji, None)
+    quality = 5 if answer.answer == question["correct_option"] else 1
+    new_state = significado_srs.get(user_id).update_card(str(card["id"]), quality)
     
     return {
         "correct": quality == 5,
@@ -143,13 +123,13 @@ async def answer_kanji_significado(answer: KanjiAnswer):
     }
 
 @router.get("/kanji-lectura", response_model=LecturaKanjiQuestion)
-async def get_kanji_lectura_question():
+def get_kanji_lectura_question(user_id: str = Depends(get_user_id)):
     """Get a kanji to reading quiz question"""
-    cards = load_cards()
-    if not cards:
+    snapshot = kanji_catalog.snapshot()
+    if not snapshot.cards:
         raise HTTPException(status_code=404, detail="No hay tarjetas disponibles")
     
-    due_cards = lectura_srs.get_due_cards(cards)
+    due_cards = lectura_srs.get(user_id).get_due_cards(snapshot)
     if not due_cards:
         raise HTTPException(status_code=404, detail="No hay tarjetas pendientes para hoy")
     
@@ -163,13 +143,17 @@ async def get_kanji_lectura_question():
         if not correct_reading:
             raise HTTPException(status_code=404, detail="No hay lecturas disponibles para este kanji")
     
-    choices = generate_choices(cards, correct_reading, f"lectura_{reading_type}")
+    choices = generate_choices(snapshot, correct_reading, f"lectura_{reading_type}")
     correct_option = choices.index(correct_reading) + 1
     
-    # Cache the correct option for this kanji and reading type
-    answer_cache[f"{card['kanji']}_{reading_type}"] = correct_option
+    # Cache the correct option under an opaque question id
+    question_id = answer_cache.issue({
+        "quiz": "kanji-lectura", "user_id": user_id, "id": card["id"], "kanji": card["kanji"],
+        "reading_type": reading_type, "correct_option": correct_option
+    })
     
     return {
+        "question_id": question_id,
         "kanji": card["kanji"],
         "options": choices,
         "correct_option": correct_option,
@@ -177,28 +161,26 @@ async def get_kanji_lectura_question():
     }
 
 @router.post("/kanji-lectura/answer", response_model=QuizResponse)
-async def answer_kanji_lectura(answer: LecturaKanjiAnswer):
+def answer_kanji_lectura(answer: LecturaKanjiAnswer, user_id: str = Depends(get_user_id)):
     """Process a kanji to reading quiz answer"""
-    cards = load_cards()
-    card = next((c for c in cards if c["kanji"] == answer.kanji), None)
+    # Get the correct option and the card asked from cache
+    question = answer_cache.take_matching(
+        answer.question_id, quiz="kanji-lectura", user_id=user_id,
+        kanji=answer.kanji, reading_type=answer.reading_type
+    )
+    if question is None:
+        raise HTTPException(status_code=400, detail="Pregunta expirada o inválida")
+    
+    card = kanji_catalog.snapshot().by_id.get(question["id"])
     if not card:
         raise HTTPException(status_code=404, detail="Kanji no encontrado")
     
-    # Get the correct option from cache
-    cache_key = f"{answer.kanji}_{answer.reading_type}"
-    correct_option = answer_cache.get(cache_key)
-    if correct_option is None:
-        raise HTTPException(status_code=400, detail="Pregunta expirada o inválida")
-    
     correct_reading = card["lectura_china"] if answer.reading_type == "china" else card["lectura_japonesa"]
     if not correct_reading:
         raise HTTPException(status_code=404, detail="Tipo de lectura no disponible para este kanji")
     
-    quality = 5 if answer.answer == correct_option else 1
-    new_state = lectura_srs.update_card(f"{card['id']}_{answer.reading_type}", quality)
-    
-    # Clean up cache
-    answer_cache.pop(cache_key, None)
+    quality = 5 if answer.answer == question["correct_option"] else 1
+    new_state = lectura_srs.get(user_id).update_card(f"{card['id']}_{answer.reading_type}", quality)
     
     return {
         "correct": quality == 5,
@@ -207,47 +189,49 @@ async def answer_kanji_lectura(answer: LecturaKanjiAnswer):
     }
 
 @router.get("/significado-kanji", response_model=SignificadoKanjiQuestion)
-async def get_significado_kanji_question():
+def get_significado_kanji_question(user_id: str = Depends(get_user_id)):
     """Get a meaning to kanji quiz question"""
-    cards = load_cards()
-    if not cards:
+    snapshot = kanji_catalog.snapshot()
+    if not snapshot.cards:
         raise HTTPException(status_code=404, detail="No hay tarjetas disponibles")
     
-    due_cards = significado_srs.get_due_cards(cards)
+    due_cards = significado_srs.get(user_id).get_due_cards(snapshot)
     if not due_cards:
         raise HTTPException(status_code=404, detail="No hay tarjetas pendientes para hoy")
     
     card = random.choice(due_cards)
-    choices = generate_choices(cards, card["kanji"], "kanji")
+    choices = generate_choices(snapshot, card["kanji"], "kanji")
     correct_option = choices.index(card["kanji"]) + 1
     
-    # Cache the correct option for this significado
-    answer_cache[card["significado"]] = correct_option
+    # Cache the correct option under an opaque question id
+    question_id = answer_cache.issue({
+        "quiz": "significado-kanji", "user_id": user_id, "id": card["id"], "significado": card["significado"],
+        "correct_option": correct_option
+    })
     
     return {
+        "question_id": question_id,
         "significado": card["significado"],
         "options": choices,
         "correct_option": correct_option
     }
 
 @router.post("/significado-kanji/answer", response_model=QuizResponse)
-async def answer_significado_kanji(answer: SignificadoKanjiAnswer):
+def answer_significado_kanji(answer: SignificadoKanjiAnswer, user_id: str = Depends(get_user_id)):
     """Process a meaning to kanji quiz answer"""
-    cards = load_cards()
-    card = next((c for c in cards if c["significado"] == answer.significado), None)
-    if not card:
-        raise HTTPException(status_code=404, detail="Significado no encontrado")
-    
-    # Get the correct option from cache
-    correct_option = answer_cache.get(answer.significado)
-    if correct_option is None:
+    # Get the correct option and the card asked from cache; other kanji may share the meaning
+    question = answer_cache.take_matching(
+        answer.question_id, quiz="significado-kanji", user_id=user_id, significado=answer.significado
+    )
+    if question is None:
         raise HTTPException(status_code=400, detail="Pregunta expirada o inválida")
     
-    quality = 5 if answer.answer == correct_option else 1
-    new_state = significado_srs.update_card(str(card["id"]), quality)
+    card = kanji_catalog.snapshot().by_id.get(question["id"])
+    if not card:
+        raise HTTPException(status_code=404, detail="Significado no encontrado")
     
-    # Clean up cache
-    answer_cache.pop(answer.significado, None)
+    quality = 5 if answer.answer == question["correct_option"] else 1
+    new_state = significado_srs.get(user_id).update_card(str(card["id"]), quality)
     
     return {
         "correct": quality == 5,
@@ -256,13 +240,13 @@ async def answer_significado_kanji(answer: SignificadoKanjiAnswer):
     }
 
 @router.get("/lectura-kanji", response_model=LecturaKanjiQuestion)
-async def get_lectura_kanji_question():
+def get_lectura_kanji_question(user_id: str = Depends(get_user_id)):
     """Get a reading to kanji quiz question"""
-    cards = load_cards()
-    if not cards:
+    snapshot = kanji_catalog.snapshot()
+    if not snapshot.cards:
         raise HTTPException(status_code=404, detail="No hay tarjetas disponibles")
     
-    due_cards = lectura_srs.get_due_cards(cards)
+    due_cards = lectura_srs.get(user_id).get_due_cards(snapshot)
     if not due_cards:
         raise HTTPException(status_code=404, detail="No hay tarjetas pendientes para hoy")
     
@@ -276,14 +260,17 @@ async def get_lectura_kanji_question():
         if not correct_reading:
             raise HTTPException(status_code=404, detail="No hay lecturas disponibles para este kanji")
     
-    choices = generate_choices(cards, card["kanji"], "kanji")
+    choices = generate_choices(snapshot, card["kanji"], "kanji")
     correct_option = choices.index(card["kanji"]) + 1
     
-    # Cache the correct option for this reading
-    cache_key = f"{correct_reading}_{reading_type}"
-    answer_cache[cache_key] = correct_option
+    # Cache the correct option under an opaque question id
+    question_id = answer_cache.issue({
+        "quiz": "lectura-kanji", "user_id": user_id, "id": card["id"], "lectura": correct_reading,
+        "reading_type": reading_type, "correct_option": correct_option
+    })
     
     return {
+        "question_id": question_id,
         "kanji": correct_reading,  # Aquí enviamos la lectura como "kanji"
         "options": choices,
         "correct_option": correct_option,
@@ -291,30 +278,23 @@ async def get_lectura_kanji_question():
     }
 
 @router.post("/lectura-kanji/answer", response_model=QuizResponse)
-async def answer_lectura_kanji(answer: LecturaKanjiAnswer):
+def answer_lectura_kanji(answer: LecturaKanjiAnswer, user_id: str = Depends(get_user_id)):
     """Process a reading to kanji quiz answer"""
-    cards = load_cards()
-    
-    # Get the correct option from cache
-    cache_key = f"{answer.reading_value}_{answer.reading_type}"  # Use either kanji or lectura
-    correct_option = answer_cache.get(cache_key)
-    if correct_option is None:
+    # Get the correct option and the card asked from cache
+    question = answer_cache.take_matching(
+        answer.question_id, quiz="lectura-kanji", user_id=user_id,
+        lectura=answer.reading_value, reading_type=answer.reading_type  # Use either kanji or lectura
+    )
+    if question is None:
         raise HTTPException(status_code=400, detail="Pregunta expirada o inválida")
     
-    # Encontrar el kanji que tiene esta lectura
-    card = next((c for c in cards if (
-        (answer.reading_type == "china" and c["lectura_china"] == answer.reading_value) or
-        (answer.reading_type == "japonesa" and c["lectura_japonesa"] == answer.reading_value)
-    )), None)
-    
+    # El kanji preguntado, no el primero que tenga esta lectura
+    card = kanji_catalog.snapshot().by_id.get(question["id"])
     if not card:
         raise HTTPException(status_code=404, detail="Lectura no encontrada")
     
-    quality = 5 if answer.answer == correct_option else 1
-    new_state = lectura_srs.update_card(f"{card['id']}_{answer.reading_type}", quality)
-    
-    # Clean up cache
-    answer_cache.pop(cache_key, None)
+    quality = 5 if answer.answer == question["correct_option"] else 1
+    new_state = lectura_srs.get(user_id).update_card(f"{card['id']}_{answer.reading_type}", quality)
     
     return {
         "correct": quality == 5,
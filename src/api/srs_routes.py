@@ -0,0 +1,48 @@
+from fastapi import APIRouter, Depends, HTTPException, Query
+from typing import Any, Dict, Optional
+
+from src.api.dependencies import get_user_id
+from src.config.srs_config import config_registry
+from src.services.answer_cache import answer_cache
+from src.services.forecast import forecast, forecast_cache
+from src.services.srs_service import flush_all
+from src.services.srs_users import find_pool, health_all
+
+router = APIRouter(prefix="/srs", tags=["srs"])
+
+@router.get("/health")
+def get_srs_health() -> Dict[str, Any]:
+    """Usuarios en memoria, estado de escritura diferida y preguntas pendientes de respuesta"""
+    return {"pools": health_all(), "answer_cache": answer_cache.info(), "forecast_cache": forecast_cache.info()}
+
+@router.post("/flush")
+def flush_srs_state() -> Dict[str, Dict[str, int]]:
+    """Guarda inmediatamente los repasos pendientes de escritura"""
+    return {"flushed": flush_all()}
+
+@router.get("/forecast")
+def get_forecast(
+    direction: str = "significado_kanji",
+    days: int = Query(30, ge=1, le=365),
+    runs: int = Query(50, ge=1, le=200),
+    retention: float = Query(0.85, ge=0.0, le=1.0),
+    seed: int = 0,
+    daily_card_limit: Optional[int] = Query(None, ge=0),
+    new_cards_per_day: Optional[int] = Query(None, ge=0),
+    user_id: str = Depends(get_user_id),
+) -> Dict[str, Any]:
+    """
+    Repasos previstos para los próximos días con la configuración actual o con
+    los daily_card_limit y new_cards_per_day indicados, sin guardarlos
+    """
+    pool = find_pool(direction)
+    if pool is None or pool.catalog is None:
+        raise HTTPException(status_code=404, detail="Dirección de quiz no encontrada")
+    changes = {"daily_card_limit": daily_card_limit, "new_cards_per_day": new_cards_per_day}
+    config = config_registry.get().model_copy(
+        update={name: value for name, value in changes.items() if value is not None}
+    )
+    return {
+        "direction": direction,
+        **forecast(pool.get(user_id), pool.catalog.snapshot(), config, days, runs, retention, seed),
+    }
@@ -1,7 +1,10 @@
-from pydantic import BaseModel, Field
-from typing import List, Optional
+from pydantic import BaseModel, Field, field_validator
+from typing import Callable, List, Optional, Tuple
 from datetime import time
 import json
+import os
+import re
+import threading
 from pathlib import Path
 
 # Base directory configuration
@@ -13,6 +16,9 @@ CONFIG_PATH = DATA_DIR / 'srs_config.json'
 # Ensure data directory exists
 DATA_DIR.mkdir(exist_ok=True)
 
+# Learning steps in minutes or days: "10m", "1d"
+LEARNING_STEP_PATTERN = re.compile(r"^\d+[md]$")
+
 class LearningTimeWindow(BaseModel):
     start_time: time = Field(default=time(9, 0))  # 9:00 AM
     end_time: time = Field(default=time(21, 0))   # 9:00 PM
@@ -51,6 +57,14 @@ class LearningParameters(BaseModel):
     graduation_threshold: int = Field(default=2, description="Successes needed to graduate")
     fail_reset: bool = Field(default=True, description="Reset steps on failure")
 
+    @field_validator("learning_steps")
+    @classmethod
+    def check_learning_steps(cls, steps: List[str]) -> List[str]:
+        for step in steps:
+            if not LEARNING_STEP_PATTERN.match(step):
+                raise ValueError(f"Invalid learning step {step!r}: expected minutes or days such as '10m' or '1d'")
+        return steps
+
 class SRSConfig(BaseModel):
     # General user parameters
     daily_card_limit: int = Field(default=100)
@@ -72,29 +86,105 @@ class SRSConfig(BaseModel):
     min_easiness: float = Field(default=1.3)
     default_easiness: float = Field(default=2.5)
 
+class ConfigRegistry:
+    """
+    Single in-memory copy of the SRS configuration, shared by services and routes.
+
+    The file is read once; after that get() returns the cached config without
+    touching disk. save() writes the file atomically before swapping the
+    in-memory copy, bumps version and notifies subscribers. The returned config
+    is shared: callers replace it through save() or update() instead of
+    mutating it.
+    """
+
+    def __init__(self, path: Path):
+        self.path = Path(path)
+        # (config, version), replaced as a whole so readers never see a mix of two versions
+        self._current: Optional[Tuple[SRSConfig, int]] = None
+        self._lock = threading.RLock()
+        self._subscribers: List[Callable[[SRSConfig, int], None]] = []
+
+    def current(self) -> Tuple[SRSConfig, int]:
+        """Current configuration and its version, loaded from the file on first use"""
+        current = self._current
+        if current is None:
+            with self._lock:
+                if self._current is None:
+                    self._set(self._read())
+                current = self._current
+        return current
+
+    def get(self) -> SRSConfig:
+        """Current configuration"""
+        return self.current()[0]
+
+    @property
+    def version(self) -> int:
+        """Increases every time the configuration changes"""
+        return self.current()[1]
+
+    def _read(self) -> SRSConfig:
+        try:
+            if self.path.exists():
+                with open(self.path, 'r', encoding='utf-8') as f:
+                    return SRSConfig(**json.load(f))
+        except (json.JSONDecodeError, ValueError) as e:
+            print(f"Error loading config file: {e}")
+            print("Creating new config file with default values")
+        # Create new config with default values
+        config = SRSConfig()
+        self._write(config)
+        return config
+
+    def _write(self, config: SRSConfig):
+        # mode="json" turns the time fields into strings; the temporary file
+        # replaces the old one only once it is complete
+        tmp = self.path.with_name(f"{self.path.name}.{os.getpid()}.tmp")
+        with open(tmp, 'w', encoding='utf-8') as f:
+            json.dump(config.model_dump(mode="json"), f, indent=2, ensure_ascii=False)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp, self.path)
+
+    def _set(self, config: SRSConfig):
+        # Call with _lock
+        version = self._current[1] + 1 if self._current else 1
+        self._current = (config, version)
+        for callback in list(self._subscribers):
+            callback(config, version)
+
+    def save(self, config: SRSConfig) -> SRSConfig:
+        """Write the configuration to the file and make it the current one"""
+        with self._lock:
+            self._write(config)
+            self._set(config)
+        return config
+
+    def update(self, **fields) -> SRSConfig:
+        """Save a copy of the current configuration with the given fields replaced"""
+        with self._lock:
+            return self.save(self.get().model_copy(update=fields))
+
+    def reload(self) -> SRSConfig:
+        """Read the file again, to pick up edits made outside the API"""
+        with self._lock:
+            self._set(self._read())
+            return self._current[0]
+
+    def subscribe(self, callback: Callable[[SRSConfig, int], None]):
+        """Call callback(config, version) after every change, and now if a config is loaded"""
+        with self._lock:
+            self._subscribers.append(callback)
+            if self._current is not None:
+                callback(*self._current)
+
+# Global configuration registry
+config_registry = ConfigRegistry(CONFIG_PATH)
+
 def load_config() -> SRSConfig:
-    """Load configuration from file or create default"""
-    try:
-        if CONFIG_PATH.exists():
-            with open(CONFIG_PATH, 'r', encoding='utf-8') as f:
-                config_dict = json.load(f)
-                return SRSConfig(**config_dict)
-    except (json.JSONDecodeError, ValueError) as e:
-        print(f"Error loading config file: {e}")
-        print("Creating new config file with default values")
-    
-    # Create new config with default values
-    config = SRSConfig()
-    save_config(config)
-    return config
+    """Current configuration, from memory"""
+    return config_registry.get()
 
 def save_config(config: SRSConfig):
-    """Save configuration to file"""
-    try:
-        with open(CONFIG_PATH, 'w', encoding='utf-8') as f:
-            json.dump(config.dict(), f, indent=2, ensure_ascii=False)
-    except Exception as e:
-        print(f"Error saving config file: {e}")
-
-# Global configuration instance
-config = load_config() 
\ No newline at end of file
+    """Save configuration to file and memory"""
+    config_registry.save(config)
@@ -10,10 +10,22 @@ sys.path.insert(0, project_root)
 
 def init_application():
     """Initialize the application and its dependencies."""
-    from src.scripts.init_db import init_db
+    from src.utils.cleaning import ensure_kanji_table
+    from src.utils.db_pool import connect
+    from src.utils.paths import DATA_DIR, KANJI_DB_PATH
     
-    # Initialize the database
-    init_db()
+    # Only check the schema: the SRS state keys cards by kanji id, so the table
+    # is never rebuilt here (src/scripts/init_db.py imports kanji_data)
+    DATA_DIR.mkdir(exist_ok=True)
+    conn = connect(KANJI_DB_PATH)
+    try:
+        with conn:
+            ensure_kanji_table(conn)
+        empty = conn.execute("SELECT COUNT(*) FROM kanji").fetchone()[0] == 0
+    finally:
+        conn.close()
+    if empty:
+        print("La tabla kanji está vacía. Importa los datos con: python src/scripts/init_db.py")
 
 def main():
     """Main function to run the application."""
@@ -0,0 +1,138 @@
+"""
+Microbenchmark of per-keystroke autocomplete latency.
+
+Simulates typing a sample of words, readings and meanings one character at a
+time and measures how long each suggestion takes against the in-memory
+prefix index. --scale repeats the palabras catalog with synthetic variants to
+check that latency stays flat as the dictionary grows, and --compare-like also
+times the LIKE query that per-keystroke search used before.
+
+Before timing, it checks known prefix -> kanji results on a fixed catalog
+(every reading of a kanji, in hiragana or katakana, must suggest it) and on
+the kanji catalog of data/kanji.db, and stops if any is missing.
+"""
+import argparse
+import os
+import random
+import sqlite3
+import statistics
+import sys
+import time
+from typing import Callable, Dict, List
+
+# Add the project root to Python path
+project_root = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.insert(0, project_root)
+
+from src.services.autocomplete import (
+    MAX_SUGGESTIONS, Autocomplete, kanji_autocomplete, kanji_entries, palabras_autocomplete, palabras_entries
+)
+from src.services.card_catalog import CatalogSnapshot
+from src.utils.japanese import kanji_readings
+from src.utils.paths import KANJI_DB_PATH
+
+# Catálogo fijo con los formatos de lectura de la tabla kanji, y prefijo -> kanji que debe sugerir
+KANJI_FIXTURE = [
+    {"id": 1, "kanji": "日", "significado": "día, sol", "lectura_china": "ニチ ジツ", "lectura_japonesa": "ひ -び -か",
+     "total_char_freq": 300},
+    {"id": 2, "kanji": "人", "significado": "persona", "lectura_china": "ジン, ニン", "lectura_japonesa": "ひと",
+     "total_char_freq": 200},
+    {"id": 3, "kanji": "一", "significado": "uno", "lectura_china": "イチ イツ", "lectura_japonesa": "ひと-",
+     "total_char_freq": 100},
+]
+EXPECTED_KANJI = {
+    "に": ["日", "人"], "にち": ["日"], "じ": ["日", "人"], "じつ": ["日"], "ジツ": ["日"], "か": ["日"],
+    "び": ["日"], "ひと": ["人", "一"], "いつ": ["一"], "per": ["人"], "日": ["日"],
+}
+
+def scaled_palabras(scale: int) -> Autocomplete:
+    """Autocompletado sobre el catálogo de palabras repetido scale veces con variantes sintéticas"""
+    failures = check_kanji(kanji)
+    if failures:
+        for failure in failures[:20]:
+            print(f"FALLO {failure}")
+        sys.exit(1)
+    print(f"Sugerencias de kanji comprobadas: {len(EXPECTED_KANJI)} prefijos fijos y todas las lecturas del catálogo\n")
+
+    base = palabras_autocomplete().snapshot.cards
+    rows = []
+    for copy in range(scale):
+        suffix = "" if copy == 0 else f"{copy}"
+        for row in base:
+            rows.append({**row, "id": copy * len(base) + row["id"], "frecuencia": copy * len(base) + row["frecuencia"],
+                         "palabra": row["palabra"] + suffix, "significado": row["significado"] + suffix})
+    snapshot = CatalogSnapshot(rows, [])
+    return Autocomplete(snapshot, palabras_entries(snapshot))
+
+def check_kanji(kanji: Autocomplete) -> List[str]:
+    """Prefijos del catálogo fijo y lecturas completas de la base de datos que no sugieren su kanji"""
+    fixture = CatalogSnapshot(KANJI_FIXTURE, [])
+    fixed = Autocomplete(fixture, kanji_entries(fixture))
+    failures = []
+    for prefix, expected in EXPECTED_KANJI.items():
+        got = [row["kanji"] for row in fixed.suggest(prefix, 10)]
+        if got != expected:
+            failures.append(f"{prefix!r}: {got}, se esperaba {expected}")
+    for row in kanji.snapshot.cards:
+        for field in ("lectura_china", "lectura_japonesa"):
+            for reading in kanji_readings(row[field]):
+                if row not in kanji.suggest(reading, MAX_SUGGESTIONS):
+                    failures.append(f"{reading!r} ({field}) no sugiere {row['kanji']}")
+    return failures
+
+def keystrokes(words: List[str]) -> List[str]:
+    """Todos los prefijos que se envían al escribir cada palabra"""
+    return [word[:end] for word in words for end in range(1, len(word) + 1)]
+
+def measure(name: str, prefixes: List[str], suggest: Callable[[str], object]):
+    latencies = []
+    for prefix in prefixes:
+        start = time.perf_counter()
+        suggest(prefix)
+        latencies.append(time.perf_counter() - start)
+    quantiles = statistics.quantiles(latencies, n=100, method='inclusive')
+    print(f"{name:32} {len(latencies):7} pulsaciones  p50 {quantiles[49] * 1e6:8.1f} us  "
+          f"p99 {quantiles[98] * 1e6:8.1f} us  máx {max(latencies) * 1e6:8.1f} us")
+
+def main(samples: int, scale: int, compare_like: bool):
+    random.seed(0)
+    palabras = scaled_palabras(scale) if scale > 1 else palabras_autocomplete()
+    kanji = kanji_autocomplete()
+    print(f"Índice de palabras: {len(palabras.snapshot.cards)} filas, {len(palabras.index)} claves; "
+          f"índice de kanji: {len(kanji.snapshot.cards)} filas, {len(kanji.index)} claves\n")
+
+    failures = check_kanji(kanji)
+    if failures:
+        for failure in failures[:20]:
+            print(f"FALLO {failure}")
+        sys.exit(1)
+    print(f"Sugerencias de kanji comprobadas: {len(EXPECTED_KANJI)} prefijos fijos y todas las lecturas del catálogo\n")
+
+    base = palabras_autocomplete().snapshot.cards
+    sample = random.sample(base, min(samples, len(base)))
+    words: Dict[str, List[str]] = {
+        "palabras (escritura)": [row["palabra"].split("【")[0] for row in sample],
+        "palabras (significado)": [row["significado"].split(". ", 1)[-1].split(";")[0] for row in sample],
+    }
+    for name, typed in words.items():
+        measure(name, keystrokes(typed), lambda prefix: palabras.suggest(prefix, 10))
+    kanji_words = [row["significado"] or "" for row in kanji.snapshot.cards] + \
+                  [reading for row in kanji.snapshot.cards
+                   for field in ("lectura_china", "lectura_japonesa") for reading in kanji_readings(row[field])]
+    measure("kanji (significado y lectura)", keystrokes(kanji_words), lambda prefix: kanji.suggest(prefix, 10))
+
+    if compare_like:
+        conn = sqlite3.connect(KANJI_DB_PATH)
+        measure("LIKE palabras (escritura)", keystrokes(words["palabras (escritura)"]), lambda prefix: conn.execute(
+            "SELECT id FROM palabras_frecuentes WHERE palabra LIKE ? ORDER BY frecuencia LIMIT 10",
+            (f"%{prefix}%",)
+        ).fetchall())
+        conn.close()
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--samples", type=int, default=200, help="Palabras que se simulan escribir")
+    parser.add_argument("--scale", type=int, default=1, help="Veces que se repite el catálogo de palabras")
+    parser.add_argument("--compare-like", action="store_true", help="Medir también la consulta LIKE")
+    args = parser.parse_args()
+    main(args.samples, args.scale, args.compare_like)
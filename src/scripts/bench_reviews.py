@@ -0,0 +1,122 @@
+"""
+Microbenchmark of SRS review throughput.
+
+Replays random reviews against an SRSService with an in-memory store and
+reports reviews per second, comparing calculate_next_interval before and after
+it used the compiled Schedule. The "before" version is the previous
+implementation, which parsed learning_steps and walked the pydantic config on
+every review. Its response_scale index is clamped so that quality 5 does not
+raise IndexError. --batch also times the same reviews through the vectorized
+schedule_batch.
+"""
+import argparse
+import os
+import random
+import sys
+import time
+import types
+from datetime import timedelta
+from typing import Any, Dict
+
+import numpy as np
+
+# Add the project root to Python path
+project_root = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.insert(0, project_root)
+
+from src.services.batch_scheduler import schedule_batch
+from src.services.srs_service import SRSService
+from src.services.srs_store import SRSStateStore
+
+class MemoryStore(SRSStateStore):
+    """Almacén que no guarda nada, para medir solo el cálculo del repaso"""
+    name = "bench"
+
+    def load(self) -> Dict[str, Dict[str, Any]]:
+        return {}
+
+    def save_card(self, card_id: str, card_state: Dict[str, Any]):
+        pass
+
+def legacy_next_interval(self, card_state: Dict[str, Any], quality: int, plan=None) -> timedelta:
+    """calculate_next_interval antes de compilar la configuración"""
+    if card_state["learning_step"] < len(self.config.learning_parameters.learning_steps):
+        if quality < 3:
+            if self.config.learning_parameters.fail_reset:
+                card_state["learning_step"] = 0
+            return self.parse_interval(self.config.learning_parameters.learning_steps[0])
+        else:
+            next_step = card_state["learning_step"] + 1
+            if next_step < len(self.config.learning_parameters.learning_steps):
+                return self.parse_interval(self.config.learning_parameters.learning_steps[next_step])
+            card_state["learning_step"] = len(self.config.learning_parameters.learning_steps)
+            return timedelta(days=self.config.card_parameters.initial_interval)
+    if quality < 3:
+        card_state["lapses"] += 1
+        if card_state["lapses"] >= self.config.feedback_parameters.leech_threshold:
+            card_state["is_leech"] = True
+        card_state["easiness"] *= self.config.feedback_parameters.lapse_penalty
+        return timedelta(days=self.config.card_parameters.minimum_interval)
+    if card_state["interval"] == 0:
+        interval = self.config.card_parameters.initial_interval
+    else:
+        scale = self.config.feedback_parameters.response_scale
+        modifier = self.config.feedback_parameters.interval_modifiers[scale[min(quality - 1, len(scale) - 1)]]
+        interval = int(card_state["interval"] * card_state["easiness"] * modifier)
+    interval = max(self.config.card_parameters.minimum_interval,
+                   min(interval, self.config.card_parameters.maximum_interval))
+    return timedelta(days=interval)
+
+def review_plan(cards: int, reviews: int, seed: int):
+    """Secuencia de (tarjeta, calidad): aciertos (5) y fallos (1), como en los quizzes"""
+    rng = random.Random(seed)
+    return [(str(rng.randrange(cards)), 5 if rng.random() < 0.85 else 1) for _ in range(reviews)]
+
+def run(name: str, plan, legacy: bool, interval_only: bool) -> float:
+    service = SRSService(MemoryStore())
+    if legacy:
+        service.calculate_next_interval = types.MethodType(legacy_next_interval, service)
+    # Primer repaso de cada tarjeta fuera de la medida, para que todas tengan estado
+    for card_id, _ in plan:
+        if card_id not in service.state:
+            service.update_card(card_id, 5)
+    start = time.perf_counter()
+    if interval_only:
+        for card_id, quality in plan:
+            service.calculate_next_interval(service.state[card_id], quality)
+    else:
+        for card_id, quality in plan:
+            service.update_card(card_id, quality)
+    rate = len(plan) / (time.perf_counter() - start)
+    print(f"{name:42} {rate:12,.0f} repasos/s")
+    return rate
+
+def run_batch(plan) -> float:
+    card_ids = [card_id for card_id, _ in plan]
+    qualities = [quality for _, quality in plan]
+    timestamps = np.datetime64("2024-01-01T09:00:00") + np.arange(len(plan)) * np.timedelta64(60, "s")
+    start = time.perf_counter()
+    schedule_batch(card_ids, qualities, timestamps)
+    rate = len(plan) / (time.perf_counter() - start)
+    print(f"{'schedule_batch':42} {rate:12,.0f} repasos/s")
+    return rate
+
+def main(cards: int, reviews: int, repeat: int, batch: bool):
+    plan = review_plan(cards, reviews, seed=0)
+    print(f"{reviews} repasos sobre {cards} tarjetas, mejor de {repeat} ejecuciones\n")
+    for interval_only, label in ((True, "calculate_next_interval"), (False, "update_card")):
+        before = max(run(f"{label} (antes)", plan, True, interval_only) for _ in range(repeat))
+        after = max(run(f"{label} (Schedule)", plan, False, interval_only) for _ in range(repeat))
+        print(f"{label}: x{after / before:.2f}\n")
+    if batch:
+        rate = max(run_batch(plan) for _ in range(repeat))
+        print(f"schedule_batch frente a update_card: x{rate / after:.2f}")
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--cards", type=int, default=5000, help="Tarjetas distintas")
+    parser.add_argument("--reviews", type=int, default=200000, help="Repasos por ejecución")
+    parser.add_argument("--repeat", type=int, default=3, help="Ejecuciones de cada variante")
+    parser.add_argument("--batch", action="store_true", help="Medir también schedule_batch")
+    args = parser.parse_args()
+    main(args.cards, args.reviews, args.repeat, args.batch)
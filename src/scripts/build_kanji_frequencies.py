@@ -0,0 +1,75 @@
+"""
+Script to rebuild data/kanji_combined.csv from per-corpus kanji counts.
+
+By default it streams the aozora, news and wikipedia *_characters.csv and
+*_documents.csv files in data/. Any corpus can instead be counted from raw
+text with --corpus NAME=PATH, where PATH is a text file or a directory of
+*.txt files; the text is counted in parallel as with count_kanji_corpus.py.
+
+    python src/scripts/build_kanji_frequencies.py
+    python src/scripts/build_kanji_frequencies.py --corpus wiki=/corpus/wiki --doc-per-line --save-counts
+"""
+import argparse
+import os
+import sys
+import time
+from pathlib import Path
+
+# Add the project root to Python path
+project_root = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.insert(0, project_root)
+
+from src.utils.kanji_frequencies import (
+    SOURCES, combine, count_corpus, read_source, write_combined, write_counts
+)
+from src.utils.paths import DATA_DIR
+
+def corpus_files(path: Path) -> list:
+    """Ficheros de texto de un corpus: el propio fichero o los *.txt de un directorio"""
+    if path.is_dir():
+        return sorted(path.rglob('*.txt'))
+    return [path]
+
+def build(corpora: dict, output: Path, doc_per_line: bool, processes: int, save_counts: bool):
+    counts = {}
+    for source in list(SOURCES) + [name for name in corpora if name not in SOURCES]:
+        start = time.perf_counter()
+        if source in corpora:
+            files = corpus_files(corpora[source])
+            corpus = count_corpus(files, doc_per_line, processes)
+            counts[source] = corpus.counts
+            origin = (f"{len(files)} ficheros de texto, {corpus.size / 1e6:.1f} MB, "
+                      f"{corpus.throughput_per_core():.1f} MB/s por núcleo")
+            if save_counts:
+                prefix = SOURCES.get(source, source)
+                write_counts(DATA_DIR / f"{prefix}_characters.csv", counts[source][0], "char_count")
+                write_counts(DATA_DIR / f"{prefix}_documents.csv", counts[source][1], "doc_count")
+        else:
+            counts[source] = read_source(DATA_DIR, SOURCES[source])
+            origin = f"data/{SOURCES[source]}_*.csv"
+        char_counts, doc_counts = counts[source]
+        print(f"{source}: {len(char_counts) - 1} kanji, {char_counts['all']} apariciones, "
+              f"{doc_counts['all']} documentos desde {origin} ({time.perf_counter() - start:.1f}s)")
+
+    rows = combine(counts)
+    write_combined(output, rows, counts)
+    print(f"{len(rows) - 1} kanji escritos en {output}")
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--corpus", action="append", default=[], metavar="NAME=PATH",
+                        help="Contar un corpus desde texto en lugar de desde sus CSV")
+    parser.add_argument("--doc-per-line", action="store_true", help="Cada línea de texto es un documento")
+    parser.add_argument("--processes", type=int, default=None, help="Procesos para contar texto")
+    parser.add_argument("--save-counts", action="store_true",
+                        help="Guardar en data/ los *_characters.csv y *_documents.csv de los corpus contados")
+    parser.add_argument("--output", type=Path, default=DATA_DIR / 'kanji_combined.csv', help="Fichero de salida")
+    args = parser.parse_args()
+
+    corpora = {}
+    for spec in args.corpus:
+        name, sep, path = spec.partition("=")
+        if not sep:
+            parser.error(f"--corpus espera NAME=PATH: {spec}")
+        corpora[name] = Path(path)
+    build(corpora, args.output, args.doc_per_line, args.processes, args.save_counts)
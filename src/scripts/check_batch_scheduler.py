@@ -0,0 +1,193 @@
+"""
+Property-based equivalence check between the vectorized batch scheduler and
+the scalar SRSService.
+
+Each trial draws a random configuration (learning steps, fail_reset, ease,
+lapse penalty, leech threshold, interval bounds and modifiers), a random
+initial state for some cards and a random history of reviews. It replays the
+history one review at a time through SRSService._apply_review and all at once
+through schedule_batch, and requires every per-review result and every final
+state to be identical. It also replays a history that mixes today's reviews
+with older ones through replay and requires the cards first reviewed today to
+count against today's new-card budget, as update_card does. The first
+mismatch is printed with its seed so it can be reproduced with --seed.
+
+    python src/scripts/check_batch_scheduler.py --trials 500
+"""
+import argparse
+import os
+import random
+import sys
+import time
+from datetime import datetime, timedelta
+
+import numpy as np
+
+# Add the project root to Python path
+project_root = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.insert(0, project_root)
+
+from src.config.srs_config import SRSConfig
+from src.services.batch_scheduler import replay, schedule_batch
+from src.services.srs_service import SRSService, Schedule
+from src.services.srs_store import SRSStateStore
+
+class MemoryStore(SRSStateStore):
+    """Almacén vacío que no guarda nada"""
+    name = "check"
+
+    def load(self):
+        return {}
+
+    def save_card(self, card_id, card_state):
+        pass
+
+class SeededStore(MemoryStore):
+    """Almacén que carga un estado dado y no guarda nada"""
+
+    def __init__(self, state: dict):
+        self.state = state
+
+    def load(self):
+        return {card: dict(card_state) for card, card_state in self.state.items()}
+
+def random_config(rng: random.Random) -> SRSConfig:
+    """Configuración aleatoria, incluidos casos límite (sin pasos, mínimo > máximo, escala corta)"""
+    steps = [f"{rng.randint(1, 90)}m" if rng.random() < 0.6 else f"{rng.randint(1, 4)}d"
+             for _ in range(rng.randint(0, 3))]
+    scale = ["Again", "Hard", "Good", "Easy"][:rng.randint(1, 4)]
+    minimum = rng.randint(0, 5)
+    return SRSConfig(
+        card_parameters={
+            "initial_interval": rng.randint(0, 5),
+            "ease_factor": rng.choice([1.3, 2.5, rng.uniform(1.0, 3.5)]),
+            "minimum_interval": minimum,
+            "maximum_interval": rng.choice([minimum - 1, rng.randint(minimum, 400)]),
+        },
+        feedback_parameters={
+            "response_scale": scale,
+            "interval_modifiers": {name: rng.choice([0.0, 0.5, 1.0, 1.5, rng.uniform(0, 3)]) for name in scale},
+            "lapse_penalty": rng.uniform(0.3, 1.0),
+            "leech_threshold": rng.randint(1, 6),
+        },
+        learning_parameters={"learning_steps": steps, "fail_reset": rng.random() < 0.5},
+    )
+
+def random_state(rng: random.Random, plan: Schedule, start: datetime) -> dict:
+    day = (start - timedelta(days=rng.randint(0, 30))).date().isoformat()
+    state = {
+        "interval": rng.randint(0, 200),
+        "repetitions": rng.randint(0, 10),
+        "easiness": rng.uniform(0.5, 3.5),
+        "due": day,
+        "learning_step": rng.randint(0, len(plan.step_seconds) + 1),
+        "lapses": rng.randint(0, 8),
+        "last_review": day,
+        "introduced": day,
+    }
+    if rng.random() < 0.2:
+        state["is_leech"] = True
+    return state
+
+def trial(seed: int) -> str:
+    """Devuelve una descripción del primer resultado distinto, o cadena vacía si todo coincide"""
+    rng = random.Random(seed)
+    plan = Schedule(random_config(rng), version=0)
+    start = datetime(2024, 1, 1) + timedelta(seconds=rng.randint(0, 365 * 86400))
+    cards = [str(card) for card in range(rng.randint(1, 12))]
+    initial = {card: random_state(rng, plan, start) for card in cards if rng.random() < 0.4}
+
+    reviews = []
+    for _ in range(rng.randint(1, 200)):
+        # Varios repasos en el mismo segundo, para comprobar el orden estable
+        when = start + timedelta(seconds=rng.choice([0, rng.randint(0, 90 * 86400)]))
+        quality = rng.choice([0, 1, 2, 3, 4, 5, 5, 5, rng.randint(-2, 8)])
+        reviews.append((rng.choice(cards), quality, when))
+
+    # Escalar: repasos en orden de tiempo, empates en el orden dado
+    service = SRSService(MemoryStore())
+    service.state = {card: dict(state) for card, state in initial.items()}
+    expected = [None] * len(reviews)
+    for index in sorted(range(len(reviews)), key=lambda i: reviews[i][2]):
+        card, quality, when = reviews[index]
+        expected[index] = service._apply_review(card, quality, now=when, plan=plan)
+
+    result = schedule_batch([r[0] for r in reviews], [r[1] for r in reviews],
+                            np.array([np.datetime64(r[2], "s") for r in reviews]),
+                            initial_states=initial, plan=plan)
+    for index, card_state in enumerate(expected):
+        got = {
+            "interval": int(result.interval[index]),
+            "easiness": float(result.easiness[index]),
+            "due": str(result.due[index]),
+            "lapses": int(result.lapses[index]),
+            "learning_step": int(result.learning_step[index]),
+            "repetitions": int(result.repetitions[index]),
+            "is_leech": bool(result.is_leech[index]),
+        }
+        want = {name: card_state.get(name, False) if name == "is_leech" else card_state[name] for name in got}
+        if got != want:
+            return f"repaso {index} {reviews[index]}: escalar {want}, lote {got}"
+    # states() solo incluye las tarjetas repasadas
+    reviewed = {card: service.state[card] for card in {r[0] for r in reviews}}
+    if result.states() != reviewed:
+        return f"estado final distinto: escalar {reviewed}, lote {result.states()}"
+    return ""
+
+def replay_trial(seed: int) -> str:
+    """Comprueba que replay descuenta del cupo de hoy las tarjetas que introduce hoy"""
+    rng = random.Random(seed)
+    now = datetime.now()
+    today = now.date().isoformat()
+    midnight = datetime.combine(now.date(), datetime.min.time())
+    initial = {}
+    for card in range(rng.randint(0, 5)):
+        # Tarjetas ya vistas antes del lote, algunas introducidas hoy
+        day = rng.choice([today, (now - timedelta(days=3)).date().isoformat()])
+        initial[str(card)] = {"interval": 0, "repetitions": 0, "easiness": 2.5, "due": day,
+                              "learning_step": 0, "lapses": 0, "last_review": day, "introduced": day}
+    service = SRSService(SeededStore(initial))
+    before = service.introduced_today
+    seen = set(service.seen_cards)
+
+    cards = [f"{rng.randint(0, 12)}{rng.choice(['', '_china', '_japonesa'])}" for _ in range(rng.randint(1, 30))]
+    reviews = []
+    for card in cards:
+        # Repasos de hoy y de días anteriores (segundos desde medianoche, sin pasar de ahora)
+        when = midnight + timedelta(seconds=rng.randint(0, max(0, (now - midnight).seconds)))
+        if rng.random() < 0.4:
+            when -= timedelta(days=rng.randint(1, 5))
+        reviews.append((card, rng.choice([1, 3, 5]), when))
+
+    first = {}
+    for card, _, when in reviews:
+        base = card.split("_")[0]
+        if base not in seen:
+            first[base] = min(first.get(base, when), when)
+    expected = before + sum(1 for when in first.values() if when.date().isoformat() == today)
+
+    replay(service, [r[0] for r in reviews], [r[1] for r in reviews],
+           np.array([np.datetime64(r[2], "s") for r in reviews]))
+    remaining = max(0, service.config.new_cards_per_day - expected)
+    if service.introduced_today != expected or service.new_cards_remaining() != remaining:
+        return (f"replay: introduced_today {service.introduced_today}, se esperaba {expected}; "
+                f"new_cards_remaining {service.new_cards_remaining()}, se esperaba {remaining}")
+    if not seen | set(first) <= service.seen_cards:
+        return f"replay: faltan tarjetas vistas {seen | set(first) - service.seen_cards}"
+    return ""
+
+def main(trials: int, seed: int):
+    start = time.perf_counter()
+    for offset in range(trials):
+        failure = trial(seed + offset) or replay_trial(seed + offset)
+        if failure:
+            print(f"FALLO con --seed {seed + offset} --trials 1\n{failure}")
+            sys.exit(1)
+    print(f"{trials} pruebas aleatorias idénticas ({time.perf_counter() - start:.1f}s)")
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--trials", type=int, default=300, help="Configuraciones e historiales aleatorios")
+    parser.add_argument("--seed", type=int, default=0, help="Semilla de la primera prueba")
+    args = parser.parse_args()
+    main(args.trials, args.seed)
@@ -0,0 +1,75 @@
+"""
+Check that /srs/forecast counts new cards against the catalog of each direction.
+
+Calls the forecast route for every quiz direction with a user that has no
+state yet and requires the forecast to report no cards and as many unseen
+cards as the direction's catalog has (kanji for the kanji quizzes, palabras
+for the palabras quizzes). It also checks, for --user, that the unseen cards
+are the catalog cards the user has never reviewed.
+
+    python src/scripts/check_forecast.py --days 7 --runs 5
+"""
+import argparse
+import os
+import sys
+import uuid
+from typing import List
+
+# Add the project root to Python path
+project_root = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.insert(0, project_root)
+
+# Registran los pools de cada dirección
+import src.api.palabras_routes  # noqa: F401
+import src.api.quiz_routes  # noqa: F401
+from src.api.srs_routes import get_forecast
+from src.services.card_catalog import kanji_catalog, palabras_catalog
+from src.services.srs_store import DEFAULT_USER
+from src.services.srs_users import close_all, find_pool
+
+CATALOGS = {
+    "significado_kanji": kanji_catalog,
+    "lectura_kanji": kanji_catalog,
+    "palabra_significado": palabras_catalog,
+    "significado_palabra": palabras_catalog,
+}
+
+def check(direction: str, user_id: str, fresh: bool, days: int, runs: int) -> List[str]:
+    """Fallos del pronóstico de una dirección para un usuario"""
+    snapshot = CATALOGS[direction].snapshot()
+    result = get_forecast(direction=direction, days=days, runs=runs, retention=0.85, seed=0,
+                          daily_card_limit=None, new_cards_per_day=None, user_id=user_id)
+    seen = find_pool(direction).get(user_id).seen_cards
+    expected = sum(1 for card in snapshot.cards if str(card["id"]) not in seen)
+    print(f"{direction:20} {user_id:14} catálogo {len(snapshot):6}  vistas {result['cards']:6}  "
+          f"nuevas {result['unseen']:6}")
+    failures = []
+    if result["unseen"] != expected:
+        failures.append(f"{direction} ({user_id}): {result['unseen']} tarjetas nuevas, se esperaban {expected}")
+    if fresh and (result["cards"] or result["unseen"] != len(snapshot)):
+        failures.append(f"{direction}: un usuario sin estado debería tener {len(snapshot)} tarjetas nuevas y "
+                        f"ninguna vista, tiene {result['unseen']} y {result['cards']}")
+    return failures
+
+def main(user: str, days: int, runs: int):
+    fresh = f"check-{uuid.uuid4().hex[:8]}"
+    failures = []
+    try:
+        for direction in CATALOGS:
+            failures += check(direction, fresh, True, days, runs)
+            failures += check(direction, user, False, days, runs)
+    finally:
+        close_all()
+    for failure in failures:
+        print(f"FALLO {failure}")
+    if failures:
+        sys.exit(1)
+    print("Pronósticos correctos para todas las direcciones")
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--user", default=DEFAULT_USER, help="Usuario cuyo estado se comprueba además")
+    parser.add_argument("--days", type=int, default=7, help="Días del pronóstico")
+    parser.add_argument("--runs", type=int, default=5, help="Simulaciones del pronóstico")
+    args = parser.parse_args()
+    main(args.user, args.days, args.runs)
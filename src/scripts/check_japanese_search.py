@@ -0,0 +1,89 @@
+"""
+Check that the Japanese search index finds kanji and words by any of their readings.
+
+Builds a JapaneseIndex over a small fixed catalog whose reading fields use the
+formats found in the kanji table ("ニチ ジツ", "ひ -び -か", "ニチ, ジツ") and
+requires every reading, in hiragana and katakana, to find its kanji and the
+words that contain it. With --db it also checks the catalogs in data/kanji.db:
+every reading of every kanji must find that kanji.
+
+    python src/scripts/check_japanese_search.py --db
+"""
+import argparse
+import os
+import sys
+from typing import List
+
+# Add the project root to Python path
+project_root = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.insert(0, project_root)
+
+from src.services.card_catalog import CatalogSnapshot, kanji_catalog, palabras_catalog
+from src.services.japanese_index import JapaneseIndex
+from src.utils.japanese import kanji_readings
+
+KANJI = [
+    {"id": 1, "kanji": "日", "significado": "día, sol", "lectura_china": "ニチ ジツ", "lectura_japonesa": "ひ -び -か"},
+    {"id": 2, "kanji": "人", "significado": "persona", "lectura_china": "ジン, ニン", "lectura_japonesa": "ひと"},
+    {"id": 3, "kanji": "本", "significado": "libro", "lectura_china": "ホン", "lectura_japonesa": "もと"},
+]
+PALABRAS = [
+    {"id": 1, "palabra": "日本【にほん】", "significado": "Japón", "frecuencia": 1},
+    {"id": 2, "palabra": "毎日", "significado": "todos los días", "frecuencia": 2},
+    {"id": 3, "palabra": "人", "significado": "persona", "frecuencia": 3},
+]
+# búsqueda -> (kanji esperados, palabras que deben aparecer)
+EXPECTED = {
+    "にち": (["日"], ["日本【にほん】", "毎日"]),
+    "ニチ": (["日"], ["日本【にほん】", "毎日"]),
+    "じつ": (["日"], ["日本【にほん】", "毎日"]),
+    "か": (["日"], ["日本【にほん】", "毎日"]),
+    "び": (["日"], ["日本【にほん】", "毎日"]),
+    "にん": (["人"], ["人"]),
+    "ジン": (["人"], ["人"]),
+    "ほん": (["本"], ["日本【にほん】"]),
+}
+
+def check_fixture() -> List[str]:
+    """Fallos sobre el catálogo fijo"""
+    failures = []
+    for field, expected in (("ニチ ジツ", ["にち", "じつ"]), ("ひ -び -か", ["ひ", "び", "か"]),
+                            ("ジン, ニン", ["じん", "にん"]), ("い-く ゆ-く", ["い", "いく", "ゆ", "ゆく"])):
+        if kanji_readings(field) != expected:
+            failures.append(f"kanji_readings({field!r}) = {kanji_readings(field)}, se esperaba {expected}")
+    index = JapaneseIndex(CatalogSnapshot(PALABRAS, []), CatalogSnapshot(KANJI, []))
+    for query, (kanji, words) in EXPECTED.items():
+        rows, chars = index.lookup(query)
+        found = [row["palabra"] for row in rows]
+        if chars != kanji or any(word not in found for word in words):
+            failures.append(f"lookup({query!r}): kanji {chars}, palabras {found}; se esperaba {kanji} y {words}")
+    return failures
+
+def check_db() -> List[str]:
+    """Fallos sobre los catálogos de la base de datos: cada lectura de cada kanji lo encuentra"""
+    index = JapaneseIndex(palabras_catalog.snapshot(), kanji_catalog.snapshot())
+    failures = []
+    for row in index.kanji.cards:
+        for field in ("lectura_china", "lectura_japonesa"):
+            for reading in kanji_readings(row[field]):
+                rows, chars = index.lookup(reading)
+                if row["kanji"] not in chars:
+                    failures.append(f"{row['kanji']}: la lectura {reading!r} de {field} no lo encuentra")
+                elif row["kanji"] in index.by_kanji and not rows:
+                    failures.append(f"{row['kanji']}: la lectura {reading!r} no encuentra sus palabras")
+    print(f"{len(index.kanji.cards)} kanji y {len(index.palabras.cards)} palabras de la base de datos comprobados")
+    return failures
+
+def main(db: bool):
+    failures = check_fixture() + (check_db() if db else [])
+    for failure in failures[:20]:
+        print(f"FALLO {failure}")
+    if failures:
+        sys.exit(1)
+    print(f"{len(EXPECTED)} búsquedas del catálogo fijo correctas")
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--db", action="store_true", help="Comprobar también los catálogos de data/kanji.db")
+    args = parser.parse_args()
+    main(args.db)
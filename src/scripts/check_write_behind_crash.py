@@ -0,0 +1,91 @@
+"""
+Script to measure how many reviews are lost when the process dies with write-behind enabled.
+
+Starts a child process that records reviews through an SRSService in write-behind
+mode and prints each acknowledged review, kills it abruptly in the middle of the
+run, and then compares the acknowledged reviews with the rows that reached SQLite.
+"""
+import argparse
+import os
+import random
+import sqlite3
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from pathlib import Path
+
+# Add the project root to Python path
+project_root = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.insert(0, project_root)
+
+from src.services.srs_service import SRSService
+from src.services.srs_store import SQLiteStateStore
+
+DIRECTION = "crash_check"
+
+def run_child(db_path: Path, flush_interval: float, batch_size: int):
+    """Registra repasos sin parar hasta que lo maten"""
+    service = SRSService(SQLiteStateStore(db_path, DIRECTION), write_behind=True,
+                         flush_interval=flush_interval, batch_size=batch_size)
+    card = 0
+    while True:
+        card += 1
+        service.update_card(str(card), 5)
+        print(card, flush=True)
+
+def read_acks(stream, acks: list):
+    """Guarda en acks[0] el último repaso confirmado por el hijo"""
+    for line in stream:
+        if line.strip().isdigit():
+            acks[0] = int(line)
+
+def run_check(runs: int, flush_interval: float, batch_size: int) -> bool:
+    ok = True
+    for run in range(1, runs + 1):
+        with tempfile.TemporaryDirectory() as tmp:
+            db_path = Path(tmp) / 'srs_state.db'
+            child = subprocess.Popen(
+                [sys.executable, __file__, "--child", str(db_path),
+                 "--flush-interval", str(flush_interval), "--batch-size", str(batch_size)],
+                stdout=subprocess.PIPE, text=True
+            )
+            # Leer las confirmaciones a la vez para que el hijo nunca se bloquee escribiendo
+            acks = [0]
+            reader = threading.Thread(target=read_acks, args=(child.stdout, acks))
+            reader.start()
+            # Dejar que pasen unos cuantos lotes y matar el proceso en mitad de uno
+            time.sleep(random.uniform(1.0, 3.0))
+            child.kill()
+            child.wait()
+            reader.join()
+            acknowledged = acks[0]
+
+            conn = sqlite3.connect(db_path)
+            integrity = conn.execute("PRAGMA integrity_check").fetchone()[0]
+            persisted = conn.execute(
+                "SELECT COUNT(*) FROM srs_state WHERE direction = ?", (DIRECTION,)
+            ).fetchone()[0]
+            conn.close()
+
+        lost = acknowledged - persisted
+        print(f"Ejecución {run}: {acknowledged} repasos confirmados, {persisted} guardados, "
+              f"{lost} perdidos ({lost / max(acknowledged, 1):.2%}), integridad: {integrity}")
+        if integrity != "ok" or lost < 0:
+            ok = False
+    return ok
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--child", metavar="DB_PATH", help=argparse.SUPPRESS)
+    parser.add_argument("--runs", type=int, default=5, help="Número de procesos a matar")
+    parser.add_argument("--flush-interval", type=float, default=0.5, help="Segundos entre escrituras")
+    parser.add_argument("--batch-size", type=int, default=500, help="Repasos pendientes que fuerzan una escritura")
+    args = parser.parse_args()
+
+    if args.child:
+        run_child(Path(args.child), args.flush_interval, args.batch_size)
+    else:
+        print(f"Escritura diferida cada {args.flush_interval}s o {args.batch_size} repasos")
+        sys.exit(0 if run_check(args.runs, args.flush_interval, args.batch_size) else 1)
@@ -0,0 +1,31 @@
+"""
+Script to convert a JSON list (such as data/kanji_data.json) to JSONL, one
+record per line, so it can be streamed by the import scripts.
+
+The input is read incrementally, so the conversion runs in constant memory.
+
+    python src/scripts/convert_to_jsonl.py data/kanji_data.json
+"""
+import argparse
+import os
+import sys
+import time
+from pathlib import Path
+
+# Add the project root to Python path
+project_root = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.insert(0, project_root)
+
+from src.utils.jsonl import iter_records, write_jsonl
+from src.utils.paths import KANJI_JSON_PATH
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("input", type=Path, nargs="?", default=KANJI_JSON_PATH, help="Fichero JSON con una lista")
+    parser.add_argument("--output", type=Path, default=None, help="Fichero JSONL (por defecto, el mismo nombre con .jsonl)")
+    args = parser.parse_args()
+
+    output = args.output or args.input.with_suffix(".jsonl")
+    start = time.perf_counter()
+    count = write_jsonl(output, iter_records(args.input))
+    print(f"{count} registros escritos en {output} ({time.perf_counter() - start:.1f}s)")
@@ -0,0 +1,55 @@
+"""
+Script to count the kanji of a raw UTF-8 text corpus.
+
+Every file is memory-mapped and split at safe byte boundaries, and the pieces
+are counted across a process pool. The result is written with the same schema
+as data/*_characters.csv and data/*_documents.csv (rank, code_point_hex, char,
+count), so the corpus can then be added to kanji_combined.csv with
+build_kanji_frequencies.py.
+
+    python src/scripts/count_kanji_corpus.py blogs /corpus/blogs --doc-per-line
+"""
+import argparse
+import os
+import sys
+from pathlib import Path
+
+# Add the project root to Python path
+project_root = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.insert(0, project_root)
+
+from src.utils.kanji_frequencies import ALL, RANGE_SIZE, count_corpus, write_counts
+from src.utils.paths import DATA_DIR
+
+def corpus_files(paths: list) -> list:
+    """Ficheros de texto del corpus: los ficheros dados y los *.txt de los directorios"""
+    files = []
+    for path in paths:
+        files += sorted(path.rglob('*.txt')) if path.is_dir() else [path]
+    return files
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("name", help="Prefijo de los ficheros de salida: <name>_characters.csv y <name>_documents.csv")
+    parser.add_argument("paths", nargs="+", type=Path, help="Ficheros de texto o directorios con *.txt")
+    parser.add_argument("--doc-per-line", action="store_true", help="Cada línea de texto es un documento")
+    parser.add_argument("--processes", type=int, default=None, help="Procesos del pool (por defecto, uno por núcleo)")
+    parser.add_argument("--range-mb", type=int, default=RANGE_SIZE >> 20, help="MB de texto por tarea")
+    parser.add_argument("--output-dir", type=Path, default=DATA_DIR, help="Directorio de salida")
+    args = parser.parse_args()
+
+    files = corpus_files(args.paths)
+    if not files:
+        parser.error("No hay ficheros de texto que contar")
+    corpus = count_corpus(files, args.doc_per_line, args.processes, args.range_mb << 20)
+
+    characters = args.output_dir / f"{args.name}_characters.csv"
+    documents = args.output_dir / f"{args.name}_documents.csv"
+    write_counts(characters, corpus.char_counts, "char_count")
+    write_counts(documents, corpus.doc_counts, "doc_count")
+
+    print(f"{len(files)} ficheros, {corpus.size / 1e6:.1f} MB en {corpus.elapsed:.2f}s con {corpus.processes} procesos")
+    print(f"{corpus.throughput():.1f} MB/s en total, {corpus.throughput_per_core():.1f} MB/s por núcleo")
+    print(f"{len(corpus.char_counts) - 1} kanji distintos, {corpus.char_counts[ALL]} apariciones, "
+          f"{corpus.doc_counts[ALL]} documentos")
+    print(f"Escritos {characters} y {documents}")
@@ -1,58 +1,90 @@
 """
 Script to initialize the SQLite database with the required tables.
+
+Creates the kanji table if it is missing and imports kanji_data.jsonl (or
+kanji_data.json) into it without rebuilding it: rows keep their id and the
+columns this script does not fill (frequencies, content_hash). Scraper records
+({kanji, url, content}) go through the incremental import of
+src/utils/cleaning.py; a kanji_data.json object of {kanji: {meaning,
+on_reading, kun_reading}} from older versions is upserted as it is, and those
+rows are parsed again by the next scraper import. Files with any other record
+shape are left alone.
 """
 import os
 import sys
-import sqlite3
-import json
+from pathlib import Path
+from typing import Optional
 
 # Add the project root to Python path
 project_root = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 sys.path.insert(0, project_root)
 
-from src.utils.config import DB_PATH, KANJI_DATA_PATH
+from src.utils.cleaning import clean_kanji_data, ensure_kanji_table
+from src.utils.db_pool import connect
+from src.utils.jsonl import iter_json_object, iter_records, prefer_jsonl
+from src.utils.paths import DATA_DIR, KANJI_DB_PATH, KANJI_JSON_PATH
+
+# Formatos de kanji_data que se saben importar
+SCRAPER_RECORDS = "scraper"
+LEGACY_OBJECT = "legacy"
+
+def kanji_data_format(path: Path) -> Optional[str]:
+    """Formato de un fichero kanji_data, o None si no es ninguno de los conocidos"""
+    with open(path, 'r', encoding='utf-8') as f:
+        if path.suffix == '.json' and f.read(64).lstrip()[:1] == '{':
+            f.seek(0)
+            entry = next(iter_json_object(f), None)
+            return LEGACY_OBJECT if entry is None or isinstance(entry[1], dict) else None
+    records = iter_records(path)
+    record = next(records, None)
+    records.close()
+    if isinstance(record, dict) and "kanji" in record and "content" in record:
+        return SCRAPER_RECORDS
+    return None
+
+def import_legacy_object(path: Path) -> int:
+    """Inserta o actualiza en su sitio los kanji de un objeto {kanji: {meaning, on_reading, kun_reading}}"""
+    conn = connect(KANJI_DB_PATH)
+    count = 0
+    try:
+        with conn, open(path, 'r', encoding='utf-8') as f:
+            for kanji, data in iter_json_object(f):
+                conn.execute('''
+                INSERT INTO kanji (kanji, significado, lectura_china, lectura_japonesa)
+                VALUES (?, ?, ?, ?)
+                ON CONFLICT(kanji) DO UPDATE SET
+                    significado = excluded.significado,
+                    lectura_china = excluded.lectura_china,
+                    lectura_japonesa = excluded.lectura_japonesa,
+                    content_hash = NULL
+                ''', (kanji, data.get('meaning', ''), data.get('on_reading', ''), data.get('kun_reading', '')))
+                count += 1
+    finally:
+        conn.close()
+    return count
 
 def init_db():
     """Initialize the database with the required tables and data."""
-    # Ensure the data directory exists
-    os.makedirs(os.path.dirname(DB_PATH), exist_ok=True)
-    
-    # Connect to the database
-    conn = sqlite3.connect(DB_PATH)
-    cursor = conn.cursor()
-    
-    # Create the kanji table
-    cursor.execute("""
-    CREATE TABLE IF NOT EXISTS kanji (
-        kanji TEXT PRIMARY KEY,
-        significado TEXT,
-        lectura_china TEXT,
-        lectura_japonesa TEXT
-    )
-    """)
-    
-    # Load data from JSON if it exists
-    if os.path.exists(KANJI_DATA_PATH):
-        with open(KANJI_DATA_PATH, 'r', encoding='utf-8') as f:
-            kanji_data = json.load(f)
-            
-        # Insert or update kanji data
-        for kanji, data in kanji_data.items():
-            cursor.execute("""
-            INSERT OR REPLACE INTO kanji (kanji, significado, lectura_china, lectura_japonesa)
-            VALUES (?, ?, ?, ?)
-            """, (
-                kanji,
-                data.get('meaning', ''),
-                data.get('on_reading', ''),
-                data.get('kun_reading', '')
-            ))
-    
-    # Commit changes and close connection
-    conn.commit()
-    conn.close()
-    
+    DATA_DIR.mkdir(exist_ok=True)
+    conn = connect(KANJI_DB_PATH)
+    try:
+        with conn:
+            ensure_kanji_table(conn)
+    finally:
+        conn.close()
+
+    source = prefer_jsonl(KANJI_JSON_PATH)
+    if not source.exists():
+        print("Database initialized successfully!")
+        return
+    data_format = kanji_data_format(source)
+    if data_format == SCRAPER_RECORDS:
+        clean_kanji_data(source=source)
+    elif data_format == LEGACY_OBJECT:
+        print(f"{import_legacy_object(source)} kanji importados desde {source.name}")
+    else:
+        print(f"{source.name} no tiene un formato conocido, no se importa")
     print("Database initialized successfully!")
 
 if __name__ == "__main__":
-    init_db() 
\ No newline at end of file
+    init_db()
@@ -1,65 +1,309 @@
-import requests
-from bs4 import BeautifulSoup
-from urllib.parse import quote
+"""
+Script to scrape the kanji pages of japonesbasico.com for every kanji in
+data/kanji_combined.csv.
+
+Pages are fetched concurrently by a bounded pool of asyncio workers, with a
+per-host rate limit, retries with exponential backoff and an on-disk cache of
+the responses. Each result is appended to data/kanji_data.jsonl as soon as it
+is ready, so an interrupted run resumes from the last completed kanji. When the
+run ends, data/kanji_data.json and data/failed_kanji.json are rewritten from
+the JSONL output for the scripts that read them.
+
+--base-url points the scraper at a local stand-in server for testing:
+
+    python src/scripts/kanji_scrap.py --base-url http://127.0.0.1:8080/kanji/ --limit 50
+"""
+import argparse
+import asyncio
+import csv
+import hashlib
 import json
+import os
+import random
+import sys
 import time
-import pandas as pd
+from concurrent.futures import ThreadPoolExecutor
+from email.utils import parsedate_to_datetime
+from pathlib import Path
+from typing import Dict, Iterator, Optional, Set
+from urllib.error import HTTPError, URLError
+from urllib.parse import quote, urlsplit
+from urllib.request import Request, urlopen
+
+from bs4 import BeautifulSoup
+
+# Add the project root to Python path
+project_root = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.insert(0, project_root)
 
-# Leer el CSV y extraer la columna 'char'
-df = pd.read_csv('data/kanji_combined.csv')
-kanji_list = df['char'].tolist()[:10]  # Eliminamos NaNs y duplicados
+from src.utils.kanji_frequencies import ALL
+from src.utils.paths import DATA_DIR, KANJI_JSON_PATH, KANJI_JSONL_PATH
 
 # URL base del sitio
 BASE_URL = "https://japonesbasico.com/kanji/"
+USER_AGENT = "kanji-srs-scraper/1.0"
+# Respuestas que merece la pena reintentar
+RETRY_STATUS = {429, 500, 502, 503, 504}
+
+
+class FetchError(Exception):
+    """Fallo definitivo al descargar una página"""
+
+
+def read_kanji(path: Path) -> Iterator[str]:
+    """Kanji de kanji_combined.csv en orden de frecuencia, sin la fila de totales"""
+    with open(path, newline='', encoding='utf-8') as f:
+        for row in csv.DictReader(f):
+            if row["char"] and row["char"] != ALL:
+                yield row["char"]
+
+
+def page_text(html: str) -> str:
+    """Texto visible de la página, una cadena por línea"""
+    soup = BeautifulSoup(html, 'html.parser')
+    return '\n'.join(soup.stripped_strings)
+
+
+def open_results(path: Path) -> Set[str]:
+    """
+    Kanji ya guardados en el JSONL de resultados.
+
+    Si la ejecución anterior se interrumpió a mitad de una línea, esa línea se
+    descarta para que las siguientes se añadan sobre un fichero válido.
+    """
+    done: Set[str] = set()
+    if not path.exists():
+        return done
+    with open(path, 'rb+') as f:
+        data = f.read()
+        end = data.rfind(b"\n") + 1
+        if end != len(data):
+            f.truncate(end)
+    with open(path, encoding='utf-8') as f:
+        for line in f:
+            done.add(json.loads(line)["kanji"])
+    return done
+
+
+class ResponseCache:
+    """Cuerpos de las respuestas correctas guardados en disco, uno por URL"""
+
+    def __init__(self, directory: Optional[Path]):
+        self.directory = directory
+        if directory is not None:
+            directory.mkdir(parents=True, exist_ok=True)
+
+    def _path(self, url: str) -> Path:
+        return self.directory / (hashlib.sha256(url.encode()).hexdigest() + ".html")
+
+    def get(self, url: str) -> Optional[str]:
+        if self.directory is None:
+            return None
+        try:
+            return self._path(url).read_text(encoding='utf-8')
+        except FileNotFoundError:
+            return None
+
+    def put(self, url: str, body: str):
+        if self.directory is None:
+            return
+        # Escritura atómica: una respuesta a medias nunca queda en la caché
+        path = self._path(url)
+        tmp = path.with_suffix(f".{os.getpid()}.tmp")
+        tmp.write_text(body, encoding='utf-8')
+        os.replace(tmp, path)
+
+
+class HostRateLimiter:
+    """Reparte las peticiones a cada host con al menos 1/rate segundos entre ellas"""
+
+    def __init__(self, rate: float):
+        self.interval = 1.0 / rate if rate > 0 else 0.0
+        self._next_slot: Dict[str, float] = {}
+
+    async def wait(self, host: str):
+        # Sin await entre leer y reservar el turno: en el bucle de eventos no hay carreras
+        now = time.monotonic()
+        slot = max(now, self._next_slot.get(host, now))
+        self._next_slot[host] = slot + self.interval
+        if slot > now:
+            await asyncio.sleep(slot - now)
+
+
+def _http_get(url: str, timeout: float) -> str:
+    request = Request(url, headers={"User-Agent": USER_AGENT})
+    with urlopen(request, timeout=timeout) as response:
+        charset = response.headers.get_content_charset() or 'utf-8'
+        return response.read().decode(charset, errors='replace')
+
+
+def _retry_after(error: HTTPError) -> Optional[float]:
+    value = error.headers.get("Retry-After") if error.headers else None
+    if not value:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        try:
+            return max(0.0, parsedate_to_datetime(value).timestamp() - time.time())
+        except (TypeError, ValueError):
+            return None
+
+
+class Scraper:
+    """Descarga páginas con caché, límite por host y reintentos"""
+
+    def __init__(self, cache: ResponseCache, limiter: HostRateLimiter, retries: int = 4,
+                 backoff: float = 1.0, timeout: float = 30.0):
+        self.cache = cache
+        self.limiter = limiter
+        self.retries = retries
+        self.backoff = backoff
+        self.timeout = timeout
+        self.requests = 0
+        self.cache_hits = 0
+
+    async def fetch(self, url: str) -> str:
+        body = self.cache.get(url)
+        if body is not None:
+            self.cache_hits += 1
+            return body
+
+        host = urlsplit(url).netloc
+        for attempt in range(self.retries + 1):
+            await self.limiter.wait(host)
+            self.requests += 1
+            try:
+                body = await asyncio.to_thread(_http_get, url, self.timeout)
+                break
+            except HTTPError as e:
+                if e.code not in RETRY_STATUS or attempt == self.retries:
+                    raise FetchError(f"HTTP {e.code} para {url}") from e
+                delay = _retry_after(e)
+            except (URLError, OSError) as e:
+                if attempt == self.retries:
+                    raise FetchError(f"{e} para {url}") from e
+                delay = None
+            if delay is None:
+                delay = self.backoff * 2 ** attempt * (1 + random.random())
+            await asyncio.sleep(delay)
+
+        self.cache.put(url, body)
+        return body
+
+
+async def scrape(kanji_list, base_url: str, output: Path, scraper: Scraper, concurrency: int) -> Dict[str, str]:
+    """
+    Descarga la página de cada kanji pendiente y la añade al JSONL de salida.
+
+    Devuelve los kanji que han fallado con su error.
+    """
+    done = open_results(output)
+    queue: asyncio.Queue = asyncio.Queue()
+    pending = 0
+    for kanji in kanji_list:
+        if kanji not in done:
+            queue.put_nowait(kanji)
+            pending += 1
+    print(f"{len(done)} kanji ya descargados, {pending} pendientes")
+
+    failed: Dict[str, str] = {}
+    completed = 0
+    started = time.monotonic()
+
+    with open(output, 'a', encoding='utf-8') as out:
+        async def worker():
+            nonlocal completed
+            while True:
+                try:
+                    kanji = queue.get_nowait()
+                except asyncio.QueueEmpty:
+                    return
+                url = f"{base_url}{quote(kanji)}"
+                try:
+                    html = await scraper.fetch(url)
+                    content = await asyncio.to_thread(page_text, html)
+                except FetchError as e:
+                    failed[kanji] = str(e)
+                    print(f"Error al procesar el kanji {kanji}: {e}")
+                    continue
+                # Una línea completa por kanji: es el punto desde el que se reanuda
+                out.write(json.dumps({'kanji': kanji, 'url': url, 'content': content}, ensure_ascii=False) + "\n")
+                out.flush()
+                completed += 1
+                if completed % 100 == 0:
+                    rate = completed / (time.monotonic() - started)
+                    print(f"{completed}/{pending} kanji ({rate:.1f}/s)")
+
+        await asyncio.gather(*(worker() for _ in range(concurrency)))
+    return failed
+
+
+def export_json(jsonl_path: Path, json_path: Path, order):
+    """Reescribe kanji_data.json a partir del JSONL, en el orden de kanji_combined.csv"""
+    position = {kanji: i for i, kanji in enumerate(order)}
+    with open(jsonl_path, encoding='utf-8') as f:
+        entries = [json.loads(line) for line in f]
+    entries.sort(key=lambda entry: position.get(entry["kanji"], len(position)))
+    tmp = json_path.with_suffix(".json.tmp")
+    with open(tmp, 'w', encoding='utf-8') as f:
+        json.dump(entries, f, ensure_ascii=False, indent=4)
+    os.replace(tmp, json_path)
+    return len(entries)
+
+
+async def main(args):
+    kanji_list = list(read_kanji(args.input))
+    if args.limit:
+        kanji_list = kanji_list[:args.limit]
+
+    loop = asyncio.get_running_loop()
+    loop.set_default_executor(ThreadPoolExecutor(max_workers=args.concurrency))
+    scraper = Scraper(ResponseCache(None if args.no_cache else args.cache_dir), HostRateLimiter(args.rate),
+                      args.retries, args.backoff, args.timeout)
+    started = time.monotonic()
+    failed = await scrape(kanji_list, args.base_url, args.output, scraper, args.concurrency)
+
+    with open(args.failed, 'w', encoding='utf-8') as f:
+        json.dump([{'kanji': kanji, 'error': error} for kanji, error in failed.items()], f,
+                  ensure_ascii=False, indent=4)
+    saved = export_json(args.output, args.json_output, kanji_list) if args.json_output else None
 
-# Lista para almacenar los datos extraídos
-kanji_data = []
-failed_kanji = []
+    print("\nResumen de la extracción:")
+    print(f"Kanji en la lista: {len(kanji_list)}")
+    print(f"Peticiones HTTP: {scraper.requests}, respuestas desde caché: {scraper.cache_hits}")
+    print(f"Kanji fallidos: {len(failed)}")
+    print(f"Tiempo: {time.monotonic() - started:.1f}s")
+    if failed:
+        print("\nLista de kanji que fallaron:")
+        for kanji, error in failed.items():
+            print(f"- {kanji}: {error}")
+    print(f"\nDatos guardados en '{args.output}'")
+    if saved is not None:
+        print(f"{saved} kanji exportados a '{args.json_output}'")
+    print(f"Errores guardados en '{args.failed}'")
 
-for kanji in kanji_list:
-    encoded_kanji = quote(kanji)
-    url = f"{BASE_URL}{encoded_kanji}"
 
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--base-url", default=BASE_URL, help="URL base de las páginas de kanji")
+    parser.add_argument("--input", type=Path, default=DATA_DIR / 'kanji_combined.csv', help="CSV con la columna char")
+    parser.add_argument("--output", type=Path, default=KANJI_JSONL_PATH, help="JSONL de resultados")
+    parser.add_argument("--json-output", type=Path, default=KANJI_JSON_PATH, help="JSON exportado al terminar")
+    parser.add_argument("--no-json", action="store_true", help="No exportar el JSON al terminar")
+    parser.add_argument("--failed", type=Path, default=DATA_DIR / 'failed_kanji.json', help="JSON de errores")
+    parser.add_argument("--cache-dir", type=Path, default=DATA_DIR / 'http_cache', help="Caché de respuestas")
+    parser.add_argument("--no-cache", action="store_true", help="No leer ni guardar respuestas en caché")
+    parser.add_argument("--limit", type=int, default=None, help="Procesar solo los N primeros kanji")
+    parser.add_argument("--concurrency", type=int, default=8, help="Descargas simultáneas")
+    parser.add_argument("--rate", type=float, default=4.0, help="Peticiones por segundo a cada host")
+    parser.add_argument("--retries", type=int, default=4, help="Reintentos por página")
+    parser.add_argument("--backoff", type=float, default=1.0, help="Espera base entre reintentos, en segundos")
+    parser.add_argument("--timeout", type=float, default=30.0, help="Timeout de cada petición, en segundos")
+    args = parser.parse_args()
+    if args.no_json:
+        args.json_output = None
     try:
-        response = requests.get(url)
-        response.raise_for_status()
-
-        soup = BeautifulSoup(response.text, 'html.parser')
-        texts = soup.stripped_strings
-        full_text = '\n'.join(texts)
-
-        kanji_info = {
-            'kanji': kanji,
-            'url': url,
-            'content': full_text
-        }
-        kanji_data.append(kanji_info)
-        print(f"Procesado correctamente: {kanji}")
-
-    except Exception as e:
-        print(f"Error al procesar el kanji {kanji}: {e}")
-        failed_kanji.append({
-            'kanji': kanji,
-            'error': str(e)
-        })
-
-# Guardar los datos exitosos
-with open('kanji_data.json', 'w', encoding='utf-8') as f:
-    json.dump(kanji_data, f, ensure_ascii=False, indent=4)
-
-# Guardar los errores
-with open('failed_kanji.json', 'w', encoding='utf-8') as f:
-    json.dump(failed_kanji, f, ensure_ascii=False, indent=4)
-
-print("\nResumen de la extracción:")
-print(f"Total de kanji procesados: {len(kanji_list)}")
-print(f"Kanji exitosos: {len(kanji_data)}")
-print(f"Kanji fallidos: {len(failed_kanji)}")
-
-if failed_kanji:
-    print("\nLista de kanji que fallaron:")
-    for error in failed_kanji:
-        print(f"- {error['kanji']}: {error['error']}")
-
-print("\nDatos guardados en 'kanji_data.json'")
-print("Errores guardados en 'failed_kanji.json'")
+        asyncio.run(main(args))
+    except KeyboardInterrupt:
+        print(f"\nInterrumpido. La próxima ejecución continuará desde '{args.output}'")
@@ -0,0 +1,142 @@
+"""
+Script to measure API latency under concurrent clients.
+
+Each client repeatedly answers quiz questions (GET question + POST answer) and
+runs word searches against a running server, then the script reports the p50,
+p95 and p99 latency per endpoint and overall.
+
+With --lock-db the script also takes an exclusive lock on the database at
+regular intervals, like an import script writing to it, so that requests that
+touch SQLite have to wait.
+
+    uvicorn src.api.main:app --port 8000
+    python src/scripts/load_test.py --clients 50 --requests 40 --lock-db 0.2
+"""
+import argparse
+import json
+import os
+import secrets
+import sqlite3
+import statistics
+import sys
+import threading
+import time
+import urllib.error
+import urllib.parse
+import urllib.request
+from collections import Counter, defaultdict
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List, Optional, Tuple
+
+# Add the project root to Python path
+project_root = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.insert(0, project_root)
+
+from src.utils.paths import KANJI_DB_PATH
+
+# (ruta de la pregunta, ruta de la respuesta, campos de la pregunta que se devuelven en la respuesta)
+QUIZZES = [
+    ("/quiz/kanji-significado", "/quiz/kanji-significado/answer", {"kanji": "kanji"}),
+    ("/quiz/significado-kanji", "/quiz/significado-kanji/answer", {"significado": "significado"}),
+    ("/palabras/quiz/palabra-significado", "/palabras/quiz/palabra-significado/answer", {"palabra": "palabra"}),
+]
+SEARCHES = [
+    "/palabras/buscar-por-palabra?" + urllib.parse.urlencode({"palabra": "日"}),
+    "/palabras/buscar-por-significado?" + urllib.parse.urlencode({"significado": "day"}),
+    "/palabras/top?limit=20",
+]
+
+def request(base_url: str, path: str, user_id: str, body: Optional[dict] = None) -> Tuple[int, Optional[dict]]:
+    data = json.dumps(body).encode('utf-8') if body is not None else None
+    req = urllib.request.Request(base_url + path, data=data, method="POST" if data else "GET",
+                                 headers={"X-User-Id": user_id, "Content-Type": "application/json"})
+    try:
+        with urllib.request.urlopen(req, timeout=30) as response:
+            return response.status, json.loads(response.read())
+    except urllib.error.HTTPError as e:
+        return e.code, None
+
+def run_client(base_url: str, user_id: str, client: int, requests: int) -> Tuple[Dict[str, List[float]], Counter]:
+    """Lanza las peticiones de un cliente y devuelve las latencias por endpoint y los códigos de estado"""
+    latencies: Dict[str, List[float]] = defaultdict(list)
+    statuses: Counter = Counter()
+
+    def timed(name: str, path: str, body: Optional[dict] = None) -> Optional[dict]:
+        start = time.perf_counter()
+        status, payload = request(base_url, path, user_id, body)
+        latencies[name].append(time.perf_counter() - start)
+        statuses[status] += 1
+        return payload if status == 200 else None
+
+    for i in range(requests):
+        if i % 2 == 0:
+            question_path, answer_path, fields = QUIZZES[(client + i) % len(QUIZZES)]
+            question = timed(question_path, question_path)
+            if question is not None:
+                body = {field: question[key] for field, key in fields.items()}
+                body.update(question_id=question["question_id"], answer=question["correct_option"])
+                timed(answer_path, answer_path, body)
+        else:
+            path = SEARCHES[(client + i) % len(SEARCHES)]
+            timed(path.split('?')[0], path)
+    return latencies, statuses
+
+def lock_db(hold: float, stop: threading.Event):
+    """Bloquea la base de datos durante hold segundos cada segundo hasta que se pida parar"""
+    conn = sqlite3.connect(KANJI_DB_PATH, isolation_level=None)
+    while not stop.wait(1.0):
+        conn.execute("BEGIN EXCLUSIVE")
+        time.sleep(hold)
+        conn.execute("COMMIT")
+    conn.close()
+
+def percentile(values: List[float], p: int) -> float:
+    if len(values) < 2:
+        return values[0]
+    return statistics.quantiles(values, n=100, method='inclusive')[p - 1]
+
+def report(latencies: Dict[str, List[float]]):
+    print(f"{'endpoint':45} {'n':>6} {'p50 ms':>9} {'p95 ms':>9} {'p99 ms':>9}")
+    for name, values in sorted(latencies.items()):
+        print(f"{name:45} {len(values):6} {percentile(values, 50) * 1000:9.1f} "
+              f"{percentile(values, 95) * 1000:9.1f} {percentile(values, 99) * 1000:9.1f}")
+
+def main(base_url: str, clients: int, requests: int, lock_hold: float):
+    stop = threading.Event()
+    locker = threading.Thread(target=lock_db, args=(lock_hold, stop))
+    if lock_hold:
+        locker.start()
+    # Usuarios nuevos en cada ejecución para que todos tengan tarjetas pendientes
+    run_id = secrets.token_hex(3)
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=clients) as executor:
+        results = list(executor.map(
+            lambda client: run_client(base_url, f"load-{run_id}-{client}", client, requests), range(clients)
+        ))
+    elapsed = time.perf_counter() - start
+    stop.set()
+    if lock_hold:
+        locker.join()
+
+    latencies: Dict[str, List[float]] = defaultdict(list)
+    statuses: Counter = Counter()
+    for client_latencies, client_statuses in results:
+        statuses.update(client_statuses)
+        for name, values in client_latencies.items():
+            latencies[name].extend(values)
+    latencies["TOTAL"] = [value for values in latencies.values() for value in values]
+
+    report(latencies)
+    total = len(latencies["TOTAL"])
+    print(f"\n{total} peticiones de {clients} clientes en {elapsed:.1f}s "
+          f"({total / elapsed:.0f} peticiones/s), respuestas por código: {dict(sorted(statuses.items()))}")
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--url", default="http://127.0.0.1:8000", help="URL base del servidor")
+    parser.add_argument("--clients", type=int, default=50, help="Clientes concurrentes")
+    parser.add_argument("--requests", type=int, default=40, help="Peticiones por cliente")
+    parser.add_argument("--lock-db", type=float, default=0.0, metavar="SECONDS",
+                        help="Segundos que se bloquea la base de datos cada segundo (0 para no bloquearla)")
+    args = parser.parse_args()
+    main(args.url.rstrip('/'), args.clients, args.requests, args.lock_db)
@@ -0,0 +1,70 @@
+"""
+Script to move the existing data/srs_state_*.json files into the SRS store used by the API and the CLI quizzes.
+
+Kanji quiz state from older versions, including the files of the old CLI
+quizzes (srs_state_kanji_lectura.json, srs_state_significado.json, ...), is
+keyed by kanji. It is rekeyed to catalog ids, keeping the reading type suffix
+("年_china" -> "12_china"), and merged into the significado_kanji or
+lectura_kanji direction: a card already in the store is only replaced by a
+state reviewed later. Kanji-keyed entries already in the store are rekeyed as
+well. Running the script again changes nothing.
+
+Other srs_state_<direction>.json files are imported as they are, into
+<direction>, if that direction has no state yet.
+"""
+import argparse
+import os
+import sys
+
+# Add the project root to Python path
+project_root = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.insert(0, project_root)
+
+from src.services.card_catalog import kanji_catalog
+from src.services.srs_store import (
+    KANJI_DIRECTIONS, LEGACY_STATE_FILES, JSONStateStore, SQLiteStateStore, import_json_state, legacy_json_path,
+    migrate_kanji_state
+)
+from src.utils.paths import DATA_DIR, SRS_DB_PATH
+
+def migrate(force: bool = False, backend: str = "sqlite"):
+    """Pasa el estado de kanji a ids del catálogo e importa el resto de ficheros srs_state_<direction>.json"""
+    snapshot = kanji_catalog.snapshot()
+    legacy_names = {name for names in LEGACY_STATE_FILES.values() for name in names}
+    for direction in KANJI_DIRECTIONS:
+        json_paths = [DATA_DIR / name for name in LEGACY_STATE_FILES[direction] if (DATA_DIR / name).exists()]
+        # Sin create_store, que importaría por su cuenta el fichero antiguo de la dirección
+        if backend == "json":
+            store = JSONStateStore(legacy_json_path(direction))
+        else:
+            store = SQLiteStateStore(SRS_DB_PATH, direction)
+        try:
+            counts = migrate_kanji_state(store, direction, json_paths, snapshot)
+        finally:
+            store.close()
+        print(f"{direction}: {counts['rekeyed']} tarjetas pasadas a id, {counts['imported']} importadas desde "
+              f"{', '.join(path.name for path in json_paths) or 'ningún fichero'}, {counts['skipped']} descartadas")
+
+    if backend != "sqlite":
+        return
+    for json_path in sorted(DATA_DIR.glob('srs_state_*.json')):
+        direction = json_path.stem[len('srs_state_'):]
+        if json_path.name in legacy_names or direction in KANJI_DIRECTIONS:
+            continue
+        store = SQLiteStateStore(SRS_DB_PATH, direction)
+        try:
+            if not store.is_empty() and not force:
+                print(f"{direction}: ya tiene estado en {SRS_DB_PATH.name}, se omite (usa --force para sobrescribir)")
+                continue
+            count = import_json_state(store, json_path)
+            print(f"{direction}: {count} tarjetas importadas desde {json_path.name}")
+        finally:
+            store.close()
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--force", action="store_true", help="Importar aunque la dirección ya tenga estado")
+    parser.add_argument("--backend", choices=["sqlite", "json"], default="sqlite",
+                        help="Almacén de destino del estado de kanji")
+    args = parser.parse_args()
+    migrate(force=args.force, backend=args.backend)
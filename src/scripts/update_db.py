@@ -1,4 +1,8 @@
+import argparse
+import shutil
 import sqlite3
+import tempfile
+import time
 import pandas as pd
 from pathlib import Path
 
@@ -8,33 +12,34 @@ DATA_DIR = BASE_DIR / 'data'
 KANJI_DB_PATH = DATA_DIR / 'kanji.db'
 CSV_PATH = DATA_DIR / 'kanji_combined.csv'
 
-def alter_table():
+# Nuevas columnas de la tabla kanji, con el mismo nombre que en el CSV
+NEW_COLUMNS = [
+    'aozora_char_count INTEGER',
+    'news_char_count INTEGER',
+    'wiki_char_count INTEGER',
+    'aozora_doc_count INTEGER',
+    'news_doc_count INTEGER',
+    'wiki_doc_count INTEGER',
+    'total_char_count INTEGER',
+    'total_doc_count INTEGER',
+    'aozora_char_freq REAL',
+    'news_char_freq REAL',
+    'wiki_char_freq REAL',
+    'aozora_doc_freq REAL',
+    'news_doc_freq REAL',
+    'wiki_doc_freq REAL',
+    'total_char_freq REAL',
+    'total_doc_freq REAL'
+]
+FREQUENCY_COLUMNS = [column.split()[0] for column in NEW_COLUMNS]
+
+def alter_table(db_path: Path = KANJI_DB_PATH):
     """Añade las nuevas columnas a la tabla kanji"""
-    conn = sqlite3.connect(KANJI_DB_PATH)
+    conn = sqlite3.connect(db_path)
     cursor = conn.cursor()
     
-    # Nuevas columnas a añadir
-    new_columns = [
-        'aozora_char_count INTEGER',
-        'news_char_count INTEGER',
-        'wiki_char_count INTEGER',
-        'aozora_doc_count INTEGER',
-        'news_doc_count INTEGER',
-        'wiki_doc_count INTEGER',
-        'total_char_count INTEGER',
-        'total_doc_count INTEGER',
-        'aozora_char_freq REAL',
-        'news_char_freq REAL',
-        'wiki_char_freq REAL',
-        'aozora_doc_freq REAL',
-        'news_doc_freq REAL',
-        'wiki_doc_freq REAL',
-        'total_char_freq REAL',
-        'total_doc_freq REAL'
-    ]
-    
     # Añadir cada columna si no existe
-    for column in new_columns:
+    for column in NEW_COLUMNS:
         column_name = column.split()[0]
         try:
             cursor.execute(f"ALTER TABLE kanji ADD COLUMN {column}")
@@ -45,13 +50,48 @@ def alter_table():
     conn.commit()
     conn.close()
 
-def update_database():
-    """Actualiza la base de datos con la información del CSV"""
+def update_database(db_path: Path = KANJI_DB_PATH):
+    """
+    Actualiza la base de datos con la información del CSV en una sola transacción:
+    carga el CSV en una tabla temporal y actualiza todos los kanji con un único UPDATE ... FROM
+    """
+    # Leer el CSV; los valores vacíos se guardan como NULL
+    df = pd.read_csv(CSV_PATH, usecols=['char'] + FREQUENCY_COLUMNS)
+    df = df.astype(object).where(df.notna(), None)
+    
+    conn = sqlite3.connect(db_path)
+    try:
+        with conn:
+            conn.execute(f"""
+            CREATE TEMP TABLE kanji_frecuencias (
+                kanji TEXT PRIMARY KEY,
+                {', '.join(NEW_COLUMNS)}
+            )
+            """)
+            # Si un kanji se repite en el CSV, gana la última fila, como al actualizar fila a fila
+            conn.executemany(
+                f"INSERT OR REPLACE INTO kanji_frecuencias (kanji, {', '.join(FREQUENCY_COLUMNS)}) "
+                f"VALUES ({', '.join('?' * (len(FREQUENCY_COLUMNS) + 1))})",
+                df[['char'] + FREQUENCY_COLUMNS].itertuples(index=False, name=None)
+            )
+            cursor = conn.execute(f"""
+            UPDATE kanji SET {', '.join(f'{column} = f.{column}' for column in FREQUENCY_COLUMNS)}
+            FROM kanji_frecuencias AS f
+            WHERE kanji.kanji = f.kanji
+            """)
+            print(f"{cursor.rowcount} kanji actualizados desde {len(df)} filas del CSV")
+            conn.execute("DROP TABLE kanji_frecuencias")
+    finally:
+        conn.close()
+    print("Base de datos actualizada correctamente")
+
+def update_database_row_by_row(db_path: Path = KANJI_DB_PATH):
+    """Actualiza la base de datos con la información del CSV, un UPDATE por fila"""
     # Leer el CSV
     df = pd.read_csv(CSV_PATH)
     
     # Conectar a la base de datos
-    conn = sqlite3.connect(KANJI_DB_PATH)
+    conn = sqlite3.connect(db_path)
     cursor = conn.cursor()
     
     # Actualizar cada kanji
@@ -105,6 +145,32 @@ def update_database():
     conn.close()
     print("Base de datos actualizada correctamente")
 
+def kanji_rows(db_path: Path) -> list:
+    conn = sqlite3.connect(db_path)
+    rows = conn.execute(f"SELECT kanji, {', '.join(FREQUENCY_COLUMNS)} FROM kanji ORDER BY id").fetchall()
+    conn.close()
+    return rows
+
+def compare():
+    """Mide las dos formas de actualizar sobre copias de la base de datos y comprueba que dan lo mismo"""
+    timings = {}
+    results = {}
+    with tempfile.TemporaryDirectory() as tmp:
+        for name, update in (("fila a fila", update_database_row_by_row), ("en bloque", update_database)):
+            db_path = Path(tmp) / f"{update.__name__}.db"
+            shutil.copy(KANJI_DB_PATH, db_path)
+            alter_table(db_path)
+            start = time.perf_counter()
+            update(db_path)
+            timings[name] = time.perf_counter() - start
+            results[name] = kanji_rows(db_path)
+
+    print("\n=== COMPARACIÓN ===")
+    for name, seconds in timings.items():
+        print(f"{name:12} {seconds:8.3f} s")
+    print(f"Aceleración: {timings['fila a fila'] / timings['en bloque']:.1f}x")
+    print("Resultados idénticos" if results["fila a fila"] == results["en bloque"] else "¡Los resultados difieren!")
+
 def main():
     print("Modificando la estructura de la tabla...")
     alter_table()
@@ -113,4 +179,11 @@ def main():
     print("\nProceso completado")
 
 if __name__ == "__main__":
-    main() 
\ No newline at end of file
+    parser = argparse.ArgumentParser(description="Añade a la tabla kanji las frecuencias de kanji_combined.csv")
+    parser.add_argument("--comparar", action="store_true",
+                        help="Medir la actualización fila a fila y en bloque sobre copias de la base de datos")
+    args = parser.parse_args()
+    if args.comparar:
+        compare()
+    else:
+        main() 
\ No newline at end of file
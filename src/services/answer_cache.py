@@ -0,0 +1,80 @@
+"""
+Caché de respuestas correctas de las preguntas de quiz emitidas.
+
+Cada pregunta recibe un id opaco; la respuesta se valida contra ese id, así que
+dos clientes preguntados por el mismo kanji no se pisan. Las entradas caducan a
+los ``ttl`` segundos y, si se llega a ``maxsize``, se expulsan las más antiguas.
+"""
+import secrets
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Optional, Tuple
+
+# Preguntas sin responder que se guardan como máximo
+ANSWER_CACHE_SIZE = 10000
+# Segundos que tiene el cliente para responder
+ANSWER_TTL_SECONDS = 600
+
+
+class AnswerCache:
+    """Preguntas pendientes de respuesta, con caducidad y expulsión LRU"""
+
+    def __init__(self, maxsize: int = ANSWER_CACHE_SIZE, ttl: float = ANSWER_TTL_SECONDS):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        # question_id -> (instante de caducidad, datos de la pregunta), en orden de emisión
+        self._entries: "OrderedDict[str, Tuple[float, Dict[str, Any]]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.stats = {"hits": 0, "misses": 0, "expired": 0, "evictions": 0}
+
+    def _purge_expired(self, now: float):
+        # El TTL es fijo, así que las primeras entradas son las que caducan antes
+        while self._entries:
+            question_id, (expires, _) = next(iter(self._entries.items()))
+            if expires > now:
+                break
+            del self._entries[question_id]
+            self.stats["expired"] += 1
+
+    def issue(self, question: Dict[str, Any]) -> str:
+        """Guarda los datos de una pregunta y devuelve su id"""
+        question_id = secrets.token_urlsafe(16)
+        now = time.monotonic()
+        with self._lock:
+            self._purge_expired(now)
+            self._entries[question_id] = (now + self.ttl, question)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+                self.stats["evictions"] += 1
+        return question_id
+
+    def take(self, question_id: str) -> Optional[Dict[str, Any]]:
+        """Devuelve y elimina los datos de una pregunta, o None si no existe o ha caducado"""
+        with self._lock:
+            entry = self._entries.pop(question_id, None)
+            if entry is None:
+                self.stats["misses"] += 1
+                return None
+            expires, question = entry
+            if expires <= time.monotonic():
+                self.stats["expired"] += 1
+                return None
+            self.stats["hits"] += 1
+            return question
+
+    def take_matching(self, question_id: str, **expected: Any) -> Optional[Dict[str, Any]]:
+        """Como take, pero devuelve None si los datos de la pregunta no coinciden con los esperados"""
+        question = self.take(question_id)
+        if question is None or any(question.get(field) != value for field, value in expected.items()):
+            return None
+        return question
+
+    def info(self) -> Dict[str, Any]:
+        """Tamaño y contadores de la caché"""
+        with self._lock:
+            return {"size": len(self._entries), "maxsize": self.maxsize, "ttl": self.ttl, **self.stats}
+
+
+# Caché compartida por las rutas de quiz
+answer_cache = AnswerCache()
@@ -0,0 +1,129 @@
+"""
+Autocompletado de palabras y kanji.
+
+Cada catálogo tiene un ``PrefixIndex``: una lista ordenada de claves
+normalizadas (escritura, lecturas y significados) en la que los candidatos de
+un prefijo forman un rango contiguo que se localiza con búsqueda binaria. Los
+candidatos se ordenan por rango de frecuencia. El resultado de los prefijos
+cortos, que abarcan muchas claves, se guarda la primera vez que se calcula.
+Los índices se reconstruyen cuando cambia la vista del catálogo.
+"""
+import heapq
+import re
+import threading
+from bisect import bisect_left
+from typing import Any, Callable, Dict, Iterable, List, Optional, Tuple
+
+from src.services.card_catalog import CatalogSnapshot, kanji_catalog, palabras_catalog
+from src.utils.japanese import kanji_readings, normalize, split_alternatives, word_forms
+
+# Sugerencias devueltas como máximo
+MAX_SUGGESTIONS = 50
+# Claves a partir de las cuales se guarda el resultado de un prefijo
+CACHE_THRESHOLD = 256
+
+# Mayor que cualquier carácter, para acotar el rango de un prefijo
+_MAX_CHAR = "\U0010ffff"
+# Categoría gramatical al principio del significado: "n. ", "adv. "
+_PART_OF_SPEECH = re.compile(r"^(?:[a-z]+\.\s*)+")
+_PARENTHESES = re.compile(r"\(.*?\)")
+
+
+def meaning_keys(significado: str) -> List[str]:
+    """Claves de un significado: cada acepción completa y cada palabra de al menos dos letras"""
+    text = _PARENTHESES.sub("", _PART_OF_SPEECH.sub("", normalize(significado or "")))
+    keys = []
+    for phrase in split_alternatives(text):
+        for key in [phrase.strip()] + re.findall(r"\w{2,}", phrase):
+            if key and key not in keys:
+                keys.append(key)
+    return keys
+
+
+class PrefixIndex:
+    """Claves ordenadas con el rango y el id de la fila a la que apuntan"""
+
+    def __init__(self, entries: Iterable[Tuple[str, Any, int]]):
+        # Una fila puede aparecer con varias claves; se queda con cada (clave, fila) una vez
+        entries = sorted(set(entries))
+        self.keys = [key for key, _, _ in entries]
+        self.ranked = [(rank, row_id) for _, rank, row_id in entries]
+        self._cache: Dict[str, List[int]] = {}
+
+    def __len__(self) -> int:
+        return len(self.keys)
+
+    def _top(self, lo: int, hi: int, limit: int) -> List[int]:
+        best: Dict[int, Any] = {}
+        for rank, row_id in self.ranked[lo:hi]:
+            if row_id not in best or rank < best[row_id]:
+                best[row_id] = rank
+        return [row_id for _, row_id in heapq.nsmallest(limit, ((rank, row_id) for row_id, rank in best.items()))]
+
+    def complete(self, prefix: str, limit: int) -> List[int]:
+        """Ids de las filas con alguna clave que empieza por el prefijo, de mejor a peor rango"""
+        if not prefix:
+            return []
+        lo = bisect_left(self.keys, prefix)
+        hi = bisect_left(self.keys, prefix + _MAX_CHAR, lo)
+        if hi - lo < CACHE_THRESHOLD:
+            return self._top(lo, hi, limit)
+        cached = self._cache.get(prefix)
+        if cached is None:
+            cached = self._cache[prefix] = self._top(lo, hi, MAX_SUGGESTIONS)
+        return cached[:limit]
+
+
+class Autocomplete:
+    """Índice de prefijos de una vista del catálogo"""
+
+    def __init__(self, snapshot: CatalogSnapshot, entries: Iterable[Tuple[str, Any, int]]):
+        self.snapshot = snapshot
+        self.index = PrefixIndex(entries)
+
+    def suggest(self, query: str, limit: int) -> List[Dict[str, Any]]:
+        """Filas que completan la búsqueda, de la más a la menos frecuente"""
+        ids = self.index.complete(normalize(query), min(limit, MAX_SUGGESTIONS))
+        return [self.snapshot.by_id[row_id] for row_id in ids]
+
+
+def palabras_entries(snapshot: CatalogSnapshot) -> Iterable[Tuple[str, Any, int]]:
+    """Claves de cada palabra (escritura, lectura y significado) con su frecuencia como rango"""
+    for row in snapshot.cards:
+        for key in word_forms(row["palabra"]) + meaning_keys(row["significado"]):
+            yield key, row["frecuencia"], row["id"]
+
+
+def kanji_entries(snapshot: CatalogSnapshot) -> Iterable[Tuple[str, Any, int]]:
+    """Claves de cada kanji (carácter, lecturas y significado) con su frecuencia de uso como rango"""
+    for row in snapshot.cards:
+        # Más frecuente primero; los kanji sin frecuencia calculada van al final
+        freq = row.get("total_char_freq")
+        rank = -freq if freq is not None else float("inf")
+        keys = [normalize(row["kanji"])] + meaning_keys(row["significado"])
+        keys += kanji_readings(row["lectura_china"]) + kanji_readings(row["lectura_japonesa"])
+        for key in keys:
+            yield key, rank, row["id"]
+
+
+_indexes: Dict[str, Autocomplete] = {}
+_indexes_lock = threading.Lock()
+
+
+def _autocomplete(name: str, snapshot: CatalogSnapshot,
+                  entries: Callable[[CatalogSnapshot], Iterable[Tuple[str, Any, int]]]) -> Autocomplete:
+    with _indexes_lock:
+        current: Optional[Autocomplete] = _indexes.get(name)
+        if current is None or current.snapshot is not snapshot:
+            current = _indexes[name] = Autocomplete(snapshot, entries(snapshot))
+        return current
+
+
+def palabras_autocomplete() -> Autocomplete:
+    """Autocompletado por escritura, lectura y significado de las palabras, por frecuencia"""
+    return _autocomplete("palabras", palabras_catalog.snapshot(), palabras_entries)
+
+
+def kanji_autocomplete() -> Autocomplete:
+    """Autocompletado por kanji, lecturas y significado, por total_char_freq"""
+    return _autocomplete("kanji", kanji_catalog.snapshot(), kanji_entries)
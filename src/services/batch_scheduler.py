@@ -0,0 +1,289 @@
+"""
+Vectorized SRS scheduling for many reviews at once.
+
+``schedule_batch`` applies the same rules as ``SRSService.calculate_next_interval``
+and ``update_card`` to arrays of (card_id, quality, timestamp). Reviews of one
+card depend on each other, so they are applied in rounds: round k holds the
+k-th review of every card, and each round is a handful of NumPy operations
+over all the cards in it. Replaying an import of millions of reviews costs as
+many rounds as the card with most reviews, not one Python call per review.
+
+Timestamps are naive: due dates are computed in the same clock as the
+timestamps, like ``update_card`` does with ``datetime.now()``.
+"""
+from typing import Any, Dict, Iterable, Optional
+
+import numpy as np
+
+from .srs_service import MAX_QUALITY, SRSService, Schedule, _revisions, card_base_id, schedule
+
+DAY = 86400
+
+
+class BatchResult:
+    """State of each card after each review, in the order the reviews were given"""
+
+    def __init__(self, card_ids: np.ndarray, cards: np.ndarray, columns: Dict[str, np.ndarray],
+                 final: Dict[str, np.ndarray]):
+        # Unique card ids, sorted; card_ids holds the card of each review
+        self.cards = cards
+        self.card_ids = card_ids
+        for name, values in columns.items():
+            setattr(self, name, values)
+        self._final = final
+
+    def states(self) -> Dict[str, Dict[str, Any]]:
+        """Final state of every reviewed card, in the same format as SRSService.state"""
+        final = self._final
+        states = {}
+        for i, card_id in enumerate(self.cards.tolist()):
+            card_state = {
+                "interval": int(final["interval"][i]),
+                "repetitions": int(final["repetitions"][i]),
+                "easiness": float(final["easiness"][i]),
+                "due": str(final["due"][i]),
+                "learning_step": int(final["learning_step"][i]),
+                "lapses": int(final["lapses"][i]),
+                "last_review": str(final["last_review"][i]),
+            }
+            if final["introduced"][i] is not None:
+                card_state["introduced"] = final["introduced"][i]
+            if final["is_leech"][i]:
+                card_state["is_leech"] = True
+            states[str(card_id)] = card_state
+        return states
+
+
+class CardArrays:
+    """Scheduling state of a set of cards as parallel arrays, one entry per card"""
+    __slots__ = ("exists", "interval", "repetitions", "easiness", "learning_step", "lapses",
+                 "is_leech", "due", "last_review", "introduced")
+
+    def __init__(self, size: int, plan: Schedule):
+        self.exists = np.zeros(size, dtype=bool)
+        self.interval = np.zeros(size, dtype=np.int64)
+        self.repetitions = np.zeros(size, dtype=np.int64)
+        self.easiness = np.full(size, plan.ease_factor, dtype=np.float64)
+        self.learning_step = np.zeros(size, dtype=np.int64)
+        self.lapses = np.zeros(size, dtype=np.int64)
+        self.is_leech = np.zeros(size, dtype=bool)
+        self.due = np.zeros(size, dtype="datetime64[D]")
+        self.last_review = np.zeros(size, dtype="datetime64[D]")
+        self.introduced = [None] * size
+
+    @classmethod
+    def from_states(cls, card_ids: Iterable[str], states: Optional[Dict[str, Dict[str, Any]]],
+                    plan: Schedule, size: Optional[int] = None) -> "CardArrays":
+        """
+        Arrays for card_ids, filled from their entry in states (SRSService.state format).
+
+        Cards without an entry are left as not yet existing. size reserves
+        room for more cards after the given ones.
+        """
+        card_ids = list(card_ids)
+        cards = cls(len(card_ids) if size is None else size, plan)
+        for i, card_id in enumerate(card_ids):
+            card_state = (states or {}).get(card_id)
+            if card_state is not None:
+                cards.exists[i] = True
+                cards.interval[i] = card_state["interval"]
+                cards.repetitions[i] = card_state["repetitions"]
+                cards.easiness[i] = card_state["easiness"]
+                cards.learning_step[i] = card_state["learning_step"]
+                cards.lapses[i] = card_state["lapses"]
+                cards.is_leech[i] = card_state.get("is_leech", False)
+                cards.due[i] = np.datetime64(card_state["due"], "D")
+                cards.last_review[i] = np.datetime64(card_state["last_review"], "D")
+                cards.introduced[i] = card_state.get("introduced")
+        return cards
+
+    def tile(self, copies: int, extra: int = 0) -> "CardArrays":
+        """copies independent copies of these cards, each followed by extra slots for cards not yet created"""
+        size = len(self.exists) + extra
+        tiled = CardArrays.__new__(CardArrays)
+        for name in self.__slots__:
+            values = getattr(self, name)
+            if name == "introduced":
+                tiled.introduced = (values + [None] * extra) * copies
+                continue
+            padded = np.zeros(size, dtype=values.dtype)
+            padded[:len(values)] = values
+            setattr(tiled, name, np.tile(padded, copies))
+        return tiled
+
+    def reset(self, index: np.ndarray, plan: Schedule):
+        """Start the given cards as new cards (SRSService.initialize_card_state)"""
+        self.exists[index] = True
+        self.interval[index] = 0
+        self.repetitions[index] = 0
+        self.easiness[index] = plan.ease_factor
+        self.learning_step[index] = 0
+        self.lapses[index] = 0
+        self.is_leech[index] = False
+
+
+def review_cards(cards: CardArrays, c: np.ndarray, q: np.ndarray, ts: np.ndarray, plan: Schedule) -> np.ndarray:
+    """
+    Apply one review to each card in c, at most once per card, and return the interval in seconds.
+
+    Vectorized SRSService.calculate_next_interval followed by the state updates
+    of _apply_review (except last_review): q holds the qualities and ts the
+    datetime64[s] times of the reviews.
+    """
+    step_seconds = np.asarray(plan.step_seconds or (0,), dtype=np.int64)
+    num_steps = len(plan.step_seconds)
+
+    step = cards.learning_step[c]
+    failed = q < 3
+    learning = step < num_steps
+    seconds = np.zeros(len(c), dtype=np.int64)
+
+    # Learning phase, failed: back to the first step if fail_reset
+    mask = learning & failed
+    seconds[mask] = step_seconds[0]
+    if plan.fail_reset:
+        step = np.where(mask, 0, step)
+
+    # Learning phase, passed: next step, or graduate after the last one
+    mask = learning & ~failed
+    next_step = step + 1
+    stays = mask & (next_step < num_steps)
+    seconds[stays] = step_seconds[next_step[stays]]
+    graduates = mask & ~stays
+    seconds[graduates] = int(plan.graduation_delta.total_seconds())
+    step = np.where(graduates, num_steps, step)
+
+    # Review phase, failed: lapse
+    mask = ~learning & failed
+    easiness = cards.easiness[c]
+    lapses = cards.lapses[c] + mask
+    cards.is_leech[c] = cards.is_leech[c] | (mask & (lapses >= plan.leech_threshold))
+    seconds[mask] = int(plan.lapse_delta.total_seconds())
+
+    # Review phase, passed: grow the interval and clamp it
+    mask = ~learning & ~failed
+    current = cards.interval[c]
+    modifiers = np.asarray(plan.modifiers, dtype=np.float64)
+    grown = np.trunc(current * easiness * modifiers[np.clip(q, 0, MAX_QUALITY)]).astype(np.int64)
+    days = np.where(current == 0, plan.initial_interval, grown)
+    days = np.maximum(plan.minimum_interval, np.minimum(days, plan.maximum_interval))
+    seconds[mask] = days[mask] * DAY
+
+    # _apply_review
+    cards.easiness[c] = np.where(~learning & failed, easiness * plan.lapse_penalty, easiness)
+    cards.lapses[c] = lapses
+    cards.learning_step[c] = step
+    cards.interval[c] = np.floor_divide(seconds, DAY)
+    cards.due[c] = (ts + seconds.astype("timedelta64[s]")).astype("datetime64[D]")
+    cards.repetitions[c] = np.where(failed, 0, cards.repetitions[c] + 1)
+    return seconds
+
+
+def _timestamps(values) -> np.ndarray:
+    values = np.asarray(values)
+    if values.dtype.kind == "M":
+        return values.astype("datetime64[s]")
+    # Seconds since the epoch
+    return np.asarray(values, dtype=np.int64).astype("datetime64[s]")
+
+
+def schedule_batch(card_ids: Iterable, qualities: Iterable[int], timestamps: Iterable,
+                   initial_states: Optional[Dict[str, Dict[str, Any]]] = None,
+                   plan: Optional[Schedule] = None) -> BatchResult:
+    """
+    Apply every review and return the state of its card after it.
+
+    Reviews of the same card are applied in timestamp order (input order on
+    ties). Cards in initial_states start from that state, as in
+    SRSService.state; the rest start as new cards. The result has one entry
+    per review, in input order, for interval (days), easiness, due, lapses,
+    learning_step, repetitions, is_leech and seconds (the length of the next
+    interval), plus the final state of each card through states().
+    """
+    plan = plan or schedule()
+    card_ids = np.asarray(card_ids).astype(str)
+    qualities = np.asarray(qualities, dtype=np.int64)
+    timestamps = _timestamps(timestamps)
+    n = len(card_ids)
+    if not (len(qualities) == len(timestamps) == n):
+        raise ValueError("card_ids, qualities and timestamps must have the same length")
+
+    cards, card_index = np.unique(card_ids, return_inverse=True)
+    card_index = card_index.reshape(-1)
+    state = CardArrays.from_states(cards.tolist(), initial_states, plan)
+
+    # Rounds: position of each review among the reviews of its card
+    order = np.lexsort((timestamps, card_index))
+    sorted_cards = card_index[order]
+    first = np.searchsorted(sorted_cards, sorted_cards, side="left")
+    rank = np.arange(n) - first
+    round_order = np.argsort(rank, kind="stable")
+    by_round = order[round_order]
+    rounds = rank[round_order]
+    bounds = np.searchsorted(rounds, np.arange(rounds[-1] + 2)) if n else np.zeros(1, dtype=np.int64)
+
+    out = {
+        "interval": np.zeros(n, dtype=np.int64),
+        "easiness": np.zeros(n, dtype=np.float64),
+        "due": np.zeros(n, dtype="datetime64[D]"),
+        "lapses": np.zeros(n, dtype=np.int64),
+        "learning_step": np.zeros(n, dtype=np.int64),
+        "repetitions": np.zeros(n, dtype=np.int64),
+        "is_leech": np.zeros(n, dtype=bool),
+        "seconds": np.zeros(n, dtype=np.int64),
+    }
+
+    for k in range(len(bounds) - 1):
+        reviews = by_round[bounds[k]:bounds[k + 1]]
+        if not len(reviews):
+            continue
+        c = card_index[reviews]
+        ts = timestamps[reviews]
+
+        # New cards (initialize_card_state)
+        new = ~state.exists[c]
+        if new.any():
+            fresh = c[new]
+            state.reset(fresh, plan)
+            for i, day in zip(fresh.tolist(), ts[new].astype("datetime64[D]").astype(str).tolist()):
+                state.introduced[i] = day
+
+        out["seconds"][reviews] = review_cards(state, c, qualities[reviews], ts, plan)
+        state.last_review[c] = ts.astype("datetime64[D]")
+        for name in ("interval", "easiness", "due", "lapses", "learning_step", "repetitions", "is_leech"):
+            out[name][reviews] = getattr(state, name)[c]
+
+    final = {name: getattr(state, name) for name in CardArrays.__slots__ if name != "exists"}
+    return BatchResult(card_ids, cards, out, final)
+
+
+def replay(service: SRSService, card_ids: Iterable, qualities: Iterable[int], timestamps: Iterable) -> BatchResult:
+    """
+    Apply a batch of reviews to a service, such as history imported from elsewhere.
+
+    The cards start from the service's current state; their final state is
+    saved to the store in one batch and indexed for due-date queries. Cards
+    the batch introduces today count against today's new-card budget, as
+    they would through update_card.
+    """
+    # Same lock order as SRSService.flush, so a pending write-behind batch cannot
+    # overwrite the replayed states afterwards
+    with service._flush_lock, service._lock:
+        result = schedule_batch(card_ids, qualities, timestamps, initial_states=service.state)
+        states = result.states()
+        service.state.update(states)
+        # Day each card seen for the first time was introduced (the earliest of its ids)
+        introduced: Dict[str, str] = {}
+        for card_id, card_state in states.items():
+            service._pending.pop(card_id, None)
+            service.due_index.set(card_id, card_state["due"])
+            base_id = card_base_id(card_id)
+            if base_id not in service.seen_cards:
+                day = card_state.get("introduced") or ""
+                introduced[base_id] = min(introduced.get(base_id, day), day)
+        service.seen_cards.update(introduced)
+        service._roll_budget_day()
+        service.introduced_today += sum(1 for day in introduced.values() if day == service.budget_day)
+        service.revision = next(_revisions)
+        service.store.save_all(states)
+    return result
@@ -0,0 +1,125 @@
+"""
+Catálogo en memoria de las tablas de tarjetas (kanji y palabras frecuentes).
+
+Cada catálogo carga su tabla una sola vez y la sirve desde memoria, junto con
+índices por id y por los campos que usan las rutas. Antes de cada acceso se
+consulta ``PRAGMA data_version`` sobre una conexión propia: si otra conexión
+ha modificado la base de datos, el catálogo se recarga.
+"""
+import itertools
+import random
+import sqlite3
+import threading
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Sequence
+
+from src.utils.db_pool import connect
+from src.utils.paths import KANJI_DB_PATH
+
+# Número de cada vista creada, distinto para cada una
+_revisions = itertools.count(1)
+
+
+class CatalogSnapshot:
+    """Vista inmutable de una tabla cargada en memoria"""
+
+    def __init__(self, rows: List[Dict[str, Any]], index_fields: Sequence[str]):
+        self.cards = rows
+        # Identifica la vista en cachés sin guardar una referencia a ella
+        self.revision = next(_revisions)
+        self.by_id: Dict[int, Dict[str, Any]] = {row["id"]: row for row in rows}
+        self.indexes: Dict[str, Dict[str, List[Dict[str, Any]]]] = {field: {} for field in index_fields}
+        for row in rows:
+            for field in index_fields:
+                value = row[field]
+                if value:
+                    self.indexes[field].setdefault(value, []).append(row)
+        # Valores únicos de cada campo, usados como distractores en los quiz
+        self.pools: Dict[str, List[str]] = {field: list(self.indexes[field]) for field in index_fields}
+
+    def __len__(self) -> int:
+        return len(self.cards)
+
+    def find(self, field: str, value: str) -> Optional[Dict[str, Any]]:
+        """Devuelve la primera fila cuyo campo coincide con el valor"""
+        matches = self.indexes.get(field, {}).get(value)
+        return matches[0] if matches else None
+
+    def sample_distractors(self, field: str, target: str, k: int) -> List[str]:
+        """Elige hasta k valores distintos del campo, sin incluir el objetivo"""
+        pool = self.pools.get(field, [])
+        # Se toma uno de más por si sale el objetivo, y se descarta
+        picks = random.sample(range(len(pool)), min(k + 1, len(pool)))
+        return [pool[i] for i in picks if pool[i] != target][:k]
+
+    def quiz_choices(self, field: str, target: str, num_choices: int) -> List[str]:
+        """Opciones de una pregunta: el objetivo y hasta num_choices - 1 distractores, en orden aleatorio"""
+        choices = self.sample_distractors(field, target, num_choices - 1)
+        choices.append(target)
+        random.shuffle(choices)
+        return choices
+
+
+class CardCatalog:
+    """Catálogo compartido por el proceso, recargado solo cuando cambia la base de datos"""
+
+    def __init__(self, db_path: Path, table: str, columns: Sequence[str], index_fields: Sequence[str],
+                 optional_columns: Sequence[str] = ()):
+        self.db_path = db_path
+        self.table = table
+        self.columns = list(columns)
+        # Columnas que solo existen en algunas bases de datos; valen None si faltan
+        self.optional_columns = list(optional_columns)
+        self.index_fields = list(index_fields)
+        self._lock = threading.Lock()
+        self._conn: Optional[sqlite3.Connection] = None
+        self._data_version: Optional[int] = None
+        self._snapshot: Optional[CatalogSnapshot] = None
+
+    def _connect(self) -> sqlite3.Connection:
+        if self._conn is None:
+            self._conn = connect(self.db_path, read_only=True)
+        return self._conn
+
+    def _load(self, conn: sqlite3.Connection) -> CatalogSnapshot:
+        existing = {row[1] for row in conn.execute(f"PRAGMA table_info({self.table})")}
+        columns = self.columns + [column for column in self.optional_columns if column in existing]
+        cursor = conn.execute(f"SELECT {', '.join(columns)} FROM {self.table}")
+        missing = dict.fromkeys(column for column in self.optional_columns if column not in existing)
+        rows = [{**missing, **dict(zip(columns, row))} for row in cursor.fetchall()]
+        return CatalogSnapshot(rows, self.index_fields)
+
+    def snapshot(self) -> CatalogSnapshot:
+        """Devuelve la vista actual, recargándola si la base de datos ha cambiado"""
+        with self._lock:
+            conn = self._connect()
+            data_version = conn.execute("PRAGMA data_version").fetchone()[0]
+            if self._snapshot is None or data_version != self._data_version:
+                self._snapshot = self._load(conn)
+                self._data_version = data_version
+            return self._snapshot
+
+    def close(self):
+        """Cierra la conexión usada para detectar cambios"""
+        with self._lock:
+            if self._conn is not None:
+                self._conn.close()
+                self._conn = None
+            self._snapshot = None
+
+
+kanji_catalog = CardCatalog(
+    KANJI_DB_PATH,
+    "kanji",
+    columns=["id", "kanji", "significado", "lectura_china", "lectura_japonesa"],
+    index_fields=["kanji", "significado", "lectura_china", "lectura_japonesa"],
+    # Añadida por src/scripts/update_db.py
+    optional_columns=["total_char_freq"],
+)
+
+palabras_catalog = CardCatalog(
+    KANJI_DB_PATH,
+    "palabras_frecuentes",
+    columns=["id", "frecuencia", "palabra", "significado"],
+    index_fields=["palabra", "significado"],
+)
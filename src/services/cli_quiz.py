@@ -0,0 +1,150 @@
+"""
+Quiz de kanji de consola sobre el mismo motor que la API.
+
+Los cuatro quiz de consola (srs_kanji_significado.py, srs_significado_kanji.py,
+srs_kanji_lectura.py y srs_lectura_kanji.py) usan ``SRSService``, el catálogo de
+kanji y el almacén de estado de la API, con las mismas claves por id y la misma
+configuración (límites diarios, pasos de aprendizaje, número de opciones), así
+que el progreso es el mismo desde la consola y desde la API. Las tarjetas
+pendientes salen del índice por fecha del servicio y las opciones de los
+índices del catálogo, sin recorrer el mazo en cada pregunta; cada repaso se
+guarda solo para su tarjeta.
+"""
+import argparse
+import random
+import sqlite3
+from typing import Any, Callable, Dict, Optional, Tuple
+
+from src.config.srs_config import config_registry
+from src.services.card_catalog import kanji_catalog
+from src.services.srs_service import SRSService
+from src.services.srs_store import DEFAULT_USER, READING_TYPES, create_store
+
+# Calidad de una respuesta correcta e incorrecta, como en la API
+CORRECT_QUALITY = 5
+WRONG_QUALITY = 1
+
+# (texto de la pregunta, campo de las opciones, respuesta correcta, clave de la tarjeta en el estado)
+Question = Tuple[str, str, str, str]
+
+
+def _reading(card: Dict[str, Any]) -> Optional[Tuple[str, str]]:
+    # Tipo de lectura al azar entre los que tiene la tarjeta, y la lectura
+    types = [reading_type for reading_type in READING_TYPES if card[f"lectura_{reading_type}"]]
+    if not types:
+        return None
+    reading_type = random.choice(types)
+    return reading_type, card[f"lectura_{reading_type}"]
+
+
+def _kanji_significado(card: Dict[str, Any]) -> Optional[Question]:
+    if not card["significado"]:
+        return None
+    return f"Kanji: {card['kanji']}", "significado", card["significado"], str(card["id"])
+
+
+def _significado_kanji(card: Dict[str, Any]) -> Optional[Question]:
+    if not card["significado"]:
+        return None
+    return f"Significado: {card['significado']}", "kanji", card["kanji"], str(card["id"])
+
+
+def _kanji_lectura(card: Dict[str, Any]) -> Optional[Question]:
+    reading = _reading(card)
+    if reading is None:
+        return None
+    reading_type, value = reading
+    return f"Kanji: {card['kanji']} (lectura {reading_type})", f"lectura_{reading_type}", value, \
+        f"{card['id']}_{reading_type}"
+
+
+def _lectura_kanji(card: Dict[str, Any]) -> Optional[Question]:
+    reading = _reading(card)
+    if reading is None:
+        return None
+    reading_type, value = reading
+    return f"Lectura {reading_type}: {value}", "kanji", card["kanji"], f"{card['id']}_{reading_type}"
+
+
+class QuizMode:
+    """Variante de quiz: qué se pregunta de cada tarjeta y en qué dirección de la API se guarda"""
+
+    def __init__(self, direction: str, answer_label: str, question: Callable[[Dict[str, Any]], Optional[Question]]):
+        self.direction = direction
+        # Lo que se pide elegir: "del significado correcto"
+        self.answer_label = answer_label
+        self.question = question
+
+
+# Las dos variantes de significado comparten estado, y también las dos de lectura, igual que en la API
+QUIZZES = {
+    "kanji_significado": QuizMode("significado_kanji", "del significado correcto", _kanji_significado),
+    "significado_kanji": QuizMode("significado_kanji", "del kanji correcto", _significado_kanji),
+    "kanji_lectura": QuizMode("lectura_kanji", "de la lectura correcta", _kanji_lectura),
+    "lectura_kanji": QuizMode("lectura_kanji", "del kanji correcto", _lectura_kanji),
+}
+
+
+def _ask_option(answer_label: str, num_options: int) -> int:
+    while True:
+        try:
+            respuesta = int(input(f"\nElige el número {answer_label} (1-{num_options}): "))
+            if 1 <= respuesta <= num_options:
+                return respuesta
+            print("Por favor, elige un número válido.")
+        except ValueError:
+            print("Por favor, ingresa un número.")
+
+
+def run_quiz(mode: QuizMode, user_id: str = DEFAULT_USER, backend: str = "sqlite"):
+    """Pregunta las tarjetas pendientes de hoy hasta que no quede ninguna"""
+    try:
+        snapshot = kanji_catalog.snapshot()
+    except sqlite3.OperationalError as e:
+        print(f"No se pudo cargar la tabla {kanji_catalog.table}: {e}")
+        return
+    if not snapshot.cards:
+        print("No hay tarjetas disponibles. Asegúrate de que la base de datos contiene datos.")
+        return
+
+    service = SRSService(create_store(mode.direction, backend, user_id))
+    try:
+        while True:
+            snapshot = kanji_catalog.snapshot()
+            due_cards = service.get_due_cards(snapshot)
+            random.shuffle(due_cards)
+            question = next(filter(None, map(mode.question, due_cards)), None)
+            if question is None:
+                print("\n¡No hay más tarjetas pendientes para hoy!")
+                break
+
+            prompt, field, answer, card_id = question
+            choices = snapshot.quiz_choices(field, answer, config_registry.get().num_choices)
+            print(f"\n{prompt}")
+            print("\nOpciones:")
+            for i, choice in enumerate(choices, 1):
+                print(f"{i}. {choice}")
+
+            if choices[_ask_option(mode.answer_label, len(choices)) - 1] == answer:
+                print("\n¡Correcto!")
+                quality = CORRECT_QUALITY
+            else:
+                print(f"\nIncorrecto. La respuesta correcta era: {answer}")
+                quality = WRONG_QUALITY
+
+            card_state = service.update_card(card_id, quality)
+            print(f"Se repetirá el: {card_state['due']}")
+            print(f"Tarjetas pendientes para hoy: {service.due_count()}")
+    except (KeyboardInterrupt, EOFError):
+        print("\nQuiz interrumpido, el progreso está guardado.")
+    finally:
+        service.close()
+
+
+def main(mode: QuizMode, description: Optional[str] = None):
+    """Punto de entrada de los quiz de consola"""
+    parser = argparse.ArgumentParser(description=description)
+    parser.add_argument("--user", default=DEFAULT_USER, help="Usuario cuyo estado SRS se usa")
+    parser.add_argument("--backend", choices=["sqlite", "json"], default="sqlite", help="Almacén del estado SRS")
+    args = parser.parse_args()
+    run_quiz(mode, args.user, args.backend)
@@ -0,0 +1,101 @@
+"""
+Índice de tarjetas por fecha de repaso.
+
+Las tarjetas se agrupan en un cubo por fecha. Las fechas ya vencidas se
+guardan ordenadas y las futuras en un montículo del que pasan a las vencidas
+cuando llega su día, así que mover una tarjeta de fecha no desplaza una lista
+del tamaño del mazo: cuesta O(1), más O(log d) si su fecha no tenía cubo
+(d es el número de fechas distintas, no de tarjetas).
+"""
+import heapq
+from bisect import bisect_left, insort
+from itertools import chain, islice
+from typing import Dict, List, Optional
+
+
+class DueIndex:
+    """Cubos de tarjetas por fecha de repaso, con el número de tarjetas vencidas al día"""
+
+    def __init__(self):
+        self._due: Dict[str, str] = {}
+        # fecha -> tarjetas con esa fecha, en el orden en que llegaron (dict como conjunto ordenado)
+        self._buckets: Dict[str, Dict[str, None]] = {}
+        # Día hasta el que se han contado las tarjetas vencidas ("" antes de la primera consulta)
+        self._today = ""
+        # Fechas con cubo hasta _today, ordenadas
+        self._past: List[str] = []
+        # Fechas posteriores a _today; puede contener fechas cuyo cubo ya se vació
+        self._future: List[str] = []
+        # Tarjetas con fecha igual o anterior a _today
+        self._overdue = 0
+
+    def __len__(self) -> int:
+        return len(self._due)
+
+    def set(self, card_id: str, due: str):
+        """Registra o mueve una tarjeta a su nueva fecha de repaso"""
+        old_due = self._due.get(card_id)
+        if old_due == due:
+            return
+        if old_due is not None:
+            self._discard(card_id, old_due)
+        bucket = self._buckets.get(due)
+        if bucket is None:
+            bucket = self._buckets[due] = {}
+            if due > self._today:
+                heapq.heappush(self._future, due)
+            else:
+                insort(self._past, due)
+        bucket[card_id] = None
+        self._due[card_id] = due
+        if due <= self._today:
+            self._overdue += 1
+
+    def remove(self, card_id: str):
+        """Quita una tarjeta del índice"""
+        old_due = self._due.pop(card_id, None)
+        if old_due is not None:
+            self._discard(card_id, old_due)
+
+    def _discard(self, card_id: str, due: str):
+        bucket = self._buckets[due]
+        del bucket[card_id]
+        if due <= self._today:
+            self._overdue -= 1
+        if not bucket:
+            del self._buckets[due]
+            # Las fechas futuras se quedan en el montículo y se descartan al llegar su día
+            if due <= self._today:
+                del self._past[bisect_left(self._past, due)]
+
+    def _advance(self, today: str):
+        # Pasa a vencidas las fechas hasta hoy; si el reloj retrocede, se recalcula todo
+        if today < self._today:
+            self._past = sorted(due for due in self._buckets if due <= today)
+            self._future = [due for due in self._buckets if due > today]
+            heapq.heapify(self._future)
+            self._overdue = sum(len(self._buckets[due]) for due in self._past)
+        else:
+            while self._future and self._future[0] <= today:
+                due = heapq.heappop(self._future)
+                bucket = self._buckets.get(due)
+                # Una fecha puede estar repetida si su cubo se vació y se volvió a crear
+                if bucket and (not self._past or self._past[-1] != due):
+                    self._past.append(due)
+                    self._overdue += len(bucket)
+        self._today = today
+
+    def get(self, card_id: str) -> Optional[str]:
+        """Fecha de repaso registrada para una tarjeta"""
+        return self._due.get(card_id)
+
+    def count_due(self, today: str) -> int:
+        """Número de tarjetas con fecha de repaso igual o anterior a hoy (fechas ISO)"""
+        if today != self._today:
+            self._advance(today)
+        return self._overdue
+
+    def next_due(self, n: int, today: str) -> List[str]:
+        """Hasta n tarjetas pendientes hoy, de la más atrasada a la más reciente"""
+        self.count_due(today)
+        return list(islice(chain.from_iterable(self._buckets[due] for due in self._past), max(n, 0)))
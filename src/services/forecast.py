@@ -0,0 +1,255 @@
+"""
+Workload forecast for the cards of an SRS service.
+
+``due_histogram`` counts the cards already scheduled for each of the next days.
+``simulate_workload`` projects the reviews of every day under a candidate
+configuration with a Monte Carlo simulation: each run answers every review
+correctly with probability ``retention``, with the qualities the quiz routes
+give, and reschedules the card with the rules of ``review_cards``. All runs
+advance together as one set of arrays, so a day costs a few NumPy passes
+whatever the number of runs.
+
+A day of one run works like ``SRSService.get_due_cards``: new cards are only
+introduced if they fit under ``daily_card_limit`` together with the reviews
+already due, and at most ``daily_card_limit`` reviews are done, most overdue
+first. Cards that do not fit stay due and show up as backlog. Learning steps
+shorter than a day are reviewed again the same day.
+
+``ForecastCache`` keeps recent forecasts by config hash, state revision and
+catalog snapshot: asking again for the same candidate config, while tuning it,
+does not simulate again, or scan the catalog, until the user reviews a card,
+the catalog changes or the day changes.
+"""
+import hashlib
+import threading
+from collections import OrderedDict
+from datetime import date, datetime
+from typing import Any, Dict, Optional, Tuple
+
+import numpy as np
+
+from ..config.srs_config import SRSConfig
+from .batch_scheduler import CardArrays, review_cards
+from .srs_service import MAX_QUALITY, SRSService, Schedule, card_base_id
+
+# Qualities of a right and a wrong answer in the quiz routes
+CORRECT_QUALITY = MAX_QUALITY
+WRONG_QUALITY = 1
+# Review passes per simulated day; learning cards that are still due after them wait as backlog
+MAX_PASSES = 16
+# Days overdue told apart when choosing what to review first; older cards count as this overdue
+MAX_OVERDUE = 3650
+# Due date of the slots of cards that have not been introduced
+NEVER = "9999-12-31"
+# Forecasts kept in the cache
+FORECAST_CACHE_SIZE = 256
+
+
+def config_hash(config: SRSConfig) -> str:
+    """Fingerprint of a configuration, equal for configs with the same values"""
+    return hashlib.sha256(config.model_dump_json().encode()).hexdigest()[:16]
+
+
+def due_histogram(due: np.ndarray, start: np.datetime64, days: int) -> np.ndarray:
+    """Cards due on each of the days from start; overdue cards count on the first day"""
+    offsets = (due.astype("datetime64[D]") - start).astype(np.int64)
+    offsets = np.maximum(offsets, 0)
+    return np.bincount(offsets[offsets < days], minlength=days)
+
+
+def _take_oldest(index: np.ndarray, due: np.ndarray, today: int, capacity: np.ndarray, size: int,
+                 runs: int) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Due slots (in increasing order) that each run reviews: up to its capacity,
+    most overdue first, like DueIndex.next_due, and then by slot.
+
+    Instead of sorting, a histogram of the days overdue in each run gives the
+    day up to which the run can review everything; only the cards due on that
+    day are then counted one by one.
+    """
+    run = index // size
+    if not len(index) or (np.bincount(run, minlength=runs) <= capacity).all():
+        return index, run
+    overdue = np.minimum(today - due, MAX_OVERDUE)
+    span = int(overdue.max()) + 1
+    # Position of each card from the most overdue day of any run (0) to today (span - 1)
+    position = span - 1 - overdue
+    cumulative = np.cumsum(np.bincount(run * span + position, minlength=runs * span).reshape(runs, span), axis=1)
+    full = cumulative >= capacity[:, None]
+    # Last position each run reaches, and cards it reviews before that position
+    cutoff = np.where(full.any(axis=1), full.argmax(axis=1), span - 1)
+    before = np.where(cutoff > 0, cumulative[np.arange(runs), np.maximum(cutoff - 1, 0)], 0)
+    take = position < cutoff[run]
+    tied = np.flatnonzero(position == cutoff[run])
+    tied_runs = run[tied]
+    tied_counts = np.bincount(tied_runs, minlength=runs)
+    rank = np.arange(len(tied)) - (np.cumsum(tied_counts) - tied_counts)[tied_runs]
+    take[tied[rank < capacity[tied_runs] - before[tied_runs]]] = True
+    return index[take], run[take]
+
+
+def simulate_workload(cards: CardArrays, unseen: int, config: SRSConfig, start: date, days: int,
+                      runs: int = 50, retention: float = 0.85, seed: Optional[int] = 0) -> Dict[str, np.ndarray]:
+    """
+    Simulate days of reviews from the current cards under config.
+
+    unseen is the number of catalog cards that can still be introduced.
+    Returns (runs, days) arrays with the reviews done, the new cards
+    introduced and the backlog of due cards left at the end of each day.
+    """
+    plan = Schedule(config, 0)
+    limit = config.daily_card_limit
+    per_day = max(0, config.new_cards_per_day)
+    known = len(cards.exists)
+    new_max = min(unseen, per_day * days)
+    size = known + new_max
+    sim = cards.tile(runs, new_max)
+    # Slots of cards not introduced yet are never due; due_days views sim.due as day numbers
+    sim.due[~sim.exists] = np.datetime64(NEVER, "D")
+    due_days = sim.due.view(np.int64)
+    rng = np.random.default_rng(seed)
+
+    reviews = np.zeros((runs, days), dtype=np.int64)
+    new_cards = np.zeros((runs, days), dtype=np.int64)
+    backlog = np.zeros((runs, days), dtype=np.int64)
+    introduced = np.zeros(runs, dtype=np.int64)
+    window = config.learning_time_window.start_time
+    review_time = np.timedelta64(window.hour * 3600 + window.minute * 60 + window.second, "s")
+    first_day = np.datetime64(start, "D")
+
+    for d in range(days):
+        day = first_day + d
+        today = int(day.astype(np.int64))
+        ts = day.astype("datetime64[s]") + review_time
+        due_count = np.bincount(np.flatnonzero(due_days <= today) // size, minlength=runs)
+
+        # New cards, only if they fit under the limit with the reviews already due
+        n_new = np.minimum(per_day, new_max - introduced)
+        n_new = np.where(due_count + n_new <= limit, n_new, 0)
+        if n_new.any():
+            run = np.repeat(np.arange(runs), n_new)
+            offset = np.arange(len(run)) - np.repeat(np.cumsum(n_new) - n_new, n_new)
+            fresh = run * size + known + introduced[run] + offset
+            sim.reset(fresh, plan)
+            sim.due[fresh] = day
+            introduced += n_new
+            new_cards[:, d] = n_new
+
+        capacity = np.full(runs, limit, dtype=np.int64)
+        index = np.flatnonzero(due_days <= today)
+        for _ in range(MAX_PASSES):
+            index, run = _take_oldest(index, due_days[index], today, capacity, size, runs)
+            if not len(index):
+                break
+            qualities = np.where(rng.random(len(index)) < retention, CORRECT_QUALITY, WRONG_QUALITY)
+            review_cards(sim, index, qualities, np.full(len(index), ts), plan)
+            done = np.bincount(run, minlength=runs)
+            reviews[:, d] += done
+            capacity -= done
+            # Only the cards just reviewed can be due again today: the ones left
+            # out by the capacity are in runs that have none left
+            index = index[due_days[index] <= today]
+            index = index[capacity[index // size] > 0]
+
+        backlog[:, d] = np.bincount(np.flatnonzero(due_days <= today) // size, minlength=runs)
+
+    return {"reviews": reviews, "new_cards": new_cards, "backlog": backlog}
+
+
+class ForecastCache:
+    """Recent forecasts by (config hash, state and catalog revisions, day, parameters), with LRU eviction"""
+
+    def __init__(self, maxsize: int = FORECAST_CACHE_SIZE):
+        self.maxsize = maxsize
+        self._entries: "OrderedDict[Tuple, Dict[str, Any]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.stats = {"hits": 0, "misses": 0}
+
+    def get(self, key: Tuple) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            result = self._entries.get(key)
+            if result is None:
+                self.stats["misses"] += 1
+                return None
+            self._entries.move_to_end(key)
+            self.stats["hits"] += 1
+            return result
+
+    def put(self, key: Tuple, result: Dict[str, Any]):
+        with self._lock:
+            self._entries[key] = result
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+
+    def info(self) -> Dict[str, Any]:
+        """Size and counters of the cache"""
+        with self._lock:
+            return {"size": len(self._entries), "maxsize": self.maxsize, **self.stats}
+
+
+# Cache shared by the forecast route
+forecast_cache = ForecastCache()
+
+
+def forecast(service: SRSService, snapshot, config: SRSConfig, days: int = 30, runs: int = 50,
+             retention: float = 0.85, seed: int = 0) -> Dict[str, Any]:
+    """
+    Due-card histogram and simulated daily workload of a service under config.
+
+    The cards are those of the service's state that point at catalog ids;
+    new cards come from the snapshot cards the service has never seen.
+    """
+    start = datetime.now().date()
+    with service._lock:
+        # The snapshot and the state revision determine the unseen cards, counted only on a miss
+        key = (config_hash(config), service.revision, snapshot.revision, start, days, runs, retention, seed)
+        result = forecast_cache.get(key)
+        if result is not None:
+            return result
+        seen = sum(1 for card_id in service.seen_cards if card_id.isdigit() and int(card_id) in snapshot.by_id)
+        unseen = len(snapshot.cards) - seen
+        card_ids = [card_id for card_id in service.state if card_base_id(card_id).isdigit()]
+        cards = CardArrays.from_states(card_ids, service.state, Schedule(config, 0))
+
+    first_day = np.datetime64(start, "D")
+    due = due_histogram(cards.due, first_day, days)
+    simulated = simulate_workload(cards, unseen, config, start, days, runs, retention, seed)
+    reviews = simulated["reviews"]
+    p10, p50, p90 = np.percentile(reviews, [10, 50, 90], axis=0)
+    mean_reviews = reviews.mean(axis=0)
+    mean_new = simulated["new_cards"].mean(axis=0)
+    mean_backlog = simulated["backlog"].mean(axis=0)
+
+    result = {
+        "start": start.isoformat(),
+        "days": days,
+        "runs": runs,
+        "retention": retention,
+        "config_hash": key[0],
+        "daily_card_limit": config.daily_card_limit,
+        "new_cards_per_day": config.new_cards_per_day,
+        "cards": len(card_ids),
+        "unseen": unseen,
+        "summary": {
+            "reviews_per_day": round(float(mean_reviews.mean()), 1),
+            "peak_reviews_p90": round(float(p90.max()), 1),
+            "new_cards": round(float(simulated["new_cards"].sum(axis=1).mean()), 1),
+            "final_backlog": round(float(mean_backlog[-1]), 1),
+        },
+        "forecast": [
+            {
+                "date": str(first_day + d),
+                "due": int(due[d]),
+                "reviews": round(float(mean_reviews[d]), 1),
+                "reviews_p10": round(float(p10[d]), 1),
+                "reviews_p50": round(float(p50[d]), 1),
+                "reviews_p90": round(float(p90[d]), 1),
+                "new_cards": round(float(mean_new[d]), 1),
+                "backlog": round(float(mean_backlog[d]), 1),
+            }
+            for d in range(days)
+        ],
+    }
+    forecast_cache.put(key, result)
+    return result
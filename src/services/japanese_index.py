@@ -0,0 +1,90 @@
+"""
+Índice de búsqueda japonesa sobre los catálogos de palabras y kanji.
+
+Se construye a partir de las vistas de ``palabras_catalog`` y ``kanji_catalog``
+y se reconstruye cuando cualquiera de las dos cambia. Todas las claves están
+normalizadas con ``src.utils.japanese.normalize``, así que una búsqueda en
+hiragana encuentra también las palabras escritas en katakana o con su lectura
+entre corchetes. Cada búsqueda es una consulta a un diccionario.
+"""
+import threading
+from typing import Any, Dict, List, Optional, Tuple
+
+from src.services.card_catalog import CatalogSnapshot, kanji_catalog, palabras_catalog
+from src.utils.japanese import is_kanji, kanji_readings, normalize, word_forms
+
+Row = Dict[str, Any]
+
+
+def _by_frequency(rows: List[Row]) -> List[Row]:
+    unique = {row["id"]: row for row in rows}
+    return sorted(unique.values(), key=lambda row: (row["frecuencia"], row["id"]))
+
+
+class JapaneseIndex:
+    """Palabras por forma escrita o leída, por kanji que contienen y por lectura de esos kanji"""
+
+    def __init__(self, palabras: CatalogSnapshot, kanji: CatalogSnapshot):
+        self.palabras = palabras
+        self.kanji = kanji
+
+        forms: Dict[str, List[Row]] = {}
+        words_by_kanji: Dict[str, List[Row]] = {}
+        for row in palabras.cards:
+            for form in word_forms(row["palabra"]):
+                forms.setdefault(form, []).append(row)
+            for char in set(row["palabra"]):
+                if is_kanji(char):
+                    words_by_kanji.setdefault(char, []).append(row)
+
+        kanji_by_reading: Dict[str, List[str]] = {}
+        for row in kanji.cards:
+            for field in ("lectura_china", "lectura_japonesa"):
+                for reading in kanji_readings(row[field]):
+                    kanji_by_reading.setdefault(reading, []).append(row["kanji"])
+
+        # forma normalizada -> palabras con esa forma, por frecuencia
+        self.by_form: Dict[str, List[Row]] = {form: _by_frequency(rows) for form, rows in forms.items()}
+        # kanji -> palabras que lo contienen, por frecuencia
+        self.by_kanji: Dict[str, List[Row]] = {char: _by_frequency(rows) for char, rows in words_by_kanji.items()}
+        # lectura -> kanji que se leen así
+        self.kanji_by_reading: Dict[str, List[str]] = {
+            reading: list(dict.fromkeys(chars)) for reading, chars in kanji_by_reading.items()
+        }
+        # lectura -> palabras que contienen alguno de esos kanji, por frecuencia
+        self.by_reading: Dict[str, List[Row]] = {
+            reading: _by_frequency([row for char in chars for row in self.by_kanji.get(char, [])])
+            for reading, chars in self.kanji_by_reading.items()
+        }
+
+        # Resultado final de cada clave posible, para que buscar sea una sola consulta
+        self.matches: Dict[str, List[Row]] = {}
+        for key in set(self.by_form) | set(self.by_kanji) | set(self.by_reading):
+            rows = self.by_form.get(key, []) + self.by_reading.get(key, []) + self.by_kanji.get(key, [])
+            self.matches[key] = list({row["id"]: row for row in rows}.values())
+
+    def lookup(self, query: str) -> Tuple[List[Row], List[str]]:
+        """
+        Palabras que corresponden a la búsqueda y kanji cuya lectura coincide.
+
+        Primero van las palabras escritas o leídas exactamente así y después
+        las que contienen un kanji con esa lectura o el propio kanji buscado,
+        cada grupo por frecuencia.
+        """
+        key = normalize(query)
+        return self.matches.get(key, []), self.kanji_by_reading.get(key, [])
+
+
+_index: Optional[JapaneseIndex] = None
+_index_lock = threading.Lock()
+
+
+def japanese_index() -> JapaneseIndex:
+    """Índice para las vistas actuales de los catálogos, reconstruido si alguna ha cambiado"""
+    global _index
+    palabras = palabras_catalog.snapshot()
+    kanji = kanji_catalog.snapshot()
+    with _index_lock:
+        if _index is None or _index.palabras is not palabras or _index.kanji is not kanji:
+            _index = JapaneseIndex(palabras, kanji)
+        return _index
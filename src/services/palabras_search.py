@@ -0,0 +1,171 @@
+"""
+Búsqueda de texto en la tabla de palabras frecuentes.
+
+Las búsquedas usan ``palabras_fts``, una tabla FTS5 con el tokenizador trigram
+sobre ``palabra`` y ``significado``. Con ella un ``MATCH`` encuentra cualquier
+subcadena de al menos tres caracteres sin recorrer la tabla entera. La tabla FTS
+usa palabras_frecuentes como contenido externo y unos triggers la mantienen al
+día en cada INSERT, UPDATE y DELETE. Las búsquedas de uno o dos caracteres, que
+el trigram no puede indexar, se resuelven con LIKE.
+
+Cada consulta devuelve la página y el total de coincidencias a la vez (con
+``COUNT(*) OVER ()``). Las páginas siguientes se piden con un cursor que
+apunta a la última fila devuelta (frecuencia e id), así que una página profunda
+no necesita saltarse las anteriores.
+"""
+import sqlite3
+from typing import List, Optional, Tuple
+
+# Campos de palabras_frecuentes indexados para búsqueda
+SEARCH_FIELDS = ("palabra", "significado")
+# Longitud mínima de búsqueda que puede usar el índice trigram
+MIN_FTS_LENGTH = 3
+# Ordenaciones de resultados: por frecuencia de uso o por relevancia (bm25) y luego frecuencia
+ORDERS = ("frecuencia", "relevancia")
+
+_FTS_SCHEMA = [
+    '''
+    CREATE VIRTUAL TABLE IF NOT EXISTS palabras_fts USING fts5(
+        palabra, significado,
+        content='palabras_frecuentes', content_rowid='id', tokenize='trigram'
+    )
+    ''',
+    '''
+    CREATE TRIGGER IF NOT EXISTS palabras_fts_ai AFTER INSERT ON palabras_frecuentes BEGIN
+        INSERT INTO palabras_fts (rowid, palabra, significado) VALUES (new.id, new.palabra, new.significado);
+    END
+    ''',
+    '''
+    CREATE TRIGGER IF NOT EXISTS palabras_fts_ad AFTER DELETE ON palabras_frecuentes BEGIN
+        INSERT INTO palabras_fts (palabras_fts, rowid, palabra, significado)
+        VALUES ('delete', old.id, old.palabra, old.significado);
+    END
+    ''',
+    '''
+    CREATE TRIGGER IF NOT EXISTS palabras_fts_au AFTER UPDATE ON palabras_frecuentes BEGIN
+        INSERT INTO palabras_fts (palabras_fts, rowid, palabra, significado)
+        VALUES ('delete', old.id, old.palabra, old.significado);
+        INSERT INTO palabras_fts (rowid, palabra, significado) VALUES (new.id, new.palabra, new.significado);
+    END
+    ''',
+    # Orden de /palabras/top y de las búsquedas, y paginación por cursor
+    "CREATE INDEX IF NOT EXISTS idx_palabras_frecuencia ON palabras_frecuentes (frecuencia, id)",
+]
+
+
+def ensure_search_index(conn: sqlite3.Connection) -> bool:
+    """Crea los índices de búsqueda si no existen y los llena con las palabras actuales; devuelve si los creó"""
+    exists = conn.execute(
+        "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'palabras_fts'"
+    ).fetchone() is not None
+    for statement in _FTS_SCHEMA:
+        conn.execute(statement)
+    if not exists:
+        conn.execute("INSERT INTO palabras_fts (palabras_fts) VALUES ('rebuild')")
+    return not exists
+
+
+def encode_cursor(row: tuple) -> str:
+    """Cursor que apunta a una fila (id, frecuencia, ...) devuelta por search o top"""
+    return f"{row[1]}:{row[0]}"
+
+
+def decode_cursor(cursor: str) -> Tuple[int, int]:
+    """(frecuencia, id) de un cursor; ValueError si no es válido"""
+    frecuencia, _, row_id = cursor.partition(":")
+    try:
+        return int(frecuencia), int(row_id)
+    except ValueError:
+        raise ValueError(f"Cursor inválido: {cursor}") from None
+
+
+def _fts_query(field: str, text: str) -> str:
+    # Frase entre comillas limitada a la columna: el trigram la trata como subcadena
+    return f'{field} : "{text.replace(chr(34), chr(34) * 2)}"'
+
+
+def _escape_like(text: str) -> str:
+    return text.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+
+
+def _next_cursor(rows: List[tuple], limit: int) -> Optional[str]:
+    # Se pide una fila de más para saber si hay otra página
+    if len(rows) > limit:
+        del rows[limit:]
+        return encode_cursor(rows[-1])
+    return None
+
+
+def search(conn: sqlite3.Connection, field: str, text: str, limit: int, order: str = "frecuencia",
+           cursor: Optional[str] = None) -> Tuple[List[tuple], int, Optional[str]]:
+    """
+    Busca las palabras cuyo campo contiene el texto.
+
+    Devuelve hasta ``limit`` filas (id, frecuencia, palabra, significado), el
+    número total de coincidencias y el cursor de la página siguiente (None si
+    no hay más). Solo el orden por frecuencia admite cursor.
+    """
+    if field not in SEARCH_FIELDS:
+        raise ValueError(f"Campo de búsqueda no indexado: {field}")
+    if order not in ORDERS:
+        raise ValueError(f"Orden de búsqueda desconocido: {order}")
+    if cursor is not None and order != "frecuencia":
+        raise ValueError("La paginación por cursor solo está disponible con orden por frecuencia")
+
+    if len(text) >= MIN_FTS_LENGTH:
+        matches = (
+            "SELECT p.id, p.frecuencia, p.palabra, p.significado, palabras_fts.rank AS relevance, "
+            "COUNT(*) OVER () AS total "
+            "FROM palabras_fts JOIN palabras_frecuentes p ON p.id = palabras_fts.rowid "
+            "WHERE palabras_fts MATCH ?"
+        )
+        params: list = [_fts_query(field, text)]
+    else:
+        # Demasiado corto para el trigram: recorrer la tabla. Sin rango bm25, la
+        # relevancia se aproxima poniendo primero las coincidencias exactas
+        matches = (
+            f"SELECT id, frecuencia, palabra, significado, {field} != ? AS relevance, "
+            "COUNT(*) OVER () AS total "
+            f"FROM palabras_frecuentes WHERE {field} LIKE ? ESCAPE '\\'"
+        )
+        params = [text, f"%{_escape_like(text)}%"]
+
+    # El total se calcula sobre todas las coincidencias, antes de aplicar el cursor
+    where = ""
+    if cursor is not None:
+        where = "WHERE (frecuencia, id) > (?, ?)"
+        params.extend(decode_cursor(cursor))
+    order_by = "relevance, frecuencia, id" if order == "relevancia" else "frecuencia, id"
+    rows = conn.execute(
+        f"SELECT id, frecuencia, palabra, significado, total FROM ({matches}) {where} "
+        f"ORDER BY {order_by} LIMIT ?",
+        params + [limit + 1]
+    ).fetchall()
+
+    if rows:
+        total = rows[0][4]
+    elif cursor is not None:
+        # Cursor más allá de la última página: no queda ninguna fila de la que leer el total
+        total = conn.execute(f"SELECT COUNT(*) FROM ({matches})", params[:-2]).fetchone()[0]
+    else:
+        total = 0
+    rows = [row[:4] for row in rows]
+    next_cursor = _next_cursor(rows, limit)
+    return rows, total, next_cursor if order == "frecuencia" else None
+
+
+def top(conn: sqlite3.Connection, limit: int, cursor: Optional[str] = None) -> Tuple[List[tuple], Optional[str]]:
+    """Página de palabras por frecuencia y cursor de la página siguiente (None si no hay más)"""
+    if cursor is None:
+        rows = conn.execute(
+            "SELECT id, frecuencia, palabra, significado FROM palabras_frecuentes "
+            "ORDER BY frecuencia, id LIMIT ?",
+            (limit + 1,)
+        ).fetchall()
+    else:
+        rows = conn.execute(
+            "SELECT id, frecuencia, palabra, significado FROM palabras_frecuentes "
+            "WHERE (frecuencia, id) > (?, ?) ORDER BY frecuencia, id LIMIT ?",
+            (*decode_cursor(cursor), limit + 1)
+        ).fetchall()
+    return rows, _next_cursor(rows, limit)
@@ -1,131 +1,352 @@
 from datetime import datetime, timedelta
 from typing import Dict, Any, List, Optional
-from ..config.srs_config import config, SRSConfig
-import json
-from pathlib import Path
+import itertools
+import threading
+import time
+from ..config.srs_config import config_registry, SRSConfig
+from .srs_store import SRSStateStore
+from .due_index import DueIndex
+
+# Write-behind services with pending reviews, written by one background thread
+_dirty_services = set()
+_dirty_lock = threading.Lock()
+_wake_flusher = threading.Event()
+_flusher_thread = None
+FLUSH_TICK = 0.1
+
+# State revisions, unique across services so they can key caches of derived data
+_revisions = itertools.count(1)
+
+# Highest review quality; answers are graded from 0 (blackout) to 5 (perfect)
+MAX_QUALITY = 5
+
+def parse_interval(interval_str: str) -> timedelta:
+    """Parse interval string (e.g., '10m', '1d') to timedelta"""
+    value = int(interval_str[:-1])
+    unit = interval_str[-1]
+    if unit == 'm':
+        return timedelta(minutes=value)
+    elif unit == 'd':
+        return timedelta(days=value)
+    raise ValueError(f"Invalid interval format: {interval_str}")
+
+class Schedule:
+    """
+    Scheduling parameters of one config version, flattened for the review hot path.
+
+    Built once per config version and never modified: learning steps as
+    seconds and timedeltas, the interval modifier of each quality, and the
+    interval bounds with a prebuilt timedelta for every day between them.
+    """
+    __slots__ = ("version", "step_seconds", "step_deltas", "fail_reset", "graduation_delta",
+                 "ease_factor", "lapse_penalty", "leech_threshold", "lapse_delta",
+                 "initial_interval", "minimum_interval", "maximum_interval", "modifiers", "day_deltas")
+
+    def __init__(self, config: SRSConfig, version: int):
+        card = config.card_parameters
+        feedback = config.feedback_parameters
+        learning = config.learning_parameters
+        self.version = version
+
+        self.step_deltas = tuple(parse_interval(step) for step in learning.learning_steps)
+        self.step_seconds = tuple(int(delta.total_seconds()) for delta in self.step_deltas)
+        self.fail_reset = learning.fail_reset
+        self.graduation_delta = timedelta(days=card.initial_interval)
+
+        self.ease_factor = card.ease_factor
+        self.lapse_penalty = feedback.lapse_penalty
+        self.leech_threshold = feedback.leech_threshold
+        self.lapse_delta = timedelta(days=card.minimum_interval)
+
+        self.initial_interval = card.initial_interval
+        self.minimum_interval = max(0, card.minimum_interval)
+        self.maximum_interval = max(self.minimum_interval, card.maximum_interval)
+        # Quality q uses response_scale[q - 1]; qualities past the end of the scale
+        # (5 with the default four answers) use its last answer
+        scale = feedback.response_scale
+        self.modifiers = tuple(
+            feedback.interval_modifiers.get(scale[min(max(quality - 1, 0), len(scale) - 1)], 1.0) if scale else 1.0
+            for quality in range(MAX_QUALITY + 1)
+        )
+        self.day_deltas = tuple(timedelta(days=days) for days in range(self.minimum_interval, self.maximum_interval + 1))
+
+_schedule: Optional[Schedule] = None
+
+def _compile(config: SRSConfig, version: int):
+    global _schedule
+    _schedule = Schedule(config, version)
+
+def schedule() -> Schedule:
+    """Schedule of the current config, compiled again only when its version changes"""
+    global _schedule
+    current = _schedule
+    config, version = config_registry.current()
+    if current is None or current.version != version:
+        current = _schedule = Schedule(config, version)
+    return current
+
+config_registry.subscribe(_compile)
+
+def card_base_id(card_id: str) -> str:
+    """Id of the catalog card behind a state key ("12" or "12_china" -> "12")"""
+    return card_id.split("_", 1)[0]
 
 class SRSService:
-    def __init__(self, state_file: Path):
-        self.state_file = state_file
-        self.config = config
+    def __init__(self, store: SRSStateStore, write_behind: bool = False,
+                 flush_interval: float = 1.0, batch_size: int = 100):
+        self.store = store
+        self._lock = threading.RLock()
         self.state = self.load_state()
+        # Replaced by a new value from _revisions every time the state changes
+        self.revision = next(_revisions)
+        self.due_index = DueIndex()
+        self.seen_cards = set()
+        for card_id, card_state in self.state.items():
+            # Only keys that point at catalog ids; older files also hold keys by kanji
+            if card_base_id(card_id).isdigit():
+                self.due_index.set(card_id, card_state["due"])
+                self.seen_cards.add(card_base_id(card_id))
+        # New-card budget for today, updated as cards are introduced
+        self.budget_day = datetime.now().date().isoformat()
+        self.introduced_today = len({
+            card_base_id(card_id) for card_id, card_state in self.state.items()
+            if card_state.get("introduced") == self.budget_day
+        })
+        # (catalog snapshot, position) before which every card has already been seen
+        self._new_cursor = (None, 0)
+        
+        # Write-behind: reviews are kept in _pending and saved in batches
+        self.write_behind = write_behind
+        self.flush_interval = flush_interval
+        self.batch_size = batch_size
+        self._pending: Dict[str, Dict[str, Any]] = {}
+        self._pending_since = 0.0
+        self._flush_lock = threading.Lock()
+        self._closed = False
+        self.stats = {"flushes": 0, "flushed_cards": 0, "flush_errors": 0, "last_flush": None}
+        if write_behind:
+            _start_flusher()
+
+    @property
+    def config(self) -> SRSConfig:
+        """Current SRS configuration; changes made through the config routes apply at once"""
+        return config_registry.get()
 
     def load_state(self) -> Dict[str, Any]:
-        """Load SRS state from file"""
-        if self.state_file.exists():
-            with open(self.state_file, 'r', encoding='utf-8') as f:
-                return json.load(f)
-        return {}
+        """Load SRS state from the store"""
+        return self.store.load()
 
     def save_state(self):
-        """Save SRS state to file"""
-        with open(self.state_file, 'w', encoding='utf-8') as f:
-            json.dump(self.state, f, ensure_ascii=False, indent=2)
+        """Save the whole SRS state to the store"""
+        self.store.save_all(self.state)
 
-    def initialize_card_state(self, card_id: str) -> Dict[str, Any]:
+    def initialize_card_state(self, card_id: str, now: Optional[datetime] = None,
+                              plan: Optional[Schedule] = None) -> Dict[str, Any]:
         """Initialize state for a new card"""
-        today = datetime.now().date().isoformat()
+        today = (now or datetime.now()).date().isoformat()
         return {
             "interval": 0,
             "repetitions": 0,
-            "easiness": self.config.card_parameters.ease_factor,
+            "easiness": (plan or schedule()).ease_factor,
             "due": today,
             "learning_step": 0,
             "lapses": 0,
-            "last_review": today
+            "last_review": today,
+            "introduced": today
         }
 
     def parse_interval(self, interval_str: str) -> timedelta:
         """Parse interval string (e.g., '10m', '1d') to timedelta"""
-        value = int(interval_str[:-1])
-        unit = interval_str[-1]
-        if unit == 'm':
-            return timedelta(minutes=value)
-        elif unit == 'd':
-            return timedelta(days=value)
-        raise ValueError(f"Invalid interval format: {interval_str}")
-
-    def calculate_next_interval(self, card_state: Dict[str, Any], quality: int) -> timedelta:
+        return parse_interval(interval_str)
+
+    def calculate_next_interval(self, card_state: Dict[str, Any], quality: int,
+                                plan: Optional[Schedule] = None) -> timedelta:
         """Calculate next review interval based on quality and current state"""
-        if card_state["learning_step"] < len(self.config.learning_parameters.learning_steps):
+        plan = plan or schedule()
+        steps = plan.step_deltas
+        if card_state["learning_step"] < len(steps):
             # Card is still in learning phase
             if quality < 3:  # Failed
-                if self.config.learning_parameters.fail_reset:
+                if plan.fail_reset:
                     card_state["learning_step"] = 0
-                return self.parse_interval(self.config.learning_parameters.learning_steps[0])
+                return steps[0]
             else:
                 next_step = card_state["learning_step"] + 1
-                if next_step < len(self.config.learning_parameters.learning_steps):
-                    return self.parse_interval(self.config.learning_parameters.learning_steps[next_step])
+                if next_step < len(steps):
+                    return steps[next_step]
                 # Graduate from learning
-                card_state["learning_step"] = len(self.config.learning_parameters.learning_steps)
-                return timedelta(days=self.config.card_parameters.initial_interval)
+                card_state["learning_step"] = len(steps)
+                return plan.graduation_delta
         
         # Card is in review phase
         if quality < 3:
             card_state["lapses"] += 1
-            if card_state["lapses"] >= self.config.feedback_parameters.leech_threshold:
+            if card_state["lapses"] >= plan.leech_threshold:
                 card_state["is_leech"] = True
-            card_state["easiness"] *= self.config.feedback_parameters.lapse_penalty
-            return timedelta(days=self.config.card_parameters.minimum_interval)
+            card_state["easiness"] *= plan.lapse_penalty
+            return plan.lapse_delta
         
         # Calculate new interval
         if card_state["interval"] == 0:
-            interval = self.config.card_parameters.initial_interval
+            interval = plan.initial_interval
         else:
-            modifier = self.config.feedback_parameters.interval_modifiers[
-                self.config.feedback_parameters.response_scale[quality-1]
-            ]
+            modifier = plan.modifiers[min(quality, MAX_QUALITY)]
             interval = int(card_state["interval"] * card_state["easiness"] * modifier)
         
         # Apply bounds
-        interval = max(self.config.card_parameters.minimum_interval,
-                      min(interval, self.config.card_parameters.maximum_interval))
+        interval = max(plan.minimum_interval, min(interval, plan.maximum_interval))
         
-        return timedelta(days=interval)
+        return plan.day_deltas[interval - plan.minimum_interval]
 
     def update_card(self, card_id: str, quality: int) -> Dict[str, Any]:
         """Update card state based on review quality"""
+        with self._lock:
+            card_state = self._apply_review(card_id, quality)
+            if not self.write_behind or self._closed:
+                self.store.save_card(card_id, card_state)
+                return card_state
+            if not self._pending:
+                self._pending_since = time.monotonic()
+                with _dirty_lock:
+                    _dirty_services.add(self)
+            self._pending[card_id] = card_state
+            if len(self._pending) >= self.batch_size:
+                _wake_flusher.set()
+        return dict(card_state)
+
+    def _apply_review(self, card_id: str, quality: int, now: Optional[datetime] = None,
+                      plan: Optional[Schedule] = None) -> Dict[str, Any]:
+        """Apply a review made at now (default: the current time) to the in-memory state"""
+        now = now or datetime.now()
         if card_id not in self.state:
-            self.state[card_id] = self.initialize_card_state(card_id)
+            self.state[card_id] = self.initialize_card_state(card_id, now, plan)
+            base_id = card_base_id(card_id)
+            if base_id not in self.seen_cards:
+                self.seen_cards.add(base_id)
+                self._roll_budget_day()
+                self.introduced_today += 1
         
         card_state = self.state[card_id]
-        next_interval = self.calculate_next_interval(card_state, quality)
+        next_interval = self.calculate_next_interval(card_state, quality, plan)
         
         # Update state
         card_state["interval"] = next_interval.days
-        card_state["last_review"] = datetime.now().date().isoformat()
-        card_state["due"] = (datetime.now() + next_interval).date().isoformat()
+        card_state["last_review"] = now.date().isoformat()
+        card_state["due"] = (now + next_interval).date().isoformat()
         
         if quality >= 3:
             card_state["repetitions"] += 1
         else:
             card_state["repetitions"] = 0
         
-        self.save_state()
-        return card_state
+        self.due_index.set(card_id, card_state["due"])
+        self.revision = next(_revisions)
+        return dict(card_state)
+
+    def flush(self) -> int:
+        """Write pending reviews to the store in one batch; returns how many were written"""
+        with self._flush_lock:
+            with self._lock:
+                batch, self._pending = self._pending, {}
+                with _dirty_lock:
+                    _dirty_services.discard(self)
+            if not batch:
+                return 0
+            try:
+                self.store.save_all(batch)
+            except Exception:
+                # Put the batch back without overwriting newer reviews, retry after an interval
+                with self._lock:
+                    for card_id, card_state in batch.items():
+                        self._pending.setdefault(card_id, card_state)
+                    self._pending_since = time.monotonic()
+                    with _dirty_lock:
+                        _dirty_services.add(self)
+                    self.stats["flush_errors"] += 1
+                raise
+            self.stats["flushes"] += 1
+            self.stats["flushed_cards"] += len(batch)
+            self.stats["last_flush"] = datetime.now().isoformat(timespec="seconds")
+            return len(batch)
 
-    def get_due_cards(self, cards: List[Dict[str, Any]], include_new: bool = True) -> List[Dict[str, Any]]:
-        """Get cards due for review"""
+    def flush_due(self, now: float) -> bool:
+        """Whether the pending batch is full or has waited flush_interval seconds"""
+        return len(self._pending) >= self.batch_size or now - self._pending_since >= self.flush_interval
+
+    def health(self) -> Dict[str, Any]:
+        """Write-behind status of this service"""
+        return {
+            "name": self.store.name,
+            "write_behind": self.write_behind,
+            "pending": len(self._pending),
+            "cards": len(self.state),
+            **self.stats,
+        }
+
+    def close(self):
+        """Flush pending reviews and close the store; later reviews are written directly"""
+        with self._lock:
+            if self._closed:
+                return
+            self._closed = True
+        self.flush()
+        self.store.close()
+
+    def _roll_budget_day(self):
+        """Reset the new-card counter when the day changes"""
         today = datetime.now().date().isoformat()
-        due_cards = []
+        if today != self.budget_day:
+            self.budget_day = today
+            self.introduced_today = 0
+
+    def due_count(self) -> int:
+        """Number of reviews due today"""
+        return self.due_index.count_due(datetime.now().date().isoformat())
+
+    def new_cards_remaining(self) -> int:
+        """New cards that can still be introduced today"""
+        self._roll_budget_day()
+        return max(0, self.config.new_cards_per_day - self.introduced_today)
+
+    def next_new_cards(self, snapshot, n: int) -> List[Dict[str, Any]]:
+        """First n catalog cards that have never been reviewed"""
+        cursor_snapshot, start = self._new_cursor
+        if cursor_snapshot is not snapshot:
+            start = 0
         new_cards = []
-        
-        for card in cards:
-            card_id = str(card["id"])
-            if card_id not in self.state:
-                if include_new and len(new_cards) < self.config.new_cards_per_day:
-                    new_cards.append(card)
-                continue
-            
-            if self.state[card_id]["due"] <= today:
-                due_cards.append(card)
+        pos = start
+        while pos < len(snapshot.cards) and len(new_cards) < n:
+            card = snapshot.cards[pos]
+            if str(card["id"]) not in self.seen_cards:
+                new_cards.append(card)
+            elif not new_cards:
+                # Every card before pos has been seen; skip them next time
+                start = pos + 1
+            pos += 1
+        self._new_cursor = (snapshot, start)
+        return new_cards
+
+    def get_due_cards(self, snapshot, include_new: bool = True) -> List[Dict[str, Any]]:
+        """Get cards due for review from a catalog snapshot"""
+        with self._lock:
+            return self._get_due_cards(snapshot, include_new)
+
+    def _get_due_cards(self, snapshot, include_new: bool) -> List[Dict[str, Any]]:
+        today = datetime.now().date().isoformat()
+        limit = self.config.daily_card_limit
+        new_cards = self.next_new_cards(snapshot, self.new_cards_remaining()) if include_new else []
         
         # Apply daily limit
-        total_cards = len(due_cards) + len(new_cards)
-        if total_cards > self.config.daily_card_limit:
-            due_cards = due_cards[:self.config.daily_card_limit]
+        if self.due_index.count_due(today) + len(new_cards) > limit:
             new_cards = []
+        due_cards = []
+        seen = set()
+        for card_id in self.due_index.next_due(limit, today):
+            base_id = card_base_id(card_id)
+            card = snapshot.by_id.get(int(base_id))
+            if card is not None and base_id not in seen:
+                seen.add(base_id)
+                due_cards.append(card)
         
         # Mix according to strategy
         if self.config.review_mix_strategy.strategy_type == "interleaved":
@@ -143,4 +364,35 @@ class SRSService:
             return mixed_cards
         else:
             # Return in blocks: reviews first, then new cards
-            return due_cards + new_cards 
\ No newline at end of file
+            return due_cards + new_cards
+
+
+def _start_flusher():
+    global _flusher_thread
+    with _dirty_lock:
+        if _flusher_thread is None:
+            _flusher_thread = threading.Thread(target=_flush_loop, name="srs-write-behind", daemon=True)
+            _flusher_thread.start()
+
+def _flush_loop():
+    while True:
+        _wake_flusher.wait(FLUSH_TICK)
+        _wake_flusher.clear()
+        now = time.monotonic()
+        with _dirty_lock:
+            services = list(_dirty_services)
+        for service in services:
+            if service.flush_due(now):
+                try:
+                    service.flush()
+                except Exception as e:
+                    print(f"Error saving SRS state for {service.store.name}: {e}")
+
+def flush_all() -> Dict[str, int]:
+    """Flush pending reviews of every write-behind service, grouped by store name"""
+    with _dirty_lock:
+        services = list(_dirty_services)
+    flushed: Dict[str, int] = {}
+    for service in services:
+        flushed[service.store.name] = flushed.get(service.store.name, 0) + service.flush()
+    return flushed
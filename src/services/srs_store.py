@@ -0,0 +1,394 @@
+"""
+Almacenamiento del estado SRS.
+
+``SRSService`` guarda el estado de cada tarjeta a través de un ``SRSStateStore``.
+Hay dos implementaciones: ``JSONStateStore`` (un fichero JSON por dirección de
+quiz y usuario) y ``SQLiteStateStore`` (una fila por usuario, dirección y
+tarjeta, actualizada con un único UPSERT por repaso). Las dos guardan los mismos
+campos, ``STATE_FIELDS``, con las tarjetas identificadas por su id en el
+catálogo ("12", o "12_china" en las direcciones de lectura). El fichero JSON usa
+un formato compacto, una lista de valores por tarjeta en el orden de
+``fields``; ``decode_state`` lee también el formato antiguo, un objeto por
+tarjeta.
+
+Los antiguos quiz de consola guardaban el estado por kanji ("年", "年_china").
+``rekey_state`` lo pasa a ids del catálogo; src/scripts/migrate_srs_state.py
+lo aplica a los ficheros antiguos y al estado ya importado.
+"""
+import json
+import os
+import sqlite3
+import tempfile
+import threading
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Set, Tuple
+
+from src.services.card_catalog import kanji_catalog
+from src.utils.db_pool import ConnectionPool, get_pool
+from src.utils.paths import DATA_DIR, SRS_DB_PATH, SRS_STATES_DIR
+
+# Usuario al que pertenece el estado creado antes de haber varios usuarios
+DEFAULT_USER = "default"
+
+# Columnas del estado de una tarjeta, en el orden de la tabla srs_state
+STATE_FIELDS = ["interval", "repetitions", "easiness", "due", "learning_step", "lapses", "last_review", "is_leech",
+                "introduced"]
+
+
+# Direcciones de quiz de kanji, y si cada tarjeta lleva el tipo de lectura en la clave ("12_china")
+KANJI_DIRECTIONS = {"significado_kanji": False, "lectura_kanji": True}
+READING_TYPES = ("china", "japonesa")
+# Ficheros de estado de versiones anteriores, relativos a data/, que se integran en cada dirección
+LEGACY_STATE_FILES = {
+    "significado_kanji": ["srs_state_significado_kanji.json", "srs_state_significado.json",
+                          "srs_states/srs_state_significado.json"],
+    "lectura_kanji": ["srs_state_lectura_kanji.json", "srs_state_kanji_lectura.json",
+                      "srs_states/srs_state_lectura.json"],
+}
+
+
+def normalize_card_state(card_state: Dict[str, Any]) -> Dict[str, Any]:
+    """Completa los campos que faltan en estados guardados por versiones antiguas"""
+    card_state.setdefault("interval", 0)
+    card_state.setdefault("repetitions", 0)
+    card_state.setdefault("easiness", 2.5)
+    card_state.setdefault("learning_step", 0)
+    card_state.setdefault("lapses", 0)
+    card_state.setdefault("last_review", card_state.get("due"))
+    card_state.setdefault("introduced", None)
+    return card_state
+
+
+def encode_state(state: Dict[str, Dict[str, Any]]) -> Dict[str, Any]:
+    """Estado en el formato compacto de los ficheros JSON"""
+    cards = {}
+    for card_id, card_state in state.items():
+        card_state = normalize_card_state(dict(card_state))
+        card_state["is_leech"] = int(bool(card_state.get("is_leech")))
+        cards[card_id] = [card_state[field] for field in STATE_FIELDS]
+    return {"fields": STATE_FIELDS, "cards": cards}
+
+
+def decode_state(data: Dict[str, Any]) -> Dict[str, Dict[str, Any]]:
+    """Estado leído de un fichero JSON, en formato compacto o en el antiguo (un objeto por tarjeta)"""
+    if "fields" not in data or "cards" not in data:
+        return {card_id: normalize_card_state(dict(card_state)) for card_id, card_state in data.items()}
+    fields = data["fields"]
+    state = {}
+    for card_id, values in data["cards"].items():
+        card_state = dict(zip(fields, values))
+        if card_state.pop("is_leech", False):
+            card_state["is_leech"] = True
+        state[card_id] = normalize_card_state(card_state)
+    return state
+
+
+def _most_recent(a: Dict[str, Any], b: Dict[str, Any]) -> Dict[str, Any]:
+    # El estado repasado más tarde; a igualdad, el que vence más tarde
+    key_a = (a.get("last_review") or a["due"], a["due"])
+    key_b = (b.get("last_review") or b["due"], b["due"])
+    return b if key_b > key_a else a
+
+
+def rekey_state(state: Dict[str, Dict[str, Any]], snapshot, reading: bool) -> Tuple[Dict[str, Dict[str, Any]], List[str]]:
+    """
+    Cambia las claves por kanji ("年", "年_china") por el id del kanji en el catálogo ("12", "12_china").
+
+    Las claves que ya son ids se conservan. Con reading las claves deben llevar
+    un tipo de lectura y sin él no deben llevarlo. Si dos claves acaban en la
+    misma tarjeta se queda el estado repasado más tarde. Devuelve el estado y
+    las claves descartadas, por no encontrarse el kanji o no tener la forma de
+    la dirección.
+    """
+    rekeyed: Dict[str, Dict[str, Any]] = {}
+    skipped = []
+    for key, card_state in state.items():
+        base, _, reading_type = key.partition("_")
+        if reading != bool(reading_type) or (reading_type and reading_type not in READING_TYPES):
+            skipped.append(key)
+            continue
+        if not base.isdigit():
+            card = snapshot.find("kanji", base)
+            if card is None:
+                skipped.append(key)
+                continue
+            base = str(card["id"])
+        card_id = f"{base}_{reading_type}" if reading_type else base
+        card_state = normalize_card_state(dict(card_state))
+        rekeyed[card_id] = _most_recent(rekeyed[card_id], card_state) if card_id in rekeyed else card_state
+    return rekeyed, skipped
+
+
+def merge_states(current: Dict[str, Dict[str, Any]], incoming: Dict[str, Dict[str, Any]]) -> Dict[str, Dict[str, Any]]:
+    """Tarjetas de incoming que no están en current o que se repasaron después"""
+    return {
+        card_id: card_state for card_id, card_state in incoming.items()
+        if card_id not in current or _most_recent(current[card_id], card_state) is card_state
+    }
+
+
+class SRSStateStore:
+    """Interfaz común de los almacenes de estado SRS"""
+
+    # Nombre con el que se identifica el almacén en logs y en /srs/health
+    name = "srs"
+
+    def load(self) -> Dict[str, Dict[str, Any]]:
+        """Devuelve el estado de todas las tarjetas"""
+        raise NotImplementedError
+
+    def save_card(self, card_id: str, card_state: Dict[str, Any]):
+        """Guarda el estado de una tarjeta"""
+        raise NotImplementedError
+
+    def save_all(self, state: Dict[str, Dict[str, Any]]):
+        """Guarda el estado de varias tarjetas"""
+        for card_id, card_state in state.items():
+            self.save_card(card_id, card_state)
+
+    def delete_cards(self, card_ids: Iterable[str]):
+        """Borra el estado de varias tarjetas"""
+        raise NotImplementedError
+
+    def close(self):
+        """Libera los recursos del almacén"""
+
+
+class JSONStateStore(SRSStateStore):
+    """Estado completo en un fichero JSON compacto, reescrito de forma atómica en cada cambio"""
+
+    def __init__(self, path: Path):
+        self.path = Path(path)
+        self.name = self.path.stem
+        self._state: Dict[str, Dict[str, Any]] = {}
+
+    def load(self) -> Dict[str, Dict[str, Any]]:
+        if self.path.exists():
+            with open(self.path, 'r', encoding='utf-8') as f:
+                self._state = decode_state(json.load(f))
+        return {card_id: dict(card_state) for card_id, card_state in self._state.items()}
+
+    def save_card(self, card_id: str, card_state: Dict[str, Any]):
+        self._state[card_id] = dict(card_state)
+        self._write()
+
+    def save_all(self, state: Dict[str, Dict[str, Any]]):
+        for card_id, card_state in state.items():
+            self._state[card_id] = dict(card_state)
+        self._write()
+
+    def delete_cards(self, card_ids: Iterable[str]):
+        for card_id in card_ids:
+            self._state.pop(card_id, None)
+        self._write()
+
+    def _write(self):
+        # Escribir en un temporal y renombrarlo para no dejar el fichero a medias
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(dir=self.path.parent, prefix=self.path.name, suffix='.tmp')
+        try:
+            with os.fdopen(fd, 'w', encoding='utf-8') as f:
+                json.dump(encode_state(self._state), f, ensure_ascii=False, separators=(',', ':'))
+            os.replace(tmp_path, self.path)
+        except BaseException:
+            os.unlink(tmp_path)
+            raise
+
+
+_SCHEMA = '''
+CREATE TABLE IF NOT EXISTS srs_state (
+    user_id TEXT NOT NULL DEFAULT 'default',
+    direction TEXT NOT NULL,
+    card_id TEXT NOT NULL,
+    interval INTEGER NOT NULL DEFAULT 0,
+    repetitions INTEGER NOT NULL DEFAULT 0,
+    easiness REAL NOT NULL DEFAULT 2.5,
+    due TEXT NOT NULL,
+    learning_step INTEGER NOT NULL DEFAULT 0,
+    lapses INTEGER NOT NULL DEFAULT 0,
+    last_review TEXT,
+    is_leech INTEGER NOT NULL DEFAULT 0,
+    introduced TEXT,
+    PRIMARY KEY (user_id, direction, card_id)
+)
+'''
+
+# Bases de datos cuyo esquema ya se ha comprobado en este proceso
+_migrated: Set[Path] = set()
+_migrated_lock = threading.Lock()
+
+
+def _migrate_schema(conn: sqlite3.Connection):
+    """Crea la tabla srs_state o la actualiza desde versiones anteriores"""
+    columns = [row[1] for row in conn.execute("PRAGMA table_info(srs_state)")]
+    if columns and "introduced" not in columns:
+        # Tablas creadas antes de guardar la fecha de introducción
+        conn.execute("ALTER TABLE srs_state ADD COLUMN introduced TEXT")
+    if columns and "user_id" not in columns:
+        # Tablas de un solo usuario: su estado pasa al usuario por defecto
+        conn.execute("ALTER TABLE srs_state RENAME TO srs_state_single_user")
+        conn.execute("DROP INDEX IF EXISTS idx_srs_state_due")
+        conn.execute(_SCHEMA)
+        conn.execute(
+            f"INSERT INTO srs_state (user_id, direction, card_id, {', '.join(STATE_FIELDS)}) "
+            f"SELECT '{DEFAULT_USER}', direction, card_id, {', '.join(STATE_FIELDS)} FROM srs_state_single_user"
+        )
+        conn.execute("DROP TABLE srs_state_single_user")
+    conn.execute(_SCHEMA)
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_srs_state_due ON srs_state (user_id, direction, due)")
+
+
+def _shared_pool(db_path: Path) -> ConnectionPool:
+    pool = get_pool(db_path)
+    with _migrated_lock:
+        if db_path not in _migrated:
+            with pool.writer() as conn:
+                _migrate_schema(conn)
+            _migrated.add(db_path)
+    return pool
+
+
+class SQLiteStateStore(SRSStateStore):
+    """Estado en la tabla srs_state, una fila por (user_id, direction, card_id)"""
+
+    def __init__(self, db_path: Path, direction: str, user_id: str = DEFAULT_USER):
+        self.db_path = Path(db_path)
+        self.direction = direction
+        self.user_id = user_id
+        self.name = direction
+        self._pool = _shared_pool(self.db_path)
+
+    def is_empty(self) -> bool:
+        """Indica si el usuario no tiene ninguna tarjeta guardada en esta dirección"""
+        with self._pool.reader() as conn:
+            row = conn.execute(
+                "SELECT 1 FROM srs_state WHERE user_id = ? AND direction = ? LIMIT 1",
+                (self.user_id, self.direction)
+            ).fetchone()
+        return row is None
+
+    def load(self) -> Dict[str, Dict[str, Any]]:
+        with self._pool.reader() as conn:
+            rows = conn.execute(
+                f"SELECT card_id, {', '.join(STATE_FIELDS)} FROM srs_state WHERE user_id = ? AND direction = ?",
+                (self.user_id, self.direction)
+            ).fetchall()
+        state = {}
+        for row in rows:
+            card_state = dict(zip(STATE_FIELDS, row[1:]))
+            if card_state.pop("is_leech"):
+                card_state["is_leech"] = True
+            state[row[0]] = card_state
+        return state
+
+    def _row(self, card_id: str, card_state: Dict[str, Any]) -> tuple:
+        card_state = normalize_card_state(dict(card_state))
+        return (
+            self.user_id, self.direction, card_id,
+            card_state["interval"], card_state["repetitions"], card_state["easiness"],
+            card_state["due"], card_state["learning_step"], card_state["lapses"],
+            card_state["last_review"], int(bool(card_state.get("is_leech"))),
+            card_state["introduced"],
+        )
+
+    def _upsert(self, rows):
+        placeholders = ', '.join('?' * (len(STATE_FIELDS) + 3))
+        updates = ', '.join(f"{field} = excluded.{field}" for field in STATE_FIELDS)
+        with self._pool.writer() as conn:
+            conn.executemany(
+                f"INSERT INTO srs_state (user_id, direction, card_id, {', '.join(STATE_FIELDS)}) "
+                f"VALUES ({placeholders}) "
+                f"ON CONFLICT(user_id, direction, card_id) DO UPDATE SET {updates}",
+                rows
+            )
+
+    def save_card(self, card_id: str, card_state: Dict[str, Any]):
+        self._upsert([self._row(card_id, card_state)])
+
+    def save_all(self, state: Dict[str, Dict[str, Any]]):
+        self._upsert([self._row(card_id, card_state) for card_id, card_state in state.items()])
+
+    def delete_cards(self, card_ids: Iterable[str]):
+        with self._pool.writer() as conn:
+            conn.executemany(
+                "DELETE FROM srs_state WHERE user_id = ? AND direction = ? AND card_id = ?",
+                [(self.user_id, self.direction, card_id) for card_id in card_ids]
+            )
+
+    def close(self):
+        """Las conexiones son compartidas con el resto de almacenes y siguen abiertas"""
+
+
+def legacy_json_path(direction: str) -> Path:
+    """Fichero JSON usado históricamente para una dirección de quiz"""
+    return DATA_DIR / f'srs_state_{direction}.json'
+
+
+def user_json_path(direction: str, user_id: str) -> Path:
+    """Fichero JSON de una dirección de quiz para un usuario"""
+    if user_id == DEFAULT_USER:
+        return legacy_json_path(direction)
+    return SRS_STATES_DIR / user_id / f'srs_state_{direction}.json'
+
+
+def read_json_state(json_path: Path) -> Dict[str, Dict[str, Any]]:
+    """Estado guardado en un fichero JSON, en cualquiera de los dos formatos"""
+    with open(json_path, 'r', encoding='utf-8') as f:
+        return decode_state(json.load(f))
+
+
+def import_json_state(store: SRSStateStore, json_path: Path) -> int:
+    """Copia en el almacén el estado guardado en un fichero JSON y devuelve cuántas tarjetas importó"""
+    state = read_json_state(json_path)
+    store.save_all(state)
+    return len(state)
+
+
+def migrate_kanji_state(store: SRSStateStore, direction: str, json_paths: Iterable[Path], snapshot) -> Dict[str, int]:
+    """
+    Pasa a ids del catálogo el estado de una dirección de kanji y le añade el de los ficheros antiguos.
+
+    Las claves por kanji que ya estaban en el almacén se sustituyen por su id.
+    De los ficheros solo se copian las tarjetas que el almacén no tiene o que
+    se repasaron después. Se puede ejecutar varias veces.
+    """
+    reading = KANJI_DIRECTIONS[direction]
+    stored = store.load()
+    # Claves por kanji guardadas por versiones anteriores
+    old_keys = [card_id for card_id in stored if not card_id.partition("_")[0].isdigit()]
+    kept = {card_id: card_state for card_id, card_state in stored.items() if card_id not in old_keys}
+    rekeyed, skipped = rekey_state({key: stored[key] for key in old_keys}, snapshot, reading)
+    # Las claves que no se pueden pasar a id se quedan en el almacén tal como están
+    stale = [key for key in old_keys if key not in set(skipped)]
+    changes = merge_states(kept, rekeyed)
+
+    imported = 0
+    for json_path in json_paths:
+        legacy, legacy_skipped = rekey_state(read_json_state(json_path), snapshot, reading)
+        skipped += legacy_skipped
+        new = merge_states({**kept, **changes}, legacy)
+        changes.update(new)
+        imported += len(new)
+
+    if changes:
+        store.save_all(changes)
+    if stale:
+        store.delete_cards(stale)
+    return {"rekeyed": len(stale), "imported": imported, "skipped": len(skipped)}
+
+
+def create_store(direction: str, backend: str = "sqlite", user_id: str = DEFAULT_USER) -> SRSStateStore:
+    """Crea el almacén de un usuario para una dirección de quiz ("significado_kanji", "lectura_kanji", ...)"""
+    if backend == "json":
+        return JSONStateStore(user_json_path(direction, user_id))
+    if backend == "sqlite":
+        store = SQLiteStateStore(SRS_DB_PATH, direction, user_id)
+        # Primera ejecución con SQLite: importar el estado JSON existente
+        legacy_path = legacy_json_path(direction)
+        if user_id == DEFAULT_USER and store.is_empty() and legacy_path.exists():
+            if direction in KANJI_DIRECTIONS:
+                migrate_kanji_state(store, direction, [legacy_path], kanji_catalog.snapshot())
+            else:
+                import_json_state(store, legacy_path)
+        return store
+    raise ValueError(f"Backend de estado SRS desconocido: {backend}")
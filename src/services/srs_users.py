@@ -0,0 +1,144 @@
+"""
+Servicios SRS por usuario.
+
+Cada dirección de quiz tiene un ``SRSUserPool`` que crea el ``SRSService`` de un
+usuario la primera vez que lo necesita, cargando solo el estado de ese usuario.
+Los servicios se guardan en un LRU acotado; al expulsar uno se escriben sus
+repasos pendientes y su estado se vuelve a leer del almacén si el usuario vuelve.
+Las cargas y los cierres se hacen fuera del lock del pool, así que un usuario
+que se carga no hace esperar a los que ya están en memoria.
+El pool guarda también el catálogo de las tarjetas de su dirección.
+"""
+import threading
+from collections import OrderedDict
+from concurrent.futures import Future
+from typing import Any, Dict, List, Optional
+
+from .card_catalog import CardCatalog
+from .srs_service import SRSService
+from .srs_store import create_store
+
+# Usuarios con el estado en memoria por cada dirección de quiz
+DEFAULT_CAPACITY = 1000
+
+_pools: List["SRSUserPool"] = []
+
+
+class SRSUserPool:
+    """LRU de servicios SRS de una dirección de quiz, uno por usuario"""
+
+    def __init__(self, direction: str, capacity: int = DEFAULT_CAPACITY, backend: str = "sqlite",
+                 catalog: Optional[CardCatalog] = None, **service_options):
+        self.direction = direction
+        # Catálogo del que salen las tarjetas de esta dirección
+        self.catalog = catalog
+        self.capacity = capacity
+        self.backend = backend
+        self.service_options = service_options
+        self._services: "OrderedDict[str, SRSService]" = OrderedDict()
+        # Usuarios que se están cargando y usuarios expulsados cuyo servicio se está cerrando
+        self._loading: Dict[str, "Future[SRSService]"] = {}
+        self._closing: Dict[str, "Future[None]"] = {}
+        self._lock = threading.Lock()
+        self.stats = {"loads": 0, "evictions": 0}
+        _pools.append(self)
+
+    def get(self, user_id: str) -> SRSService:
+        """Servicio SRS del usuario, cargándolo del almacén si no está en memoria"""
+        # El lock solo protege los diccionarios: cargar un usuario o cerrar uno
+        # expulsado no bloquea las peticiones de los demás
+        with self._lock:
+            service = self._services.get(user_id)
+            if service is not None:
+                self._services.move_to_end(user_id)
+                return service
+            loading = self._loading.get(user_id)
+            if loading is None:
+                loading = self._loading[user_id] = Future()
+                closing = self._closing.get(user_id)
+                owner = True
+            else:
+                owner = False
+        if not owner:
+            # Otra petición ya está cargando a este usuario
+            return loading.result()
+
+        try:
+            # Si el usuario acaba de ser expulsado, su estado se lee cuando termine de escribirse
+            if closing is not None:
+                closing.result()
+            service = SRSService(create_store(self.direction, self.backend, user_id), **self.service_options)
+        except BaseException as e:
+            with self._lock:
+                del self._loading[user_id]
+            loading.set_exception(e)
+            raise
+
+        evicted = []
+        with self._lock:
+            del self._loading[user_id]
+            self._services[user_id] = service
+            self.stats["loads"] += 1
+            while len(self._services) > self.capacity:
+                old_id, old_service = self._services.popitem(last=False)
+                done = self._closing[old_id] = Future()
+                evicted.append((old_id, old_service, done))
+        loading.set_result(service)
+
+        # Escribir los repasos pendientes de los expulsados fuera del lock; una nueva
+        # carga de esos usuarios espera a que terminen
+        for old_id, old_service, done in evicted:
+            try:
+                old_service.close()
+            finally:
+                with self._lock:
+                    if self._closing.get(old_id) is done:
+                        del self._closing[old_id]
+                    self.stats["evictions"] += 1
+                done.set_result(None)
+        return service
+
+    def health(self) -> Dict[str, Any]:
+        """Usuarios en memoria y repasos pendientes de escritura"""
+        with self._lock:
+            services = list(self._services.values())
+        return {
+            "direction": self.direction,
+            "users_loaded": len(services),
+            "capacity": self.capacity,
+            "pending": sum(len(service._pending) for service in services),
+            "flushed_cards": sum(service.stats["flushed_cards"] for service in services),
+            "flush_errors": sum(service.stats["flush_errors"] for service in services),
+            **self.stats,
+        }
+
+    def close(self):
+        """Escribe los repasos pendientes de todos los usuarios y vacía el LRU"""
+        with self._lock:
+            services = list(self._services.values())
+            self._services.clear()
+            closing = list(self._closing.values())
+        for service in services:
+            service.close()
+        # Y esperar a los expulsados que otras peticiones están cerrando
+        for done in closing:
+            done.result()
+
+
+def find_pool(direction: str) -> Optional[SRSUserPool]:
+    """Pool de usuarios de una dirección de quiz, o None si no hay ninguno"""
+    for pool in _pools:
+        if pool.direction == direction:
+            return pool
+    return None
+
+
+def health_all() -> List[Dict[str, Any]]:
+    """Estado de todos los pools de usuarios"""
+    return [pool.health() for pool in _pools]
+
+
+def close_all():
+    """Cierra todos los pools de usuarios"""
+    for pool in _pools:
+        pool.close()
@@ -1,12 +1,16 @@
-import json
+import argparse
+import hashlib
+import os
 import re
-import sqlite3
+import sys
+from multiprocessing import Pool
 from pathlib import Path
 
 # Determinar la ruta base del proyecto
 if __name__ == "__main__":
     # Si se ejecuta directamente, la ruta base es el directorio padre de src
     BASE_DIR = Path(__file__).parent.parent.parent
+    sys.path.insert(0, str(BASE_DIR))
 else:
     # Si se ejecuta como módulo, importar desde src.utils.paths
     from src.utils.paths import KANJI_JSON_PATH, KANJI_DB_PATH
@@ -18,6 +22,14 @@ if __name__ == "__main__":
     KANJI_DB_PATH = DATA_DIR / 'kanji.db'
     DATA_DIR.mkdir(exist_ok=True)
 
+from src.utils.db_pool import connect
+from src.utils.jsonl import iter_records, prefer_jsonl
+
+# Entradas cambiadas que se analizan e insertan de cada vez
+BATCH_SIZE = 1000
+# Por debajo de estas entradas cambiadas en un lote no compensa usar procesos
+PARALLEL_THRESHOLD = 500
+
 def limpiar_lectura(texto):
     if not texto:
         return None
@@ -30,23 +42,56 @@ def limpiar_lectura(texto):
     texto = re.sub(r'[,、]', '', texto)
     return texto.strip()
 
-def clean_kanji_data():
-    print("Iniciando limpieza de datos de kanji...")
-    
-    # Leer el archivo JSON
-    with open(KANJI_JSON_PATH, encoding="utf-8") as f:
-        data = json.load(f)
-
-    print("\nExtrayendo significados y lecturas...")
-    
-    # Conectar a la base de datos
-    conn = sqlite3.connect(KANJI_DB_PATH)
-    cursor = conn.cursor()
-    
-    # Crear tabla
-    cursor.execute('DROP TABLE IF EXISTS kanji')
-    cursor.execute('''
-    CREATE TABLE kanji (
+def content_hash(content):
+    """Huella del contenido de una entrada, para saber si hay que volver a procesarla"""
+    return hashlib.sha256((content or "").encode('utf-8')).hexdigest()
+
+def parse_content(content):
+    """Extrae (significado, lectura china, lectura japonesa) del texto de la página de un kanji"""
+    # Cortar a partir de la sección de palabras (marcada por "Palabras")
+    cut_point = content.find("Palabras")
+    if cut_point != -1:
+        content = content[:cut_point].rstrip()
+
+    lines = content.splitlines() or [""]
+
+    # Extraer significado de la primera línea: "<kanji> es el kanji de <meaning>"
+    meaning = None
+    m = re.match(r".*es el kanji de (.+)", lines[0])
+    if m:
+        meaning = m.group(1).strip()
+    else:
+        # fallback: tomar la segunda non-empty line
+        for ln in lines[1:]:
+            if ln.strip():
+                meaning = ln.strip()
+                break
+
+    # Extraer lecturas
+    on, kun = None, None
+    for i, ln in enumerate(lines):
+        if "Lecturas chinas" in ln:
+            # siguiente línea no vacía
+            for x in lines[i+1:]:
+                if x.strip():
+                    on = limpiar_lectura(x.strip())
+                    break
+        if "Lecturas japonesas" in ln:
+            for x in lines[i+1:]:
+                if x.strip():
+                    kun = limpiar_lectura(x.strip())
+                    break
+
+    return meaning, on, kun
+
+def _parse_row(item):
+    kanji, content, digest = item
+    return (kanji, *parse_content(content), digest)
+
+def ensure_kanji_table(conn):
+    """Crea la tabla kanji si no existe y le añade la columna content_hash si le falta"""
+    conn.execute('''
+    CREATE TABLE IF NOT EXISTS kanji (
         id INTEGER PRIMARY KEY AUTOINCREMENT,
         kanji TEXT UNIQUE NOT NULL,
         significado TEXT,
@@ -54,65 +99,91 @@ def clean_kanji_data():
         lectura_japonesa TEXT
     )
     ''')
-    
-    # Procesar cada entrada
-    for entry in data:
+    columns = {row[1] for row in conn.execute("PRAGMA table_info(kanji)")}
+    if "content_hash" not in columns:
+        conn.execute("ALTER TABLE kanji ADD COLUMN content_hash TEXT")
+
+def _pending_batches(entries, stored, seen, batch_size):
+    # Lotes de (kanji, contenido, hash) nuevos o modificados; se queda la primera entrada de cada kanji
+    batch = []
+    for entry in entries:
+        kanji = entry["kanji"]
+        if kanji in seen:
+            print(f"Advertencia: El kanji {kanji} está repetido")
+            continue
+        seen.add(kanji)
         content = entry.get("content", "")
-        # Cortar a partir de la sección de palabras (marcada por "Palabras")
-        cut_point = content.find("Palabras")
-        if cut_point != -1:
-            content = content[:cut_point].rstrip()
-        
-        lines = content.splitlines()
-
-        # Extraer significado de la primera línea: "<kanji> es el kanji de <meaning>"
-        meaning = None
-        m = re.match(r".*es el kanji de (.+)", lines[0])
-        if m:
-            meaning = m.group(1).strip()
-        else:
-            # fallback: tomar la segunda non-empty line
-            for ln in lines[1:]:
-                if ln.strip():
-                    meaning = ln.strip()
-                    break
+        digest = content_hash(content)
+        if stored.get(kanji) != digest:
+            batch.append((kanji, content, digest))
+            if len(batch) == batch_size:
+                yield batch
+                batch = []
+    if batch:
+        yield batch
 
-        # Extraer lecturas
-        on, kun = None, None
-        for i, ln in enumerate(lines):
-            if "Lecturas chinas" in ln:
-                # siguiente línea no vacía
-                for x in lines[i+1:]:
-                    if x.strip():
-                        on = limpiar_lectura(x.strip())
-                        break
-            if "Lecturas japonesas" in ln:
-                for x in lines[i+1:]:
-                    if x.strip():
-                        kun = limpiar_lectura(x.strip())
-                        break
-
-        # Insertar en la base de datos
-        try:
-            cursor.execute('''
-            INSERT INTO kanji (kanji, significado, lectura_china, lectura_japonesa)
-            VALUES (?, ?, ?, ?)
-            ''', (entry["kanji"], meaning, on, kun))
-        except sqlite3.IntegrityError:
-            print(f"Advertencia: El kanji {entry['kanji']} ya existe en la base de datos")
-
-    # Guardar cambios y cerrar conexión
-    conn.commit()
-    conn.close()
-    
-    print(f"Proceso completado: {len(data)} kanji procesados")
-    print(f"Datos guardados en {KANJI_DB_PATH}")
+def clean_kanji_data(force=False, processes=None, source=None):
+    """
+    Importa kanji_data.jsonl (o kanji_data.json) en la tabla kanji de forma incremental.
+
+    Las entradas se leen en streaming y se importan por lotes, así que la
+    memoria no depende del tamaño del fichero. Solo se procesan los kanji
+    nuevos o cuyo contenido ha cambiado desde la última importación, según el
+    hash guardado en content_hash. Las filas se actualizan en su sitio en una
+    sola transacción, sin borrar la tabla, así que conservan su id y sus
+    columnas de frecuencia y la API puede seguir leyendo mientras tanto. Con
+    force se vuelven a procesar todos.
+    """
+    print("Iniciando limpieza de datos de kanji...")
+    source = Path(source) if source else prefer_jsonl(KANJI_JSON_PATH)
+    print(f"Leyendo {source}")
+
+    conn = connect(KANJI_DB_PATH)
+    pool = None
+    seen = set()
+    updated = 0
+    try:
+        with conn:
+            ensure_kanji_table(conn)
+        stored = {} if force else dict(conn.execute("SELECT kanji, content_hash FROM kanji"))
+
+        with conn:
+            for batch in _pending_batches(iter_records(source), stored, seen, BATCH_SIZE):
+                if len(batch) >= PARALLEL_THRESHOLD and processes != 1:
+                    pool = pool or Pool(processes or os.cpu_count())
+                    rows = pool.map(_parse_row, batch, chunksize=256)
+                else:
+                    rows = [_parse_row(item) for item in batch]
+                # Insertar o actualizar en su sitio: id y columnas de frecuencia no cambian
+                conn.executemany('''
+                INSERT INTO kanji (kanji, significado, lectura_china, lectura_japonesa, content_hash)
+                VALUES (?, ?, ?, ?, ?)
+                ON CONFLICT(kanji) DO UPDATE SET
+                    significado = excluded.significado,
+                    lectura_china = excluded.lectura_china,
+                    lectura_japonesa = excluded.lectura_japonesa,
+                    content_hash = excluded.content_hash
+                ''', rows)
+                updated += len(rows)
 
-    # Guardar los datos limpios
-    with open(KANJI_JSON_PATH, "w", encoding="utf-8") as f:
-        json.dump(data, f, ensure_ascii=False, indent=2)
-    
+        missing = conn.execute("SELECT COUNT(*) FROM kanji").fetchone()[0] - len(seen)
+    finally:
+        if pool is not None:
+            pool.close()
+        conn.close()
+
+    print(f"\n{len(seen)} kanji en {source.name}, {updated} nuevos o modificados")
+    print(f"Proceso completado: {updated} kanji actualizados")
+    if missing > 0:
+        print(f"{missing} kanji de la base de datos no están en {source.name} y se conservan")
+    print(f"Datos guardados en {KANJI_DB_PATH}")
     print("Limpieza completada.")
 
 if __name__ == "__main__":
-    clean_kanji_data() 
\ No newline at end of file
+    parser = argparse.ArgumentParser(description="Importa kanji_data.jsonl o kanji_data.json en la tabla kanji")
+    parser.add_argument("--force", action="store_true", help="Volver a procesar todos los kanji")
+    parser.add_argument("--processes", type=int, default=None, help="Procesos para analizar el contenido")
+    parser.add_argument("--source", type=Path, default=None,
+                        help="Fichero .jsonl o .json (por defecto kanji_data.jsonl si existe, si no kanji_data.json)")
+    args = parser.parse_args()
+    clean_kanji_data(args.force, args.processes, args.source)
@@ -0,0 +1,147 @@
+"""
+Conexiones SQLite compartidas.
+
+Cada base de datos tiene un ``ConnectionPool`` con una única conexión de
+escritura y varias de solo lectura. Todas las conexiones se abren en modo WAL,
+así que los lectores no esperan al escritor ni entre ellos, y guardan en caché
+las sentencias preparadas que usan.
+
+    with get_pool(KANJI_DB_PATH).reader() as conn:
+        conn.execute("SELECT ...")
+
+    with get_pool(KANJI_DB_PATH).writer() as conn:
+        conn.execute("INSERT ...")  # se confirma al salir del bloque
+"""
+import queue
+import sqlite3
+import threading
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Dict, Iterator, Optional
+
+# Conexiones de solo lectura abiertas como máximo por base de datos
+MAX_READERS = 8
+# Sentencias preparadas que guarda cada conexión
+STATEMENT_CACHE_SIZE = 256
+# Segundos que se espera a que se libere un bloqueo antes de fallar
+BUSY_TIMEOUT = 5.0
+
+# Pragmas de cada conexión. Con WAL, synchronous=NORMAL solo puede perder las
+# últimas transacciones si se va la luz, nunca corromper la base de datos
+PRAGMAS = {
+    "synchronous": "NORMAL",
+    "cache_size": -16000,  # KiB de caché de páginas por conexión
+    "mmap_size": 64 * 1024 * 1024,
+    "temp_store": "MEMORY",
+}
+
+
+def connect(db_path: Path, read_only: bool = False) -> sqlite3.Connection:
+    """Abre una conexión con los pragmas comunes; las de solo lectura rechazan cualquier escritura"""
+    conn = sqlite3.connect(db_path, timeout=BUSY_TIMEOUT, check_same_thread=False,
+                           cached_statements=STATEMENT_CACHE_SIZE)
+    if not read_only:
+        # El modo WAL se guarda en el fichero, basta con que lo active una conexión de escritura
+        conn.execute("PRAGMA journal_mode = WAL")
+    for pragma, value in PRAGMAS.items():
+        conn.execute(f"PRAGMA {pragma} = {value}")
+    if read_only:
+        conn.execute("PRAGMA query_only = ON")
+    return conn
+
+
+class ConnectionPool:
+    """Una conexión de escritura y hasta max_readers de lectura para una base de datos"""
+
+    def __init__(self, db_path: Path, max_readers: int = MAX_READERS):
+        self.db_path = Path(db_path)
+        self.max_readers = max_readers
+        self._idle: "queue.LifoQueue[sqlite3.Connection]" = queue.LifoQueue()
+        self._readers = 0
+        self._readers_lock = threading.Lock()
+        self._writer: Optional[sqlite3.Connection] = None
+        self._writer_lock = threading.Lock()
+
+    def _writer_connection(self) -> sqlite3.Connection:
+        # Llamar con _writer_lock
+        if self._writer is None:
+            self._writer = connect(self.db_path)
+        return self._writer
+
+    def _acquire_reader(self) -> sqlite3.Connection:
+        try:
+            return self._idle.get_nowait()
+        except queue.Empty:
+            pass
+        with self._readers_lock:
+            create = self._readers < self.max_readers
+            if create:
+                self._readers += 1
+                first = self._readers == 1
+        if not create:
+            # Todas las conexiones están en uso: esperar a que se devuelva una
+            return self._idle.get()
+        try:
+            if first:
+                # Abrir antes el escritor para que la base de datos esté en modo WAL
+                with self._writer_lock:
+                    self._writer_connection()
+            return connect(self.db_path, read_only=True)
+        except BaseException:
+            with self._readers_lock:
+                self._readers -= 1
+            raise
+
+    @contextmanager
+    def reader(self) -> Iterator[sqlite3.Connection]:
+        """Presta una conexión de solo lectura"""
+        conn = self._acquire_reader()
+        try:
+            yield conn
+        finally:
+            if conn.in_transaction:
+                conn.rollback()
+            self._idle.put(conn)
+
+    @contextmanager
+    def writer(self) -> Iterator[sqlite3.Connection]:
+        """Presta la conexión de escritura en exclusiva; confirma al salir o deshace si hay una excepción"""
+        with self._writer_lock:
+            conn = self._writer_connection()
+            with conn:
+                yield conn
+
+    def close(self):
+        """Cierra la conexión de escritura y las de lectura que no están en uso"""
+        with self._writer_lock:
+            if self._writer is not None:
+                self._writer.close()
+                self._writer = None
+        while True:
+            try:
+                conn = self._idle.get_nowait()
+            except queue.Empty:
+                break
+            conn.close()
+            with self._readers_lock:
+                self._readers -= 1
+
+
+_pools: Dict[Path, ConnectionPool] = {}
+_pools_lock = threading.Lock()
+
+
+def get_pool(db_path: Path) -> ConnectionPool:
+    """Pool compartido por todo el proceso para una base de datos"""
+    db_path = Path(db_path)
+    with _pools_lock:
+        if db_path not in _pools:
+            _pools[db_path] = ConnectionPool(db_path)
+        return _pools[db_path]
+
+
+def close_pools():
+    """Cierra las conexiones de todos los pools"""
+    with _pools_lock:
+        for pool in _pools.values():
+            pool.close()
@@ -1,7 +1,8 @@
-import json
 import sqlite3
 from pathlib import Path
 
+from src.utils.jsonl import iter_records, prefer_jsonl
+
 def safe_int_convert(value):
     try:
         return int(value) if value.strip() else None
@@ -30,10 +31,9 @@ def import_kanji_data():
     )
     ''')
 
-    # Leer el archivo JSON
-    json_path = Path('data/kanji_data.json')
-    with open(json_path, 'r', encoding='utf-8') as f:
-        kanji_data = json.load(f)
+    # Leer el archivo JSONL o JSON en streaming: cada entrada se inserta en cuanto se lee
+    json_path = prefer_jsonl(Path('data/kanji_data.json'))
+    kanji_data = iter_records(json_path)
 
     # Insertar datos
     for entry in kanji_data:
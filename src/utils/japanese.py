@@ -0,0 +1,81 @@
+"""
+Normalización de texto japonés para búsquedas.
+
+``normalize`` unifica las variantes que un usuario puede escribir para la misma
+palabra: anchura (NFKC convierte ｶﾀｶﾅ de media anchura y ＡＢＣ de anchura
+completa), katakana frente a hiragana y mayúsculas frente a minúsculas.
+"""
+import re
+import unicodedata
+from typing import List
+
+# Katakana ァ..ヶ y ヽヾ están a 0x60 de sus equivalentes en hiragana
+_KATAKANA_TO_HIRAGANA = {code: code - 0x60 for code in list(range(0x30A1, 0x30F7)) + [0x30FD, 0x30FE]}
+
+# Separadores entre alternativas de un mismo campo ("ニチ, ジツ", "日、陽")
+_ALTERNATIVES = re.compile(r"\s*[、,，;；]\s*")
+# Separadores entre lecturas de un kanji, que también van separadas por espacios ("ニチ ジツ", "ひ -び -か")
+_READINGS = re.compile(r"[\s、,，;；]+")
+# Lectura entre corchetes tras la palabra: "今日【きょう】"
+_BRACKET_READING = re.compile(r"^(.*?)【(.*?)】$")
+# Parte opcional entre paréntesis, ya normalizados por NFKC: "旅行(する)"
+_OPTIONAL_PART = re.compile(r"\((.*?)\)")
+
+
+def katakana_to_hiragana(text: str) -> str:
+    """Convierte el katakana a hiragana y deja el resto del texto igual"""
+    return text.translate(_KATAKANA_TO_HIRAGANA)
+
+
+def normalize(text: str) -> str:
+    """Forma de búsqueda de un texto: NFKC, katakana como hiragana y en minúsculas"""
+    return katakana_to_hiragana(unicodedata.normalize("NFKC", text)).strip().lower()
+
+
+def is_kanji(char: str) -> bool:
+    """Indica si el carácter es un ideograma CJK"""
+    return "一" <= char <= "鿿" or "㐀" <= char <= "䶿" or char == "々"
+
+
+def split_alternatives(text: str) -> List[str]:
+    """Separa un campo con varias alternativas y descarta las vacías"""
+    return [part for part in _ALTERNATIVES.split(text or "") if part]
+
+
+def kanji_readings(field: str) -> List[str]:
+    """
+    Lecturas normalizadas de un campo lectura_china o lectura_japonesa.
+
+    Las lecturas pueden ir separadas por comas o por espacios.
+    Los guiones marcan okurigana o lecturas de sufijo ("い-く", "-び"): se
+    guarda la raíz y, si hay okurigana, también la lectura completa.
+    """
+    readings = []
+    for reading in _READINGS.split(field or ""):
+        reading = normalize(reading).strip("-.")
+        stem = re.split(r"[-.]", reading)[0]
+        full = re.sub(r"[-.]", "", reading)
+        for form in (stem, full):
+            if form and form not in readings:
+                readings.append(form)
+    return readings
+
+
+def word_forms(palabra: str) -> List[str]:
+    """
+    Formas normalizadas con las que se puede buscar una palabra.
+
+    Incluye cada alternativa ("てはいけない、ちゃいけない"), la lectura entre
+    corchetes si la tiene ("今日【きょう】" da "今日" y "きょう") y las partes
+    opcionales con y sin ellas ("旅行（する）" da "旅行" y "旅行する").
+    """
+    forms = []
+    match = _BRACKET_READING.match(palabra.strip())
+    parts = [match.group(1), match.group(2)] if match else [palabra]
+    for part in parts:
+        for form in split_alternatives(part):
+            form = normalize(form)
+            for variant in (_OPTIONAL_PART.sub("", form).strip(), _OPTIONAL_PART.sub(r"\1", form)):
+                if variant and variant not in forms:
+                    forms.append(variant)
+    return forms
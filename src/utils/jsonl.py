@@ -0,0 +1,149 @@
+"""
+Lectura y escritura de JSON en streaming.
+
+Los datos descargados se guardan en JSONL, un objeto JSON por línea, para poder
+leerlos y escribirlos registro a registro. ``iter_records`` lee tanto JSONL
+como un fichero JSON cuyo contenido es una lista, sin cargarlo entero en
+memoria: decodifica cada elemento en cuanto ha leído sus bytes, así que la
+memoria usada depende del tamaño de un registro y no del fichero.
+"""
+import json
+import os
+from pathlib import Path
+from typing import Any, Iterable, Iterator, TextIO, Tuple
+
+# Caracteres que se leen de cada vez del fichero JSON
+READ_SIZE = 1 << 16
+
+_decoder = json.JSONDecoder()
+_WHITESPACE = " \t\r\n"
+_NUMBER_CHARS = "0123456789+-.eE"
+
+
+class _Reader:
+    """Búfer sobre un fichero de texto que se va rellenando y descartando por delante"""
+
+    def __init__(self, f: TextIO):
+        self.f = f
+        self.buffer = ""
+        self.pos = 0
+        self.eof = False
+
+    def fill(self) -> bool:
+        """Lee más texto; devuelve False si el fichero se ha terminado"""
+        if self.eof:
+            return False
+        chunk = self.f.read(READ_SIZE)
+        if not chunk:
+            self.eof = True
+            return False
+        self.buffer = self.buffer[self.pos:] + chunk
+        self.pos = 0
+        return True
+
+    def peek(self) -> str:
+        """Siguiente carácter que no es espacio, o cadena vacía al final del fichero"""
+        while True:
+            while self.pos < len(self.buffer) and self.buffer[self.pos] in _WHITESPACE:
+                self.pos += 1
+            if self.pos < len(self.buffer):
+                return self.buffer[self.pos]
+            if not self.fill():
+                return ""
+
+    def expect(self, chars: str) -> str:
+        char = self.peek()
+        if not char or char not in chars:
+            raise ValueError(f"JSON inválido: se esperaba {' o '.join(repr(c) for c in chars)} y hay {char!r}")
+        self.pos += 1
+        return char
+
+    def value(self) -> Any:
+        """Decodifica el siguiente valor JSON, leyendo hasta tenerlo completo"""
+        self.peek()
+        while True:
+            try:
+                value, end = _decoder.raw_decode(self.buffer, self.pos)
+            except json.JSONDecodeError:
+                if self.fill():
+                    continue
+                raise
+            # Un número cortado por el final del búfer ("23" de "23.5e3") sigue en el siguiente bloque
+            if (isinstance(value, (int, float)) and not isinstance(value, bool)
+                    and (end == len(self.buffer) or self.buffer[end] in _NUMBER_CHARS) and self.fill()):
+                continue
+            self.pos = end
+            return value
+
+
+def _iter_container(f: TextIO, open_char: str, close_char: str, keyed: bool) -> Iterator[Any]:
+    reader = _Reader(f)
+    reader.expect(open_char)
+    if reader.peek() == close_char:
+        reader.pos += 1
+        return
+    while True:
+        if keyed:
+            key = reader.value()
+            reader.expect(":")
+            yield key, reader.value()
+        else:
+            yield reader.value()
+        if reader.expect("," + close_char) == close_char:
+            return
+
+
+def iter_json_array(f: TextIO) -> Iterator[Any]:
+    """Elementos de un fichero JSON cuyo contenido es una lista, uno a uno"""
+    return _iter_container(f, "[", "]", keyed=False)
+
+
+def iter_json_object(f: TextIO) -> Iterator[Tuple[str, Any]]:
+    """Pares (clave, valor) de un fichero JSON cuyo contenido es un objeto, uno a uno"""
+    return _iter_container(f, "{", "}", keyed=True)
+
+
+def iter_jsonl(path: Path) -> Iterator[Any]:
+    """Registros de un fichero JSONL; se ignoran las líneas vacías"""
+    with open(path, encoding='utf-8') as f:
+        for number, line in enumerate(f, 1):
+            if line.strip():
+                try:
+                    yield json.loads(line)
+                except json.JSONDecodeError as e:
+                    raise ValueError(f"{path}:{number}: {e}") from e
+
+
+def iter_records(path: Path) -> Iterator[Any]:
+    """Registros de un fichero .jsonl o de la lista de un fichero .json, en streaming"""
+    path = Path(path)
+    if path.suffix == ".jsonl":
+        yield from iter_jsonl(path)
+        return
+    with open(path, encoding='utf-8') as f:
+        yield from iter_json_array(f)
+
+
+def prefer_jsonl(path: Path) -> Path:
+    """El .jsonl junto a un fichero .json si existe; si no, el propio .json"""
+    path = Path(path)
+    jsonl = path.with_suffix(".jsonl")
+    return jsonl if jsonl.exists() else path
+
+
+def write_jsonl(path: Path, records: Iterable[Any]) -> int:
+    """
+    Escribe los registros en JSONL y devuelve cuántos hay.
+
+    Se escribe en un fichero temporal que sustituye al final al de destino, así
+    que un fallo a mitad nunca deja el fichero de destino a medias.
+    """
+    path = Path(path)
+    tmp = path.with_name(path.name + ".tmp")
+    count = 0
+    with open(tmp, 'w', encoding='utf-8') as f:
+        for record in records:
+            f.write(json.dumps(record, ensure_ascii=False) + "\n")
+            count += 1
+    os.replace(tmp, path)
+    return count
@@ -0,0 +1,236 @@
+"""
+Frecuencias de kanji por corpus.
+
+Cada corpus (aozora, news, wiki) se resume en dos recuentos por carácter: cuántas
+veces aparece (``char_count``) y en cuántos documentos (``doc_count``). La fila
+``all`` guarda el total de caracteres y de documentos, igual que en los ficheros
+``data/*_characters.csv`` y ``data/*_documents.csv``.
+
+``combine`` une los recuentos de todos los corpus en las columnas de
+``data/kanji_combined.csv``. Cada ``*_freq`` es el recuento dividido entre la suma
+de su columna, incluida la fila ``all``, como en el fichero original.
+
+Todo se procesa en streaming: los CSV se leen fila a fila y el texto se proyecta
+en memoria con mmap y se cuenta por trozos en un pool de procesos, así que la
+memoria solo depende del número de kanji distintos y del tamaño de los trozos,
+no del tamaño del corpus.
+"""
+import csv
+import mmap
+import os
+import re
+import time
+from collections import Counter
+from multiprocessing import Pool
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Tuple
+
+# Clave de los totales en los recuentos
+ALL = "all"
+# Nombre de cada corpus en las columnas de kanji_combined.csv y prefijo de sus ficheros en data/
+SOURCES = {"aozora": "aozora", "news": "news", "wiki": "wikipedia"}
+# Bytes de texto que cuenta cada tarea del pool
+RANGE_SIZE = 64 << 20
+
+# Ideogramas CJK: bloque principal, extensión A, compatibilidad y extensiones B en adelante
+KANJI_PATTERN = re.compile("[㐀-䶿一-鿿豈-﫿\U00020000-\U0003134f]")
+
+# (recuento de apariciones, recuento de documentos) de un corpus
+Counts = Tuple[Counter, Counter]
+
+
+def read_counts(path: Path, column: str) -> Counter:
+    """Lee un fichero *_characters.csv o *_documents.csv fila a fila"""
+    counts: Counter = Counter()
+    with open(path, newline='', encoding='utf-8') as f:
+        for row in csv.DictReader(f):
+            counts[row["char"]] += int(float(row[column]))
+    return counts
+
+
+def write_counts(path: Path, counts: Counter, column: str):
+    """Escribe un recuento con el formato de data/*_characters.csv (rank denso, all primero)"""
+    rows = sorted(((char, count) for char, count in counts.items() if char != ALL), key=lambda item: (-item[1], item[0]))
+    with open(path, 'w', newline='', encoding='utf-8') as f:
+        writer = csv.writer(f)
+        writer.writerow(["rank", "code_point_hex", "char", column])
+        writer.writerow([0, "0", ALL, counts[ALL]])
+        rank, previous = 0, None
+        for char, count in rows:
+            if count != previous:
+                rank, previous = rank + 1, count
+            writer.writerow([rank, format(ord(char), 'x'), char, count])
+
+
+def read_source(data_dir: Path, prefix: str) -> Counts:
+    """Recuentos de un corpus a partir de sus dos CSV en data_dir"""
+    return (read_counts(data_dir / f"{prefix}_characters.csv", "char_count"),
+            read_counts(data_dir / f"{prefix}_documents.csv", "doc_count"))
+
+
+def split_points(data, parts: int, doc_per_line: bool) -> List[int]:
+    """
+    Posiciones en bytes donde se puede partir un texto UTF-8 en unos ``parts`` trozos.
+
+    Con ``doc_per_line`` se corta justo después de un salto de línea, para no
+    partir ningún documento; si no, al principio de un carácter, saltando los
+    bytes de continuación de UTF-8 (10xxxxxx).
+    """
+    size = len(data)
+    points = [0]
+    for part in range(1, parts):
+        point = max(size * part // parts, points[-1])
+        if doc_per_line:
+            newline = data.find(b"\n", point)
+            point = size if newline == -1 else newline + 1
+        else:
+            while point < size and data[point] & 0xC0 == 0x80:
+                point += 1
+        if point > points[-1]:
+            points.append(point)
+    if points[-1] != size:
+        points.append(size)
+    return points
+
+
+def _count_range(task) -> Tuple[Path, Counter, Counter, set, int, float]:
+    # Cuenta los kanji de data[start:end] de un fichero proyectado en memoria
+    path, start, end, doc_per_line = task
+    began = time.process_time()
+    char_counts: Counter = Counter()
+    doc_counts: Counter = Counter()
+    seen: set = set()
+    with open(path, 'rb') as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as data:
+        text = data[start:end].decode('utf-8', errors='replace')
+    if doc_per_line:
+        for line in text.split("\n"):
+            if line.strip():
+                kanji = KANJI_PATTERN.findall(line)
+                char_counts.update(kanji)
+                doc_counts.update(set(kanji))
+                doc_counts[ALL] += 1
+    else:
+        kanji = KANJI_PATTERN.findall(text)
+        char_counts.update(kanji)
+        seen.update(kanji)
+    return path, char_counts, doc_counts, seen, end - start, time.process_time() - began
+
+
+class CorpusCount:
+    """Recuentos de un corpus de texto y lo que ha costado obtenerlos"""
+
+    def __init__(self, char_counts: Counter, doc_counts: Counter, size: int, elapsed: float,
+                 cpu_seconds: float, processes: int):
+        self.char_counts = char_counts
+        self.doc_counts = doc_counts
+        self.size = size
+        self.elapsed = elapsed
+        self.cpu_seconds = cpu_seconds
+        self.processes = processes
+
+    @property
+    def counts(self) -> Counts:
+        return self.char_counts, self.doc_counts
+
+    def throughput(self) -> float:
+        """MB/s leídos del corpus en total"""
+        return self.size / 1e6 / self.elapsed if self.elapsed else 0.0
+
+    def throughput_per_core(self) -> float:
+        """MB/s por núcleo, según el tiempo de CPU de los procesos que cuentan"""
+        return self.size / 1e6 / self.cpu_seconds if self.cpu_seconds else 0.0
+
+
+def count_corpus(paths: Iterable[Path], doc_per_line: bool = False, processes: Optional[int] = None,
+                 range_size: int = RANGE_SIZE) -> CorpusCount:
+    """
+    Cuenta los kanji de varios ficheros de texto UTF-8 en paralelo.
+
+    Cada fichero se proyecta en memoria y se parte en trozos de unos
+    ``range_size`` bytes, y al menos uno por proceso, que se cuentan por
+    separado. El fichero es un único documento, o uno por línea con
+    ``doc_per_line``; en el primer caso los kanji vistos en cada trozo se unen
+    antes de contar el documento.
+    """
+    processes = processes or os.cpu_count() or 1
+    paths = [Path(path) for path in paths]
+    tasks = []
+    for path in paths:
+        if os.path.getsize(path) == 0:
+            continue
+        with open(path, 'rb') as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as data:
+            parts = max(processes, -(-len(data) // range_size))
+            points = split_points(data, parts, doc_per_line)
+        tasks += [(path, start, end, doc_per_line) for start, end in zip(points, points[1:])]
+
+    char_counts: Counter = Counter()
+    doc_counts: Counter = Counter()
+    seen_by_file: Dict[Path, set] = {}
+    size = 0
+    cpu_seconds = 0.0
+    began = time.perf_counter()
+    with Pool(processes) as pool:
+        for path, range_chars, range_docs, seen, range_bytes, range_seconds in pool.imap_unordered(_count_range, tasks):
+            char_counts.update(range_chars)
+            doc_counts.update(range_docs)
+            seen_by_file.setdefault(path, set()).update(seen)
+            size += range_bytes
+            cpu_seconds += range_seconds
+    if not doc_per_line:
+        for path in paths:
+            doc_counts.update(seen_by_file.get(path, ()))
+            doc_counts[ALL] += 1
+    char_counts[ALL] = sum(count for char, count in char_counts.items() if char != ALL)
+    return CorpusCount(char_counts, doc_counts, size, time.perf_counter() - began, cpu_seconds, processes)
+
+
+def combined_columns(sources: Iterable[str]) -> List[str]:
+    """Columnas de kanji_combined.csv para los corpus dados"""
+    sources = list(sources)
+    return (["char"]
+            + [f"{source}_char_count" for source in sources] + [f"{source}_doc_count" for source in sources]
+            + ["total_char_count", "total_doc_count"]
+            + [f"{source}_char_freq" for source in sources] + [f"{source}_doc_freq" for source in sources]
+            + ["total_char_freq", "total_doc_freq"])
+
+
+def combine(counts: Dict[str, Counts]) -> List[Dict[str, object]]:
+    """
+    Une los recuentos de cada corpus en las filas de kanji_combined.csv.
+
+    Las filas van de mayor a menor total_char_count, con all en primer lugar.
+    Los recuentos se escriben como float, igual que en el fichero original.
+    """
+    chars = set()
+    for char_counts, doc_counts in counts.values():
+        chars.update(char_counts)
+        chars.update(doc_counts)
+
+    rows = []
+    for char in chars:
+        row: Dict[str, object] = {"char": char}
+        for source, (char_counts, doc_counts) in counts.items():
+            row[f"{source}_char_count"] = float(char_counts[char])
+            row[f"{source}_doc_count"] = float(doc_counts[char])
+        row["total_char_count"] = sum(float(char_counts[char]) for char_counts, _ in counts.values())
+        row["total_doc_count"] = sum(float(doc_counts[char]) for _, doc_counts in counts.values())
+        rows.append(row)
+
+    # Cada frecuencia se divide entre la suma de su columna, incluida la fila all
+    count_columns = [f"{source}_{kind}" for kind in ("char", "doc") for source in counts] + ["total_char", "total_doc"]
+    for column in count_columns:
+        column_sum = sum(row[f"{column}_count"] for row in rows)
+        for row in rows:
+            row[f"{column}_freq"] = row[f"{column}_count"] / column_sum if column_sum else 0.0
+
+    # Los empates se ordenan por código de carácter para que la salida sea reproducible
+    rows.sort(key=lambda row: (row["char"] != ALL, -row["total_char_count"], row["char"]))
+    return rows
+
+
+def write_combined(path: Path, rows: List[Dict[str, object]], sources: Iterable[str]):
+    """Escribe las filas de combine con las columnas de kanji_combined.csv"""
+    with open(path, 'w', newline='', encoding='utf-8') as f:
+        writer = csv.DictWriter(f, fieldnames=combined_columns(sources))
+        writer.writeheader()
+        writer.writerows(rows)
@@ -7,6 +7,9 @@ BASE_DIR = Path(__file__).parent.parent.parent
 DATA_DIR = BASE_DIR / 'data'
 KANJI_DB_PATH = DATA_DIR / 'kanji.db'
 KANJI_JSON_PATH = DATA_DIR / 'kanji_data.json'
+KANJI_JSONL_PATH = DATA_DIR / 'kanji_data.jsonl'
+SRS_DB_PATH = DATA_DIR / 'srs_state.db'
+SRS_STATES_DIR = DATA_DIR / 'srs_states'
 
 # Crear directorio de datos si no existe
 DATA_DIR.mkdir(exist_ok=True) 
\ No newline at end of file